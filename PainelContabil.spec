@@ -1,7 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('app.py', '.')]
+datas = [('app.py', '.'), ('painel_dados.py', '.'), ('painel_matriz.py', '.'), ('painel_atualizacao.py', '.'), ('painel_banco.py', '.'), ('painel_cache.py', '.'), ('painel_graficos.py', '.'), ('painel_metricas.py', '.'), ('painel_exportacao.py', '.'), ('painel_compartilhado.py', '.'), ('painel_proxy.py', '.')]
 binaries = []
 hiddenimports = []
 tmp_ret = collect_all('streamlit')
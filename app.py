@@ -9,12 +9,34 @@
 # - Leitura automática do único .xlsx na MESMA pasta do app.
 
 
-import io
 import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 import sys, os
+import hmac
+import uuid
+from functools import partial
+
+from painel_dados import (
+    COL_NO_CONTA, COL_ANO, COL_MES, COL_SALDO,
+    COL_CO_TP, COL_NO_TP,
+    EV_ANT_ANO, EV_ANT_MES, EV_SEG_ANO, EV_SEG_MES,
+    format_brl, format_brl_vetorizado, month_label, tipo_rotulo, conta_tipo_label, estatisticas_series,
+    tabela_eventos, texto_sem_separador,
+    MODO_ARQUIVOS,
+)
+from painel_atualizacao import gerenciador_da_pasta
+from painel_cache import CACHE_RESULTADOS, ConsultasEmCache
+from painel_exportacao import (
+    MAX_CELULAS as MAX_CELULAS_EXPORTACAO, MIME, exportacao_eventos, exportacao_historico, exportacao_matriz,
+    gerar_arquivo, grande_demais, nome_arquivo,
+)
+from painel_graficos import MAX_PAINEIS, MAX_PONTOS, MAX_SERIES_ROTULADAS, grafico_linhas, payloads, pequenos_multiplos
+from painel_matriz import ESTILO_SEM_REGISTRO
+from painel_metricas import (
+    ATIVO as METRICAS_ATIVAS, configurar_log, execucoes_da_sessao, finalizar_execucao, iniciar_execucao,
+    limpar as limpar_metricas, marcar_pagina, medir, memoria_dados, qtd_sessoes, resumo_etapas,
+)
 
 import sys, os
 def _get_base_dir():
@@ -26,109 +48,25 @@ BASE_DIR = _get_base_dir()
 # Config & Constantes
 # ----------------------
 st.set_page_config(page_title="Painel Contábil", layout="wide")
-
-# DADOS (nomes da sua planilha)
-COL_ID_CONTA = "ID_CONTA_CONTABIL"
-COL_NO_CONTA = "NO_CONTA_CONTABIL"
-COL_ANO = "ID_ANO_LANC"
-COL_MES = "ID_MES_LANC"
-COL_DATA = "DATA"  # só p/ meses válidos
-COL_SALDO = "SALDORCONTACONTBIL"
-COL_MES_TXT = "SG_MES_COMPLETO"
-
-# Tipificação
-COL_ID_TP = "ID_TP_CCOR"
-COL_CO_TP = "CO_TP_CCOR"
-COL_NO_TP = "NO_TP_CCOR"
-
-# EVENTOS
-EV_ANT_ANO = "ANO_ANTERIOR"
-EV_ANT_MES = "MES_ANTERIOR"
-EV_SEG_ANO = "ANO_SEGUINTE"
-EV_SEG_MES = "MES_SEGUINTE"
-EV_SALDO_ANT = "SALDO_ANTERIOR"  # só em SURGIU
+SENHA_ADMIN = os.environ.get("PAINEL_ADMIN_SENHA", "")  # vazio = sem página de administração
 
 # ----------------------
 # Helpers
 # ----------------------
-def format_brl(value) -> str:
-    """Formata números como Real: R$ 1.234.567,89 (trata NaN/None/inf)."""
-    # Trata valores nulos/NaN/inf logo de cara
-    if value is None:
-        return "-"
-    try:
-        x = float(value)
-    except (TypeError, ValueError):
-        return "-"
-    if np.isnan(x) or np.isinf(x):
-        return "-"
-    neg = x < 0
-    x = abs(x)
-    inteiro, decimal = divmod(int(round(x * 100)), 100)
-    inteiro_str = f"{int(inteiro):,}".replace(",", ".")
-    decimal_str = f"{int(decimal):02d}"
-    s = f"R$ {inteiro_str},{decimal_str}"
-    return f"-{s}" if neg else s
-
-def as_text_no_sep(series):
-    """Converte números para texto sem separadores (evita 2,025 etc.)."""
-    def fmt(v):
-        try:
-            if pd.isna(v):
-                return ""
-            iv = int(v)
-            if float(v) == iv:
-                return str(iv)
-        except Exception:
-            pass
-        return str(v)
-    return series.apply(fmt)
-
-def month_label(dt: pd.Timestamp) -> str:
-    """Ex.: 2025-08-01 -> 'Ago/2025'"""
-    meses = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
-    return f"{meses[dt.month-1]}/{dt.year}"
-
-def build_month_slider_options(df_mes_valido: pd.DataFrame):
-    """Retorna (lista_de_datas, lista_de_labels). Usa apenas meses válidos (DATA)."""
-    if df_mes_valido[COL_DATA].notna().any():
-        datas = sorted(pd.to_datetime(df_mes_valido[COL_DATA].dropna().unique()).tolist())
-        labels = [month_label(d) for d in datas]
-        return datas, labels
-    return [], []
-
-def name_map(dados: pd.DataFrame) -> pd.DataFrame:
-    return (
-        dados[[COL_ID_CONTA, COL_NO_CONTA]]
-        .dropna()
-        .drop_duplicates(subset=[COL_ID_CONTA], keep="last")
-    )
-
-def enrich_event_sheet(event_df: pd.DataFrame, nm: pd.DataFrame) -> pd.DataFrame:
-    if COL_ID_CONTA not in event_df.columns:
-        st.warning("A planilha de evento não possui a coluna ID_CONTA_CONTABIL.")
-    return event_df.merge(nm, on=COL_ID_CONTA, how="left")
-
-def tipo_rotulo(co, no) -> str:
-    if pd.isna(co) and pd.isna(no):
-        return "(tipo desconhecido)"
-    if pd.isna(no):
-        return f"{int(co)}"
-    if pd.isna(co):
-        return str(no)
-    return f"{int(co)} - {no}"
-
-def conta_tipo_label(conta, co, no) -> str:
-    return f"{conta} | {tipo_rotulo(co, no)}"
-
-def build_month_order_labels(dados: pd.DataFrame) -> list:
-    """Ordena SG_MES_COMPLETO por (ANO, MES_ORDER) com mês 0 vindo antes de jan."""
-    if all(c in dados.columns for c in [COL_ANO, COL_MES, COL_MES_TXT]):
-        tmp = dados[[COL_ANO, COL_MES, COL_MES_TXT]].dropna(subset=[COL_ANO, COL_MES]).drop_duplicates()
-        tmp["MES_ORDER"] = np.where(tmp[COL_MES] == 0, -1, tmp[COL_MES])
-        tmp.sort_values([COL_ANO, "MES_ORDER"], inplace=True)
-        return tmp[COL_MES_TXT].tolist()
-    return []
+def botoes_download(tabela, chave: str):
+    """CSV/xlsx gerados só no clique, em blocos e fora do script da página (não trava as outras sessões)."""
+    if grande_demais(tabela):
+        celulas, limite = (f"{n:,}".replace(",", ".") for n in (tabela.celulas, MAX_CELULAS_EXPORTACAO))
+        st.caption(f"⬇️ Tabela grande demais para baixar pelo navegador ({celulas} células; limite {limite} em "
+                   "PAINEL_EXPORTAR_MAX_CELULAS). Refine a busca ou use o exportar_relatorios.py, que grava direto "
+                   "em disco.")
+        return
+    colunas = st.columns([1, 1, 6])
+    for col, formato in zip(colunas, ("csv", "xlsx")):
+        col.download_button(
+            f"⬇️ {formato.upper()}", data=partial(gerar_arquivo, tabela, formato),
+            file_name=f"{tabela.nome}.{formato}", mime=MIME[formato], key=f"{chave}_{formato}", on_click="ignore",
+        )
 
 def parse_co_from_label(label: str):
     """Extrai CO_TP_CCOR numérico de um rótulo 'CO - NO' quando possível."""
@@ -137,61 +75,6 @@ def parse_co_from_label(label: str):
         return int(head) if head.isdigit() else None
     return None
 
-def add_valor_fmt(df: pd.DataFrame, value_col: str = COL_SALDO):
-    """Adiciona coluna VALOR_FMT em BRL para usar no hover de gráficos."""
-    df = df.copy()
-    df["VALOR_FMT"] = df[value_col].apply(format_brl)
-    return df
-
-def apply_hover_brl(fig):
-    """Hover mostra BRL e oculta extra."""
-    fig.update_traces(hovertemplate="%{text}<extra></extra>")
-    return fig
-
-def ensure_datetime_and_flags(dados: pd.DataFrame) -> pd.DataFrame:
-    """Cria MES_VALIDO (1..12) e DATA só para meses válidos; mantém mês 0 nas tabelas."""
-    y = pd.to_numeric(dados.get(COL_ANO, pd.Series(dtype="float")), errors="coerce")
-    m = pd.to_numeric(dados.get(COL_MES, pd.Series(dtype="float")), errors="coerce")
-    dados["MES_VALIDO"] = m.between(1, 12)
-    dados[COL_DATA] = pd.NaT
-    mask_valid = y.notna() & m.notna() & dados["MES_VALIDO"]
-    if mask_valid.any():
-        yy = y[mask_valid].astype(int)
-        mm = m[mask_valid].astype(int)
-        dados.loc[mask_valid, COL_DATA] = pd.to_datetime(dict(year=yy, month=mm, day=1), errors="coerce")
-    qtd_m0 = int((m == 0).sum())
-    if qtd_m0 > 0:
-        st.info(f"ℹ️ {qtd_m0} linha(s) com mês = 0. Elas aparecem nas tabelas, mas ficam fora de KPIs e gráficos.")
-    return dados
-
-# Necessária nas abas Surgiu/Zerou
-def expandir_eventos_por_tipo(event_df: pd.DataFrame, usar_mes: str) -> pd.DataFrame:
-    """
-    Retorna tabela expandida em (Conta, Tipo) para o período do evento.
-    usar_mes: "seguinte" -> join com (ANO_SEGUINTE, MES_SEGUINTE)
-              "anterior" -> join com (ANO_ANTERIOR, MES_ANTERIOR)
-    Preserva SEMPRE as colunas de referência (ANTERIOR e SEGUINTE).
-    """
-    keep_cols = [COL_ID_CONTA, COL_NO_CONTA, EV_SEG_ANO, EV_SEG_MES, EV_ANT_ANO, EV_ANT_MES]
-    keep_cols = [c for c in keep_cols if c in event_df.columns]
-    eventos = event_df[keep_cols].copy()
-
-    if usar_mes == "seguinte":
-        ycol, mcol = EV_SEG_ANO, EV_SEG_MES
-    else:
-        ycol, mcol = EV_ANT_ANO, EV_ANT_MES
-
-    eventos = eventos.rename(columns={ycol: "ANO_EVT", mcol: "MES_EVT"})
-
-    j = eventos.merge(
-        dados_analise_base[[COL_ID_CONTA, COL_CO_TP, COL_NO_TP, COL_ANO, COL_MES, COL_SALDO]],  # meses válidos
-        left_on=[COL_ID_CONTA, "ANO_EVT", "MES_EVT"],
-        right_on=[COL_ID_CONTA, COL_ANO, COL_MES],
-        how="left"
-    )
-    j["TIPO_ROT"] = j.apply(lambda r: tipo_rotulo(r.get(COL_CO_TP), r.get(COL_NO_TP)), axis=1)
-    return j
-
 # ----------------------
 # Leitura automática do .xlsx na mesma pasta
 # ----------------------
@@ -204,24 +87,21 @@ def _get_base_dir():
 
 BASE_DIR = _get_base_dir()
 
-def encontrar_xlsx_unico(pasta: str) -> str:
-    xlsx = [f for f in os.listdir(pasta) if f.lower().endswith(".xlsx")]
+def verificar_pasta(pasta: str):
+    """Para o app se não houver .xlsx; avisa se houver mais de um no modo de arquivo único."""
+    xlsx = [f for f in os.listdir(pasta) if f.lower().endswith(".xlsx") and not f.startswith("~$")]
     if not xlsx:
         st.error("Nenhum arquivo .xlsx encontrado na pasta do app.")
         st.stop()
-    if len(xlsx) > 1:
+    if len(xlsx) > 1 and MODO_ARQUIVOS != "todos":
         st.warning("Mais de um .xlsx encontrado na pasta. Usando o primeiro em ordem alfabética.")
-        xlsx.sort()
-    return os.path.join(pasta, xlsx[0])
-
-@st.cache_data(show_spinner=False)
-def load_excel_from_path(file_path: str, mtime: float):
-    """Lê as 3 planilhas do Excel. mtime no cache garante recarregar quando o arquivo é atualizado."""
-    with pd.ExcelFile(file_path) as xls:
-        dados = pd.read_excel(xls, sheet_name="DADOS")
-        surg = pd.read_excel(xls, sheet_name="SALDO-SURGIU")
-        zerou = pd.read_excel(xls, sheet_name="SALDO-ZEROU")
-    return dados, surg, zerou
+
+@st.cache_resource(show_spinner="Preparando dados...")
+def obter_gerenciador():
+    """1 gerenciador por processo: primeira carga aqui; depois a thread de vigia troca a versão sozinha."""
+    ger = gerenciador_da_pasta(BASE_DIR)  # o mesmo que o run_streamlit.py pré-aquece
+    ger.atual()
+    return ger.iniciar()
 
 # ----------------------
 # UI (cabeçalho)
@@ -229,352 +109,512 @@ def load_excel_from_path(file_path: str, mtime: float):
 st.title("📊 Painel Contábil (Streamlit)")
 st.caption("Leitura automática do .xlsx na mesma pasta. Sem agregação entre CO_TP_CCOR. Mês 0 fora de KPIs/gráficos; visível nas tabelas.")
 
-# Localiza e carrega o arquivo
-ARQ_XLSX = encontrar_xlsx_unico(BASE_DIR)
-MTIME = os.path.getmtime(ARQ_XLSX)
-st.info(f"📂 Arquivo carregado: **{os.path.basename(ARQ_XLSX)}** (última modificação: {pd.to_datetime(MTIME, unit='s'):%d/%m/%Y %H:%M})")
-
-dados, surg_raw, zerou_raw = load_excel_from_path(ARQ_XLSX, MTIME)
-
-# Preparação base
-dados = ensure_datetime_and_flags(dados)
-dados_analise_base = dados[dados["MES_VALIDO"]].copy()   # só meses válidos (para KPIs/gráficos)
-dados_tabela  = dados.copy()                              # todas as linhas (inclui mês 0) para tabelas
-if dados_analise_base[COL_DATA].notna().any():
-    dados_analise_base.sort_values(COL_DATA, inplace=True)
-
-nm = name_map(dados)
-surg = enrich_event_sheet(surg_raw.copy(), nm)
-zerou = enrich_event_sheet(zerou_raw.copy(), nm)
-
-# Navegação lateral
-page = st.sidebar.radio(
-    "Navegação",
-    ["Visão Geral da Conta", "Análise Comparativa", "Matriz Cronológica", "Saldo Surgiu", "Saldo Zerou"]
-)
-
-# ----------------------
-# PÁGINA: Visão Geral da Conta
-# ----------------------
-if page == "Visão Geral da Conta":
-    st.subheader("🔎 Visão Geral da Conta")
-
-    datas_opts, _ = build_month_slider_options(dados_analise_base)
-    if datas_opts:
-        v0, v1 = st.select_slider(
-            "Período (mensal)",
-            options=datas_opts,
-            format_func=lambda d: month_label(pd.to_datetime(d)),
-            value=(datas_opts[0], datas_opts[-1]),
-        )
-        mask = (dados_analise_base[COL_DATA] >= v0) & (dados_analise_base[COL_DATA] <= v1)
-        dados_analise = dados_analise_base[mask].copy()
+# Tempos das etapas desta execução (PAINEL_METRICAS=1; desligado não custa nada)
+configurar_log(BASE_DIR)
+if "_sessao" not in st.session_state:
+    st.session_state["_sessao"] = uuid.uuid4().hex[:8]
+iniciar_execucao(st.session_state["_sessao"])
+
+# try/finally: execução interrompida por st.stop()/st.rerun() ou erro também entra nas métricas
+try:
+    # Localiza e carrega o(s) arquivo(s); a versão fica fixa durante toda esta execução do script
+    verificar_pasta(BASE_DIR)
+    with medir("carga"):
+        GER = obter_gerenciador()
+        VERSAO_DADOS = GER.atual()
+    VERSAO = VERSAO_DADOS.assinatura
+    # Resultados das páginas em cache LRU por (versão, consulta, parâmetros), compartilhado entre sessões
+    ds = ConsultasEmCache(VERSAO_DADOS.dados, VERSAO)
+    ARQUIVOS = ds.arquivos
+    MTIME = ds.mtime
+    modificado = f"{pd.to_datetime(MTIME, unit='s'):%d/%m/%Y %H:%M}"
+    carregado = f"{pd.to_datetime(VERSAO_DADOS.carregado_em, unit='s'):%d/%m/%Y %H:%M:%S}"
+    if len(ARQUIVOS) == 1:
+        st.info(f"📂 Arquivo carregado: **{os.path.basename(ARQUIVOS[0])}** (última modificação: {modificado})")
     else:
-        dados_analise = dados_analise_base.copy()
-
-    contas = sorted(dados_tabela[COL_NO_CONTA].dropna().unique().tolist())
-    conta_sel = st.selectbox("Conta", options=contas, index=0 if contas else None)
-
-    if conta_sel:
-        tipos_conta = (
-            dados_tabela.loc[dados_tabela[COL_NO_CONTA] == conta_sel, [COL_CO_TP, COL_NO_TP]]
-            .drop_duplicates()
-            .sort_values(COL_CO_TP, na_position="last")
-        )
-        if len(tipos_conta) == 0:
-            st.warning("Conta sem CO_TP_CCOR informado.")
+        nomes = ", ".join(os.path.basename(a) for a in ARQUIVOS)
+        st.info(f"📂 {len(ARQUIVOS)} arquivos consolidados: **{nomes}** (última modificação: {modificado})")
+    st.caption(f"🔄 Versão dos dados: **{VERSAO_DADOS.numero}** · carregada em {carregado}"
+               + (" · nova versão sendo preparada em segundo plano..." if GER.recarregando else ""))
+
+    for aviso in ds.avisos:
+        st.warning(aviso)
+    if ds.qtd_mes0 > 0:
+        st.info(f"ℹ️ {ds.qtd_mes0} linha(s) com mês = 0. Elas aparecem nas tabelas, mas ficam fora de KPIs e gráficos.")
+
+    MAX_RESULTADOS_BUSCA = 50  # contas enviadas aos seletores por busca
+
+    # Objetos compartilhados entre sessões: páginas só consultam (nunca alteram in-place).
+    # ds: DadosPreparados (pandas) ou BancoDuckDB (PAINEL_BACKEND=duckdb), mesma interface de consultas.
+    surg = ds.surg
+    zerou = ds.zerou
+
+    with st.sidebar.expander("ℹ️ Leitura do arquivo"):
+        if ds.leitura:
+            st.dataframe(pd.DataFrame(ds.leitura), hide_index=True, use_container_width=True)
+
+    # Navegação lateral
+    # Página de administração só com ?admin=<senha> na URL, sendo a senha a da variável PAINEL_ADMIN_SENHA
+    # (sem a variável, não há página de administração: ela permite limpar o cache para todos)
+    ADMIN = bool(SENHA_ADMIN) and hmac.compare_digest(str(st.query_params.get("admin", "")), SENHA_ADMIN)
+    page = st.sidebar.radio(
+        "Navegação",
+        ["Visão Geral da Conta", "Análise Comparativa", "Maiores Variações", "Matriz Cronológica", "Saldo Surgiu", "Saldo Zerou"]
+        + (["Administração"] if ADMIN else [])
+    )
+    marcar_pagina(page)
+
+    # ----------------------
+    # PÁGINA: Visão Geral da Conta
+    # ----------------------
+    if page == "Visão Geral da Conta":
+        st.subheader("🔎 Visão Geral da Conta")
+
+        datas_opts = ds.datas_opts
+        if datas_opts:
+            v0, v1 = st.select_slider(
+                "Período (mensal)",
+                options=datas_opts,
+                format_func=lambda d: month_label(pd.to_datetime(d)),
+                value=(datas_opts[0], datas_opts[-1]),
+            )
         else:
-            opts = [tipo_rotulo(r[COL_CO_TP], r[COL_NO_TP]) for _, r in tipos_conta.iterrows()]
-            tipo_sel_label = opts[0] if len(opts) == 1 else st.selectbox("CO_TP_CCOR (obrigatório quando houver mais de um)", options=opts)
-            co_sel = parse_co_from_label(tipo_sel_label)
-
-            base_pair = dados_analise[(dados_analise[COL_NO_CONTA] == conta_sel) & (dados_analise[COL_CO_TP] == co_sel)].copy()
-            base_pair = base_pair.groupby(COL_DATA, as_index=False, observed=False)[COL_SALDO].sum()
-
-            if base_pair.empty:
-                st.warning("Sem dados (com mês válido) para esse par Conta/Tipo no período.")
+            v0 = v1 = None
+
+        # Busca no catálogo de contas (montado 1x por versão): só as melhores correspondências vão ao navegador
+        catalogo = ds.catalogo
+        busca = st.text_input("Buscar conta (nome, parte do nome ou código)", key="vg_busca",
+                              placeholder="ex.: caixa, banc mov, 1.1.1")
+        contas, total = catalogo.buscar(busca, limite=MAX_RESULTADOS_BUSCA)
+        if total > len(contas):
+            st.caption(f"{total} contas encontradas; mostrando as {len(contas)} melhores. Refine a busca para ver as demais.")
+        elif busca and not total:
+            st.warning("Nenhuma conta encontrada para a busca.")
+        conta_sel = st.selectbox("Conta", options=contas, index=0 if contas else None, format_func=catalogo.rotulo)
+
+        if conta_sel:
+            tipos_conta = ds.tipos_da_conta(conta_sel)
+            if len(tipos_conta) == 0:
+                st.warning("Conta sem CO_TP_CCOR informado.")
             else:
-                saldo_recente = base_pair.iloc[-1][COL_SALDO]
-                pico_saldo = base_pair[COL_SALDO].max()
-                variacao_total = base_pair.iloc[-1][COL_SALDO] - base_pair.iloc[0][COL_SALDO]
-                c1, c2, c3 = st.columns(3)
-                c1.metric("Saldo Mais Recente", format_brl(saldo_recente))
-                c2.metric("Pico de Saldo", format_brl(pico_saldo))
-                c3.metric("Variação Total no Período", format_brl(variacao_total))
-
-                no_tp = tipos_conta.set_index(COL_CO_TP).loc[co_sel, COL_NO_TP] if co_sel in tipos_conta[COL_CO_TP].values else ""
-                titulo = f"Evolução do Saldo — {conta_tipo_label(conta_sel, co_sel, no_tp)}"
-                chart_df = add_valor_fmt(base_pair, COL_SALDO)
-                fig = px.line(chart_df, x=COL_DATA, y=COL_SALDO, text="VALOR_FMT", title=titulo, markers=True)
-                fig.update_layout(xaxis_title="Data", yaxis_title="Saldo", legend_title=None)
-                fig.update_traces(mode="lines+markers+text", textposition="top center", textfont_size=12)
-                fig = apply_hover_brl(fig)
-                st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Selecione uma conta.")
-
-# ----------------------
-# PÁGINA: Análise Comparativa
-# ----------------------
-elif page == "Análise Comparativa":
-    st.subheader("📈 Análise Comparativa")
-
-    datas_opts, _ = build_month_slider_options(dados_analise_base)
-    if datas_opts:
-        v0, v1 = st.select_slider(
-            "Período (mensal)",
-            options=datas_opts,
-            format_func=lambda d: month_label(pd.to_datetime(d)),
-            value=(datas_opts[0], datas_opts[-1]),
-            key="cmp_period"
-        )
-        mask = (dados_analise_base[COL_DATA] >= v0) & (dados_analise_base[COL_DATA] <= v1)
-        dados_analise = dados_analise_base[mask].copy()
-    else:
-        dados_analise = dados_analise_base.copy()
-
-    pares = (
-        dados_tabela[[COL_NO_CONTA, COL_CO_TP, COL_NO_TP]]
-        .dropna(subset=[COL_NO_CONTA, COL_CO_TP])
-        .drop_duplicates()
-    )
-    pares["LABEL"] = pares.apply(lambda r: conta_tipo_label(r[COL_NO_CONTA], r[COL_CO_TP], r[COL_NO_TP]), axis=1)
+                opts = [tipo_rotulo(r[COL_CO_TP], r[COL_NO_TP]) for _, r in tipos_conta.iterrows()]
+                tipo_sel_label = opts[0] if len(opts) == 1 else st.selectbox("CO_TP_CCOR (obrigatório quando houver mais de um)", options=opts)
+                co_sel = parse_co_from_label(tipo_sel_label)
 
-    sel = st.multiselect(
-        "Selecione de 2 a 5 pares (Conta | CO_TP_CCOR – NO_TP_CCOR)",
-        options=sorted(pares["LABEL"].tolist())
-    )
-    if sel and len(sel) > 5:
-        st.warning("Selecione no máximo 5 pares. Considerando apenas os 5 primeiros.")
-        sel = sel[:5]
+                base_pair = ds.serie(conta_sel, co_sel, v0, v1)
 
-    if not sel or len(sel) < 2:
-        st.info("Selecione pelo menos 2 pares para comparar.")
-    else:
-        pares_sel = pares[pares["LABEL"].isin(sel)]
-        base = dados_analise.merge(pares_sel[[COL_NO_CONTA, COL_CO_TP, "LABEL"]], on=[COL_NO_CONTA, COL_CO_TP], how="inner")
-        if base.empty:
-            st.warning("Sem dados no período selecionado para os pares escolhidos.")
+                if base_pair.empty:
+                    st.warning("Sem dados (com mês válido) para esse par Conta/Tipo no período.")
+                else:
+                    saldo_recente = base_pair.iloc[-1][COL_SALDO]
+                    pico_saldo = base_pair[COL_SALDO].max()
+                    variacao_total = base_pair.iloc[-1][COL_SALDO] - base_pair.iloc[0][COL_SALDO]
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Saldo Mais Recente", format_brl(saldo_recente))
+                    c2.metric("Pico de Saldo", format_brl(pico_saldo))
+                    c3.metric("Variação Total no Período", format_brl(variacao_total))
+
+                    no_tp = tipos_conta.set_index(COL_CO_TP).loc[co_sel, COL_NO_TP] if co_sel in tipos_conta[COL_CO_TP].values else ""
+                    titulo = f"Evolução do Saldo — {conta_tipo_label(conta_sel, co_sel, no_tp)}"
+                    fig = grafico_linhas(base_pair, titulo, nome="Visão Geral")
+                    with medir("render"):
+                        st.plotly_chart(fig, use_container_width=True)
         else:
-            grp = base.groupby(["LABEL", COL_DATA], as_index=False, observed=False)[COL_SALDO].sum()
-            chart_df = add_valor_fmt(grp, COL_SALDO)
-            fig = px.line(chart_df, x=COL_DATA, y=COL_SALDO, color="LABEL", text="VALOR_FMT",
-                          title="Comparativo (uma série por Conta | Tipo)", markers=True)
-            fig.update_layout(xaxis_title="Data", yaxis_title="Saldo", legend_title="")
-            fig.update_traces(mode="lines+markers+text", textposition="top center", textfont_size=11)
-            fig = apply_hover_brl(fig)
-            st.plotly_chart(fig, use_container_width=True)
-
-# ----------------------
-# PÁGINA: Matriz Cronológica
-# ----------------------
-elif page == "Matriz Cronológica":
-    st.subheader("🧮 Matriz Cronológica (Pivot) — linhas por Conta | Tipo (sem agregação entre tipos)")
-
-    # Filtro por 1 a 5 contas
-    contas = sorted(dados_tabela[COL_NO_CONTA].dropna().unique().tolist())
-    contas_sel = st.multiselect("Contas (1 a 5)", options=contas)
-    if contas_sel and len(contas_sel) > 5:
-        st.warning("Selecione no máximo 5 contas. Considerando apenas as 5 primeiras.")
-        contas_sel = contas_sel[:5]
-
-    if contas_sel:
-        base_tab = dados_tabela[dados_tabela[COL_NO_CONTA].isin(contas_sel)].copy()
-    else:
-        base_tab = dados_tabela.copy()
-
-    ordem_labels = build_month_order_labels(base_tab)
-    if ordem_labels:
-        cat_type = pd.CategoricalDtype(categories=ordem_labels, ordered=True)
-        with pd.option_context("mode.chained_assignment", None):
-            base_tab[COL_MES_TXT] = base_tab[COL_MES_TXT].astype(cat_type)
-
-    df_rows = base_tab.copy()
-    df_rows["ROW"] = df_rows.apply(lambda r: conta_tipo_label(r[COL_NO_CONTA], r[COL_CO_TP], r[COL_NO_TP]), axis=1)
-
-    # >>>>>>>>>>>>>>> ALTERAÇÃO: distinguir ausência ( '-') de valor zero ('R$ 0,00') <<<<<<<<<<<<<<
-    col_mes = COL_MES_TXT if COL_MES_TXT in df_rows.columns else COL_DATA
-
-    # Soma dos saldos
-    pivot_sum = pd.pivot_table(
-        df_rows,
-        index="ROW",
-        columns=col_mes,
-        values=COL_SALDO,
-        aggfunc="sum",
-        observed=False
-    )
-
-    # Contagem real de linhas (indica se existe registro naquele mês)
-    df_rows["_cnt"] = 1
-    pivot_cnt = pd.pivot_table(
-        df_rows,
-        index="ROW",
-        columns=col_mes,
-        values="_cnt",
-        aggfunc="sum",
-        observed=False
-    )
-
-    has_record = pivot_cnt.fillna(0) > 0           # True = existe linha, False = não existe
-    to_show    = pivot_sum.where(has_record)       # onde não existe -> NaN (para virar '-')
-
-    pivot_fmt = to_show.map(lambda v: format_brl(v) if pd.notna(v) else "-")
-    # Estilo visual: cinza claro onde NÃO há registro
-    style_mask = (~has_record).values
-    def _style(_):
-        return np.where(style_mask, "background-color:#f6f6f6; color:#888;", "")
-    st.dataframe(pivot_fmt.style.apply(_style, axis=None), use_container_width=True)
-
-    # Diagnóstico de células sem registro (usa pivot_cnt/has_record)
-    with st.expander("🔎 Linhas com células vazias (mostrar até 100)"):
-        empties = []
-        for i, row in has_record.iterrows():
-            cols_na = row[~row].index.tolist()   # meses onde não há registro
-            if cols_na:
-                empties.append({"Conta | Tipo": i, "Meses sem registro": ", ".join(map(str, cols_na))})
-        if empties:
-            diag = pd.DataFrame(empties)[:100]
-            st.dataframe(diag, use_container_width=True)
-            st.caption(f"Total de linhas com ao menos uma célula vazia: {len(empties)}")
+            st.info("Selecione uma conta.")
+
+    # ----------------------
+    # PÁGINA: Análise Comparativa
+    # ----------------------
+    elif page == "Análise Comparativa":
+        st.subheader("📈 Análise Comparativa")
+        MAX_SERIES_COMPARACAO = 500
+
+        datas_opts = ds.datas_opts
+        if datas_opts:
+            v0, v1 = st.select_slider(
+                "Período (mensal)",
+                options=datas_opts,
+                format_func=lambda d: month_label(pd.to_datetime(d)),
+                value=(datas_opts[0], datas_opts[-1]),
+                key="cmp_period"
+            )
         else:
-            st.info("Não encontrei células vazias nesta seleção. Selecione outras contas para verificar.")
-    # <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
-
-# ----------------------
-# PÁGINA: Saldo Surgiu
-# ----------------------
-elif page == "Saldo Surgiu":
-    st.subheader("🟢 Saldo Surgiu (Fonte: SALDO-SURGIU) — sem agregação entre tipos")
-
-    if all(c in surg.columns for c in [EV_SEG_ANO, EV_SEG_MES]):
-        anos = sorted(surg[EV_SEG_ANO].dropna().astype(int).unique().tolist())
-        meses = sorted(surg[EV_SEG_MES].dropna().astype(int).unique().tolist())
-        c1, c2 = st.columns(2)
-        ano_sel = c1.selectbox("Ano do evento (SEGUINTE)", options=anos, index=len(anos)-1 if anos else 0)
-        mes_sel = c2.selectbox("Mês do evento (SEGUINTE)", options=meses, index=len(meses)-1 if meses else 0)
-
-        base_evt = surg[(surg[EV_SEG_ANO] == ano_sel) & (surg[EV_SEG_MES] == mes_sel)].copy()
-        if base_evt.empty:
-            st.info("Sem registros para esse período.")
+            v0 = v1 = None
+
+        pares = ds.pares()
+
+        # Séries por par escolhido, por conta inteira (todos os tipos) ou por busca no rótulo
+        modo = st.radio("Escolher séries por", ["Pares", "Contas inteiras", "Busca no rótulo"],
+                        horizontal=True, key="cmp_modo")
+        if modo == "Pares":
+            sel = st.multiselect(
+                "Pares (Conta | CO_TP_CCOR – NO_TP_CCOR)",
+                options=sorted(pares["LABEL"].tolist()),
+                key="cmp_pares",
+            )
+            pares_sel = pares[pares["LABEL"].isin(sel)]
+        elif modo == "Contas inteiras":
+            contas_cmp = st.multiselect("Contas (todos os tipos de cada conta)", options=ds.contas(), key="cmp_contas")
+            pares_sel = pares[pares[COL_NO_CONTA].isin(contas_cmp)]
         else:
-            exp = expandir_eventos_por_tipo(base_evt, usar_mes="seguinte")
-            exp.rename(columns={COL_SALDO: "VALOR_QUE_SURGIU"}, inplace=True)
-
-            qtd = len(exp)
-            total_valor = exp["VALOR_QUE_SURGIU"].sum(skipna=True)
-            k1, k2 = st.columns(2)
-            k1.metric("Qtd. (Conta, Tipo)", f"{qtd}")
-            k2.metric("Valor Total que Surgiu", format_brl(total_valor))
-
-            cols_tab = [COL_NO_CONTA, "TIPO_ROT", "VALOR_QUE_SURGIU"]
-            if EV_ANT_MES in exp.columns: cols_tab.append(EV_ANT_MES)
-            if EV_ANT_ANO in exp.columns: cols_tab.append(EV_ANT_ANO)
-            tabela = exp[cols_tab].copy()
-            tabela["VALOR_QUE_SURGIU"] = tabela["VALOR_QUE_SURGIU"].apply(format_brl)
-            if EV_ANT_MES in tabela.columns: tabela[EV_ANT_MES] = as_text_no_sep(tabela[EV_ANT_MES])
-            if EV_ANT_ANO in tabela.columns: tabela[EV_ANT_ANO] = as_text_no_sep(tabela[EV_ANT_ANO])
-
-            ren = {COL_NO_CONTA: "Conta", "TIPO_ROT": "CO_TP_CCOR"}
-            if EV_ANT_MES in tabela.columns: ren[EV_ANT_MES] = "Mês Anterior Ref."
-            if EV_ANT_ANO in tabela.columns: ren[EV_ANT_ANO] = "Ano Anterior Ref."
-            tabela.rename(columns=ren, inplace=True)
-            st.dataframe(tabela, use_container_width=True)
-
-            st.markdown("#### 🔍 Investigação (Histórico do Par Conta/Tipo)")
-            pares_evt = tabela.copy()
-            pares_evt["LABEL"] = pares_evt["Conta"] + " | " + pares_evt["CO_TP_CCOR"]
-            escolha = st.selectbox("Selecione um (Conta | Tipo)", options=sorted(pares_evt["LABEL"].unique().tolist()))
-            if escolha:
-                conta_escolhida, tipo_escolhido = escolha.split(" | ", 1)
-                co_tp = parse_co_from_label(tipo_escolhido)
-                base_ok = dados_analise_base[(dados_analise_base[COL_NO_CONTA] == conta_escolhida) & (dados_analise_base[COL_CO_TP] == co_tp)]
-                grp = base_ok.groupby(COL_DATA, as_index=False, observed=False)[COL_SALDO].sum()
-                if grp.empty:
-                    st.info("Sem meses válidos para traçar o gráfico deste par.")
+            termo = st.text_input("Rótulo contém (Conta | Tipo)", key="cmp_busca")
+            achou = pares["LABEL"].astype(str).str.contains(termo.strip(), case=False, regex=False)
+            pares_sel = pares[achou] if termo.strip() else pares.iloc[0:0]
+        if len(pares_sel) > MAX_SERIES_COMPARACAO:
+            st.warning(f"{len(pares_sel)} séries selecionadas. Considerando apenas as {MAX_SERIES_COMPARACAO} primeiras (ordem alfabética).")
+            pares_sel = pares_sel.sort_values("LABEL").iloc[:MAX_SERIES_COMPARACAO]
+
+        if len(pares_sel) < 2:
+            st.info(f"Selecione pelo menos 2 séries para comparar (até {MAX_SERIES_COMPARACAO}).")
+        else:
+            # Todas as séries numa passada pelo índice de séries (sem merge com o razão)
+            grp = ds.comparativo(pares_sel, v0, v1)
+            if grp.empty:
+                st.warning("Sem dados no período selecionado para os pares escolhidos.")
+            else:
+                n_series = grp["LABEL"].nunique()
+                if n_series <= MAX_SERIES_ROTULADAS:
+                    fig = grafico_linhas(grp, "Comparativo (uma série por Conta | Tipo)", nome="Comparativa")
                 else:
-                    chart_df = add_valor_fmt(grp, COL_SALDO)
-                    titulo = f"Histórico — {conta_tipo_label(conta_escolhida, co_tp, None)}"
-                    fig = px.line(chart_df, x=COL_DATA, y=COL_SALDO, text="VALOR_FMT", markers=True, title=titulo)
-                    fig.update_layout(xaxis_title="Data", yaxis_title="Saldo")
-                    fig.update_traces(mode="lines+markers+text", textposition="top center", textfont_size=12)
-                    fig = apply_hover_brl(fig)
+                    # Muitas séries: só linhas (valor no hover), sobrepostas ou 1 painel por série
+                    vis = st.radio("Visualização", ["Sobrepostas (WebGL)", "Pequenos múltiplos"], horizontal=True, key="cmp_vis")
+                    if vis == "Pequenos múltiplos":
+                        fig = pequenos_multiplos(grp)
+                        if n_series > MAX_PAINEIS:
+                            st.caption(f"Mostrando {MAX_PAINEIS} de {n_series} séries (ordem alfabética). Veja todas na tabela abaixo.")
+                    else:
+                        fig = grafico_linhas(grp, f"Comparativo — {n_series} séries (Conta | Tipo)", nome="Comparativa")
+                with medir("render"):
                     st.plotly_chart(fig, use_container_width=True)
 
-                hist_tab = dados_tabela[(dados_tabela[COL_NO_CONTA] == conta_escolhida) & (dados_tabela[COL_CO_TP] == co_tp)][[COL_ANO, COL_MES, COL_SALDO]].sort_values([COL_ANO, COL_MES]).copy()
-                hist_tab["Saldo"] = hist_tab[COL_SALDO].apply(format_brl)
-                hist_tab["Ano"] = as_text_no_sep(hist_tab[COL_ANO])
-                hist_tab["Mês"] = as_text_no_sep(hist_tab[COL_MES])
-                st.dataframe(hist_tab[["Ano", "Mês", "Saldo"]], hide_index=True, use_container_width=True)
-    else:
-        st.warning("SALDO-SURGIU sem colunas esperadas (ANO/MÊS SEGUINTE).")
-
-# ----------------------
-# PÁGINA: Saldo Zerou
-# ----------------------
-elif page == "Saldo Zerou":
-    st.subheader("🔴 Saldo Zerou (Fonte: SALDO-ZEROU) — sem agregação entre tipos")
-
-    if all(c in zerou.columns for c in [EV_SEG_ANO, EV_SEG_MES, EV_ANT_ANO, EV_ANT_MES]):
-        anos = sorted(zerou[EV_SEG_ANO].dropna().astype(int).unique().tolist())
-        meses = sorted(zerou[EV_SEG_MES].dropna().astype(int).unique().tolist())
-        c1, c2 = st.columns(2)
-        ano_sel = c1.selectbox("Ano do evento (SEGUINTE)", options=anos, index=len(anos)-1 if anos else 0)
-        mes_sel = c2.selectbox("Mês do evento (SEGUINTE)", options=meses, index=len(meses)-1 if meses else 0)
-
-        base_evt = zerou[(zerou[EV_SEG_ANO] == ano_sel) & (zerou[EV_SEG_MES] == mes_sel)].copy()
-        if base_evt.empty:
-            st.info("Sem registros para esse período.")
+                st.markdown("#### 📋 Estatísticas por série")
+                moeda = st.column_config.NumberColumn(format="localized")
+                with medir("render"):
+                    st.dataframe(
+                        estatisticas_series(grp),
+                        hide_index=True,
+                        use_container_width=True,
+                        column_config={
+                            "Mínimo": moeda, "Máximo": moeda, "Primeiro": moeda, "Último": moeda, "Variação": moeda,
+                            "Variação %": st.column_config.NumberColumn(format="%.1f%%"),
+                        },
+                    )
+                st.caption("Clique no cabeçalho de uma coluna para ordenar. Valores em R$; variação = último − primeiro no período.")
+
+    # ----------------------
+    # PÁGINA: Maiores Variações (todos os pares de uma vez)
+    # ----------------------
+    elif page == "Maiores Variações":
+        st.subheader("🚀 Maiores Variações — KPIs de todos os pares (Conta | Tipo) no período")
+
+        datas_opts = ds.datas_opts
+        if datas_opts:
+            v0, v1 = st.select_slider(
+                "Período (mensal)",
+                options=datas_opts,
+                format_func=lambda d: month_label(pd.to_datetime(d)),
+                value=(datas_opts[0], datas_opts[-1]),
+                key="tm_period"
+            )
+        else:
+            v0 = v1 = None
+
+        c1, c2, c3 = st.columns([2, 2, 1])
+        criterio = c1.selectbox("Ordenar por", ["Variação (R$)", "Variação %", "Pico de Saldo"], key="tm_criterio")
+        sentido = c2.selectbox("Sentido", ["Maiores em módulo", "Maiores altas", "Maiores quedas"], key="tm_sentido",
+                               disabled=criterio == "Pico de Saldo")
+        top_n = c3.selectbox("Quantos", [20, 50, 100, 500], key="tm_top")
+
+        # Saldo recente, pico e variação de todos os pares numa passada (mesmos KPIs da Visão Geral)
+        kpis = ds.kpis_pares(v0, v1)
+        if kpis.empty:
+            st.warning("Sem dados (com mês válido) no período.")
         else:
-            exp_ant = expandir_eventos_por_tipo(base_evt, usar_mes="anterior")
-            exp_ant.rename(columns={COL_SALDO: "VALOR_QUE_ZEROU"}, inplace=True)
-
-            qtd = len(exp_ant)
-            total_valor = exp_ant["VALOR_QUE_ZEROU"].sum(skipna=True)
-            k1, k2 = st.columns(2)
-            k1.metric("Qtd. (Conta, Tipo)", f"{qtd}")
-            k2.metric("Valor Total que Zerou", format_brl(total_valor))
-
-            cols_tab = [COL_NO_CONTA, "TIPO_ROT", "VALOR_QUE_ZEROU", EV_SEG_MES, EV_SEG_ANO]
-            cols_tab = [c for c in cols_tab if c in exp_ant.columns]
-            tabela = exp_ant[cols_tab].copy()
-            tabela["VALOR_QUE_ZEROU"] = tabela["VALOR_QUE_ZEROU"].apply(format_brl)  # <-- segura NaN
-            if EV_SEG_MES in tabela.columns: tabela[EV_SEG_MES] = as_text_no_sep(tabela[EV_SEG_MES])
-            if EV_SEG_ANO in tabela.columns: tabela[EV_SEG_ANO] = as_text_no_sep(tabela[EV_SEG_ANO])
-            tabela.rename(columns={
-                COL_NO_CONTA: "Conta",
-                "TIPO_ROT": "CO_TP_CCOR",
-                EV_SEG_MES: "Mês Seguinte Ref.",
-                EV_SEG_ANO: "Ano Seguinte Ref."
-            }, inplace=True)
-            st.dataframe(tabela, use_container_width=True)
-
-            st.markdown("#### 🔍 Investigação (Histórico do Par Conta/Tipo)")
-            pares_evt = tabela.copy()
-            pares_evt["LABEL"] = pares_evt["Conta"] + " | " + pares_evt["CO_TP_CCOR"]
-            escolha = st.selectbox("Selecione um (Conta | Tipo)", options=sorted(pares_evt["LABEL"].unique().tolist()))
+            coluna = {"Variação (R$)": "Variação", "Variação %": "Variação %", "Pico de Saldo": "Pico"}[criterio]
+            valores = kpis[coluna]
+            if coluna == "Pico" or sentido == "Maiores altas":
+                ordem = valores
+            elif sentido == "Maiores quedas":
+                ordem = -valores
+            else:
+                ordem = valores.abs()
+            ranking = kpis.assign(_ORDEM=ordem).dropna(subset=["_ORDEM"]).nlargest(top_n, "_ORDEM")
+
+            moeda = st.column_config.NumberColumn(format="localized")
+            with medir("render"):
+                st.dataframe(
+                    ranking[["LABEL", "Meses", "Primeiro", "Saldo Recente", "Pico", "Variação", "Variação %"]]
+                    .rename(columns={"LABEL": "Conta | Tipo"}),
+                    hide_index=True,
+                    use_container_width=True,
+                    column_config={
+                        "Primeiro": moeda, "Saldo Recente": moeda, "Pico": moeda, "Variação": moeda,
+                        "Variação %": st.column_config.NumberColumn(format="%.1f%%"),
+                    },
+                )
+            st.caption(f"{len(ranking)} de {len(kpis)} pares. Variação = saldo recente − primeiro saldo do período; "
+                       "variação % fica vazia quando o primeiro saldo é zero.")
+
+            # Detalhe de um par do ranking (mesmo gráfico da Visão Geral)
+            st.markdown("#### 🔍 Detalhe do par")
+            rotulos = ranking["LABEL"].astype(str).tolist()
+            escolha = st.selectbox("Selecione um (Conta | Tipo) do ranking", options=rotulos, key="tm_par")
             if escolha:
-                conta_escolhida, tipo_escolhido = escolha.split(" | ", 1)
-                co_tp = parse_co_from_label(tipo_escolhido)
-                base_ok = dados_analise_base[(dados_analise_base[COL_NO_CONTA] == conta_escolhida) & (dados_analise_base[COL_CO_TP] == co_tp)]
-                grp = base_ok.groupby(COL_DATA, as_index=False, observed=False)[COL_SALDO].sum()
-                if grp.empty:
-                    st.info("Sem meses válidos para traçar o gráfico deste par.")
-                else:
-                    chart_df = add_valor_fmt(grp, COL_SALDO)
-                    titulo = f"Histórico — {conta_tipo_label(conta_escolhida, co_tp, None)}"
-                    fig = px.line(chart_df, x=COL_DATA, y=COL_SALDO, text="VALOR_FMT", markers=True, title=titulo)
-                    fig.update_layout(xaxis_title="Data", yaxis_title="Saldo")
-                    fig.update_traces(mode="lines+markers+text", textposition="top center", textfont_size=12)
-                    fig = apply_hover_brl(fig)
+                par = ranking.iloc[rotulos.index(escolha)]
+                k1, k2, k3 = st.columns(3)
+                k1.metric("Saldo Mais Recente", format_brl(par["Saldo Recente"]))
+                k2.metric("Pico de Saldo", format_brl(par["Pico"]))
+                k3.metric("Variação Total no Período", format_brl(par["Variação"]))
+                serie_par = ds.serie(par[COL_NO_CONTA], par[COL_CO_TP], v0, v1)
+                fig = grafico_linhas(serie_par, f"Evolução do Saldo — {escolha}", nome="Maiores Variações")
+                with medir("render"):
                     st.plotly_chart(fig, use_container_width=True)
 
-                hist_tab = dados_tabela[(dados_tabela[COL_NO_CONTA] == conta_escolhida) & (dados_tabela[COL_CO_TP] == co_tp)][[COL_ANO, COL_MES, COL_SALDO]].sort_values([COL_ANO, COL_MES]).copy()
-                hist_tab["Saldo"] = hist_tab[COL_SALDO].apply(format_brl)
-                hist_tab["Ano"] = as_text_no_sep(hist_tab[COL_ANO])
-                hist_tab["Mês"] = as_text_no_sep(hist_tab[COL_MES])
-                st.dataframe(hist_tab[["Ano", "Mês", "Saldo"]], hide_index=True, use_container_width=True)
-    else:
-        st.warning("SALDO-ZEROU sem colunas esperadas (ANO/MÊS SEGUINTE e ANTERIOR).")
-
-st.caption("Feito com ❤️ em Streamlit. Regras: mês 0 fora das análises; cada série é um par (Conta, CO_TP_CCOR); vazio != zero.")
+    # ----------------------
+    # PÁGINA: Matriz Cronológica
+    # ----------------------
+    elif page == "Matriz Cronológica":
+        st.subheader("🧮 Matriz Cronológica (Pivot) — linhas por Conta | Tipo (sem agregação entre tipos)")
+
+        # Filtro por 1 a 5 contas, escolhidas pela busca no catálogo
+        catalogo = ds.catalogo
+        busca_conta = st.text_input("Buscar contas (nome, parte do nome ou código)", key="mtz_busca_conta")
+        encontradas, total = catalogo.buscar(busca_conta, limite=MAX_RESULTADOS_BUSCA)
+        if total > len(encontradas):
+            st.caption(f"{total} contas encontradas; mostrando as {len(encontradas)} melhores. Refine a busca para ver as demais.")
+        # Contas já escolhidas continuam nas opções quando a busca muda
+        escolhidas = st.session_state.get("mtz_contas", [])
+        opcoes = escolhidas + [c for c in encontradas if c not in escolhidas]
+        contas_sel = st.multiselect("Contas (1 a 5)", options=opcoes, key="mtz_contas", format_func=catalogo.rotulo)
+        if contas_sel and len(contas_sel) > 5:
+            st.warning("Selecione no máximo 5 contas. Considerando apenas as 5 primeiras.")
+            contas_sel = contas_sel[:5]
+
+        # Soma + contagem numa passada, em cache por (versão dos dados, contas); meses na ordem cronológica
+        # >>>>>>>>>>>>>>> distinguir ausência ( '-') de valor zero ('R$ 0,00') <<<<<<<<<<<<<<
+        matriz = ds.matriz(contas_sel)
+
+        # Busca + paginação: só a página visível é formatada, estilizada e enviada ao navegador
+        c1, c2, c3 = st.columns([3, 1, 1])
+        busca = c1.text_input("Buscar linha (Conta | Tipo)", key="mtz_busca")
+        posicoes = matriz.buscar(busca)
+        por_pagina = c2.selectbox("Linhas por página", options=[50, 100, 200, 500], index=1, key="mtz_por_pagina")
+        n_paginas = max(1, -(-len(posicoes) // por_pagina))
+        if st.session_state.get("mtz_pagina", 1) > n_paginas:
+            st.session_state["mtz_pagina"] = 1
+        pagina = c3.number_input("Página", min_value=1, max_value=n_paginas, step=1, key="mtz_pagina")
+
+        ini = (int(pagina) - 1) * por_pagina
+        visiveis = posicoes[ini:ini + por_pagina]
+        pivot_fmt, style_mask = matriz.pagina(visiveis)
+        # Estilo visual: cinza claro onde NÃO há registro
+        def _style(_):
+            return np.where(style_mask, ESTILO_SEM_REGISTRO, "")
+        with medir("render"):
+            st.dataframe(pivot_fmt.style.apply(_style, axis=None), use_container_width=True)
+        if len(posicoes):
+            st.caption(f"Linhas {ini + 1}–{ini + len(visiveis)} de {len(posicoes)}"
+                       + (f" (filtro: “{busca}”; total {len(matriz.linhas)})" if busca else "") + ".")
+            # Download de todas as linhas da busca (não só a página), direto dos arrays numéricos
+            botoes_download(exportacao_matriz(matriz, posicoes, nome_arquivo("matriz_cronologica", busca)), "mtz_download")
+        else:
+            st.caption("Nenhuma linha encontrada para essa busca.")
+
+        # Diagnóstico de células sem registro (contagens em array; texto só p/ as linhas exibidas)
+        with st.expander("🔎 Linhas com células vazias (mostrar até 100)"):
+            diag, total_vazias = matriz.diagnostico_vazios(limite=100)
+            if total_vazias:
+                with medir("render"):
+                    st.dataframe(diag, use_container_width=True)
+                st.caption(f"Total de linhas com ao menos uma célula vazia: {total_vazias}")
+                st.markdown("**Células vazias por mês**")
+                with medir("render"):
+                    st.dataframe(matriz.vazios_por_mes(), hide_index=True, use_container_width=True)
+            else:
+                st.info("Não encontrei células vazias nesta seleção. Selecione outras contas para verificar.")
+        # <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
+
+    # ----------------------
+    # PÁGINA: Saldo Surgiu
+    # ----------------------
+    elif page == "Saldo Surgiu":
+        fonte = "SALDO-SURGIU" if ds.fonte_eventos == "planilha" else "detectado em DADOS"
+        st.subheader(f"🟢 Saldo Surgiu (Fonte: {fonte}) — sem agregação entre tipos")
+
+        if all(c in surg.columns for c in [EV_SEG_ANO, EV_SEG_MES]):
+            anos = sorted(surg[EV_SEG_ANO].dropna().astype(int).unique().tolist())
+            meses = sorted(surg[EV_SEG_MES].dropna().astype(int).unique().tolist())
+            c1, c2 = st.columns(2)
+            ano_sel = c1.selectbox("Ano do evento (SEGUINTE)", options=anos, index=len(anos)-1 if anos else 0)
+            mes_sel = c2.selectbox("Mês do evento (SEGUINTE)", options=meses, index=len(meses)-1 if meses else 0)
+
+            # Expansão indexada e memorizada por (ano, mês): trocar o período não refaz o join
+            exp = ds.eventos_do_periodo("surgiu", ano_sel, mes_sel)
+            if exp.empty:
+                st.info("Sem registros para esse período.")
+            else:
+                qtd = len(exp)
+                total_valor = exp[COL_SALDO].sum(skipna=True)
+                k1, k2 = st.columns(2)
+                k1.metric("Qtd. (Conta, Tipo)", f"{qtd}")
+                k2.metric("Valor Total que Surgiu", format_brl(total_valor))
+
+                # Mesma tabela da exportação (exportar_relatorios.py)
+                tabela = tabela_eventos(exp, "surgiu")
+                with medir("render"):
+                    st.dataframe(tabela, use_container_width=True)
+                botoes_download(exportacao_eventos(exp, "surgiu", nome_arquivo("saldo_surgiu", f"{ano_sel}-{mes_sel:02d}")),
+                                "surgiu_download")
+
+                st.markdown("#### 🔍 Investigação (Histórico do Par Conta/Tipo)")
+                pares_evt = tabela.copy()
+                pares_evt["LABEL"] = pares_evt["Conta"].astype(str) + " | " + pares_evt["CO_TP_CCOR"].astype(str)
+                escolha = st.selectbox("Selecione um (Conta | Tipo)", options=sorted(pares_evt["LABEL"].unique().tolist()))
+                if escolha:
+                    conta_escolhida, tipo_escolhido = escolha.split(" | ", 1)
+                    co_tp = parse_co_from_label(tipo_escolhido)
+                    grp = ds.serie(conta_escolhida, co_tp)
+                    if grp.empty:
+                        st.info("Sem meses válidos para traçar o gráfico deste par.")
+                    else:
+                        titulo = f"Histórico — {conta_tipo_label(conta_escolhida, co_tp, None)}"
+                        fig = grafico_linhas(grp, titulo, nome="Histórico (Saldo Surgiu)")
+                        with medir("render"):
+                            st.plotly_chart(fig, use_container_width=True)
+
+                    historico = ds.historico(conta_escolhida, co_tp)
+                    hist_tab = historico.copy()
+                    hist_tab["Saldo"] = format_brl_vetorizado(hist_tab[COL_SALDO])
+                    hist_tab["Ano"] = texto_sem_separador(hist_tab[COL_ANO])
+                    hist_tab["Mês"] = texto_sem_separador(hist_tab[COL_MES])
+                    with medir("render"):
+                        st.dataframe(hist_tab[["Ano", "Mês", "Saldo"]], hide_index=True, use_container_width=True)
+                    botoes_download(exportacao_historico(historico, nome_arquivo("historico", escolha)),
+                                    "surgiu_hist_download")
+        else:
+            st.warning("SALDO-SURGIU sem colunas esperadas (ANO/MÊS SEGUINTE).")
+
+    # ----------------------
+    # PÁGINA: Saldo Zerou
+    # ----------------------
+    elif page == "Saldo Zerou":
+        fonte = "SALDO-ZEROU" if ds.fonte_eventos == "planilha" else "detectado em DADOS"
+        st.subheader(f"🔴 Saldo Zerou (Fonte: {fonte}) — sem agregação entre tipos")
+
+        if all(c in zerou.columns for c in [EV_SEG_ANO, EV_SEG_MES, EV_ANT_ANO, EV_ANT_MES]):
+            anos = sorted(zerou[EV_SEG_ANO].dropna().astype(int).unique().tolist())
+            meses = sorted(zerou[EV_SEG_MES].dropna().astype(int).unique().tolist())
+            c1, c2 = st.columns(2)
+            ano_sel = c1.selectbox("Ano do evento (SEGUINTE)", options=anos, index=len(anos)-1 if anos else 0)
+            mes_sel = c2.selectbox("Mês do evento (SEGUINTE)", options=meses, index=len(meses)-1 if meses else 0)
+
+            # Expansão indexada e memorizada por (ano, mês): trocar o período não refaz o join
+            exp_ant = ds.eventos_do_periodo("zerou", ano_sel, mes_sel)
+            if exp_ant.empty:
+                st.info("Sem registros para esse período.")
+            else:
+                qtd = len(exp_ant)
+                total_valor = exp_ant[COL_SALDO].sum(skipna=True)
+                k1, k2 = st.columns(2)
+                k1.metric("Qtd. (Conta, Tipo)", f"{qtd}")
+                k2.metric("Valor Total que Zerou", format_brl(total_valor))
+
+                # Mesma tabela da exportação; '-' quando o valor é vazio (NaN)
+                tabela = tabela_eventos(exp_ant, "zerou")
+                with medir("render"):
+                    st.dataframe(tabela, use_container_width=True)
+                botoes_download(exportacao_eventos(exp_ant, "zerou", nome_arquivo("saldo_zerou", f"{ano_sel}-{mes_sel:02d}")),
+                                "zerou_download")
+
+                st.markdown("#### 🔍 Investigação (Histórico do Par Conta/Tipo)")
+                pares_evt = tabela.copy()
+                pares_evt["LABEL"] = pares_evt["Conta"].astype(str) + " | " + pares_evt["CO_TP_CCOR"].astype(str)
+                escolha = st.selectbox("Selecione um (Conta | Tipo)", options=sorted(pares_evt["LABEL"].unique().tolist()))
+                if escolha:
+                    conta_escolhida, tipo_escolhido = escolha.split(" | ", 1)
+                    co_tp = parse_co_from_label(tipo_escolhido)
+                    grp = ds.serie(conta_escolhida, co_tp)
+                    if grp.empty:
+                        st.info("Sem meses válidos para traçar o gráfico deste par.")
+                    else:
+                        titulo = f"Histórico — {conta_tipo_label(conta_escolhida, co_tp, None)}"
+                        fig = grafico_linhas(grp, titulo, nome="Histórico (Saldo Zerou)")
+                        with medir("render"):
+                            st.plotly_chart(fig, use_container_width=True)
+
+                    historico = ds.historico(conta_escolhida, co_tp)
+                    hist_tab = historico.copy()
+                    hist_tab["Saldo"] = format_brl_vetorizado(hist_tab[COL_SALDO])
+                    hist_tab["Ano"] = texto_sem_separador(hist_tab[COL_ANO])
+                    hist_tab["Mês"] = texto_sem_separador(hist_tab[COL_MES])
+                    with medir("render"):
+                        st.dataframe(hist_tab[["Ano", "Mês", "Saldo"]], hide_index=True, use_container_width=True)
+                    botoes_download(exportacao_historico(historico, nome_arquivo("historico", escolha)),
+                                    "zerou_hist_download")
+        else:
+            st.warning("SALDO-ZEROU sem colunas esperadas (ANO/MÊS SEGUINTE e ANTERIOR).")
+
+    # ----------------------
+    # PÁGINA: Administração (?admin=<PAINEL_ADMIN_SENHA>)
+    # ----------------------
+    elif page == "Administração" and ADMIN:
+        st.subheader("⚙️ Administração")
+
+        st.markdown("#### Dados")
+        d1, d2, d3 = st.columns(3)
+        d1.metric("Versão dos dados", f"{VERSAO_DADOS.numero}")
+        d2.metric("Tempo da última carga", f"{VERSAO_DADOS.segundos:.2f} s")
+        d3.metric("Backend", type(VERSAO_DADOS.dados).__name__)
+        if getattr(VERSAO_DADOS.dados, "compartilhado", ""):
+            st.caption(f"Processo {os.getpid()} · dados mapeados de {VERSAO_DADOS.dados.compartilhado}, "
+                       "compartilhados entre os processos (PAINEL_PROCESSOS).")
+        if GER.ultimo_erro:
+            st.warning(f"Última tentativa de recarga falhou: {GER.ultimo_erro}")
+
+        st.markdown("#### Cache de resultados (LRU)")
+        resumo = CACHE_RESULTADOS.resumo()
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Itens", f"{resumo['itens']} / {resumo['max_itens']}")
+        k2.metric("Memória", f"{resumo['mb']:.1f} / {resumo['max_mb']:.0f} MB")
+        k3.metric("Taxa de acerto", f"{resumo['taxa_acerto']:.0%}")
+        k4.metric("Descartes (LRU)", f"{resumo['descartes']}")
+        st.caption(f"Acertos: {resumo['acertos']} · Faltas: {resumo['faltas']}. "
+                   "Limites: PAINEL_CACHE_ITENS e PAINEL_CACHE_MB.")
+        st.dataframe(CACHE_RESULTADOS.por_consulta(), hide_index=True, use_container_width=True)
+        if st.button("Limpar cache de resultados"):
+            CACHE_RESULTADOS.limpar()
+            st.rerun()
+
+        st.markdown("#### Gráficos enviados ao navegador")
+        st.caption(f"Séries com mais de {MAX_PONTOS} pontos são reduzidas (LTTB; ajuste em PAINEL_GRAFICO_MAX_PONTOS). "
+                   "KB = tamanho do gráfico enviado ao navegador.")
+        if METRICAS_ATIVAS:
+            st.dataframe(payloads(), hide_index=True, use_container_width=True)
+        else:
+            st.info("Tamanho dos gráficos medido só com PAINEL_METRICAS=1 (medir custa uma serialização extra por gráfico).")
+
+        st.markdown("#### Memória dos dados")
+        memoria = memoria_dados(VERSAO_DADOS.dados)
+        st.dataframe(memoria, hide_index=True, use_container_width=True,
+                     column_config={"MB": st.column_config.NumberColumn(format="%.1f")})
+        st.caption(f"Total estimado: {memoria['MB'].sum():.1f} MB (fatias e visões do razão não contam duas vezes).")
+
+        st.markdown("#### Tempo por etapa")
+        if not METRICAS_ATIVAS:
+            st.info("Medição desligada. Defina PAINEL_METRICAS=1 antes de abrir o painel para medir carga, consultas, "
+                    "formatação, gráficos e renderização de cada página.")
+        else:
+            st.caption("Cada execução da página soma o tempo de cada etapa; p50/p95 sobre as últimas execuções de todas "
+                       f"as sessões ({qtd_sessoes()} sessão(ões)). consulta:* inclui acertos do cache de resultados.")
+            st.dataframe(resumo_etapas(), hide_index=True, use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f")
+                                        for c in ("p50 (ms)", "p95 (ms)", "Máx (ms)")})
+            st.markdown("**Últimas execuções desta sessão**")
+            st.dataframe(execucoes_da_sessao(st.session_state["_sessao"]), hide_index=True, use_container_width=True)
+            if st.button("Zerar medições"):
+                limpar_metricas()
+                st.rerun()
+
+    st.caption("Feito com ❤️ em Streamlit. Regras: mês 0 fora das análises; cada série é um par (Conta, CO_TP_CCOR); vazio != zero.")
+finally:
+    finalizar_execucao()
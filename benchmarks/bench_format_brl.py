@@ -0,0 +1,56 @@
+# benchmarks/bench_format_brl.py
+# -*- coding: utf-8 -*-
+# Micro-benchmark: format_brl (escalar, elemento a elemento) x format_brl_vetorizado (lote).
+# Uso: python benchmarks/bench_format_brl.py [--n 1000000] [--repeticoes 3]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from painel_dados import format_brl, format_brl_vetorizado  # noqa: E402
+
+
+def gerar_valores(n: int, seed: int = 0) -> pd.Series:
+    """Saldos realistas: magnitudes variadas, negativos, zeros, NaN e inf."""
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 1, n) * 10.0 ** rng.integers(0, 12, n)
+    x[rng.random(n) < 0.05] = 0.0
+    x[rng.random(n) < 0.05] = np.nan
+    x[rng.random(n) < 0.001] = np.inf
+    return pd.Series(np.round(x, 3))
+
+
+def melhor_tempo(fn, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    valores = gerar_valores(args.n)
+    esperado = valores.map(format_brl)
+    obtido = format_brl_vetorizado(valores)
+    if not esperado.equals(obtido):
+        dif = (esperado != obtido)
+        raise SystemExit(f"Saídas diferentes em {int(dif.sum())} valores, ex.: {valores[dif].head(3).tolist()}")
+
+    t_escalar = melhor_tempo(lambda: valores.map(format_brl), args.repeticoes)
+    t_vetor = melhor_tempo(lambda: format_brl_vetorizado(valores), args.repeticoes)
+    print(f"n={args.n:,}  escalar={t_escalar:.3f}s  vetorizado={t_vetor:.3f}s  ganho={t_escalar / t_vetor:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# benchmarks/bench_paginas.py
+# -*- coding: utf-8 -*-
+# Benchmark de ponta a ponta, sem navegador: leitura, preparação, eventos, Matriz e a consulta de cada página.
+# - Mede os .xlsx de uma pasta (ex.: gerados por benchmarks/gerar_planilhas.py).
+# - Grava um JSON em --saida (padrão: <temp>/painel_bench_resultados; ambiente, tamanho dos dados e tempos)
+#   para comparar execuções.
+# - Passos que alteram a entrada (compactar, preparar) recebem uma cópia nova a cada repetição (fora do tempo).
+# - Sem o cache de resultados (painel_cache): mede o cálculo, não o acerto de cache.
+# Uso: python benchmarks/bench_paginas.py --pasta /tmp/bench [--backend pandas|duckdb] [--repeticoes 3] [--rotulo antes] [--saida pasta]
+#      python benchmarks/bench_paginas.py --comparar antes.json depois.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from painel_dados import (  # noqa: E402
+    COL_CO_TP, COL_NO_CONTA, EV_SEG_ANO, EV_SEG_MES,
+    carregar_planilhas, carregar_varias_planilhas, compactar_dados, consolidar_planilhas,
+    construir_catalogo_contas, construir_indice_series, detectar_eventos, ensure_datetime_and_flags,
+    estatisticas_series, expandir_eventos_por_tipo, ler_planilhas_excel, listar_xlsx, preparar_dados,
+)
+from painel_matriz import calcular_matriz  # noqa: E402
+
+PASTA_RESULTADOS = os.path.join(tempfile.gettempdir(), "painel_bench_resultados")
+BUSCAS = ["caixa", "banc mov", "depreciacao acumulada", "a", "100000123"]
+
+
+class Medidor:
+    """Executa cada passo `repeticoes` vezes e guarda mínimo/mediana (segundos).
+    `entrada`: chamada antes de cada repetição, fora do tempo; o resultado vira o argumento de `fn`."""
+
+    def __init__(self, repeticoes: int):
+        self.repeticoes = repeticoes
+        self.tempos = {}
+
+    def medir(self, nome: str, fn, repeticoes: int = None, entrada=None):
+        amostras, resultado = [], None
+        for _ in range(repeticoes or self.repeticoes):
+            args = (entrada(),) if entrada else ()
+            t0 = time.perf_counter()
+            resultado = fn(*args)
+            amostras.append(time.perf_counter() - t0)
+        self.tempos[nome] = {"min": min(amostras), "mediana": statistics.median(amostras), "repeticoes": len(amostras)}
+        print(f"  {nome:<34} {min(amostras):9.4f}s")
+        return resultado
+
+
+def ler_frames(arquivos: list):
+    """(dados, surgiu, zerou) pelo mesmo caminho do painel (cache colunar; vários arquivos consolidados)."""
+    if len(arquivos) == 1:
+        return carregar_planilhas(arquivos[0])
+    return consolidar_planilhas(carregar_varias_planilhas(arquivos))
+
+
+def amostra(valores: list, n: int) -> list:
+    """`n` elementos espalhados pela lista (determinístico: compara execuções)."""
+    if len(valores) <= n:
+        return list(valores)
+    return [valores[i] for i in np.linspace(0, len(valores) - 1, n).astype(int)]
+
+
+def medir_tudo(arquivos: list, backend: str, m: Medidor, com_excel: bool = True) -> dict:
+    # ---------- leitura e preparação ----------
+    if com_excel:  # leitura direta do Excel (sem cache colunar); lenta: 1 vez
+        m.medir("leitura_excel", lambda: [ler_planilhas_excel(a) for a in arquivos], repeticoes=1)
+    ler_frames(arquivos)  # garante o cache colunar antes de medir a leitura por ele
+    dados, surg_raw, zerou_raw = m.medir("leitura_cache", lambda: ler_frames(arquivos))
+    # compactar/ensure/preparar alteram o frame recebido: cada repetição parte do que ler_frames devolve
+    compacto = m.medir("compactar_dados", compactar_dados, entrada=dados.copy)
+    m.medir("ensure_datetime_and_flags", ensure_datetime_and_flags, entrada=compacto.copy)
+    ds = m.medir("preparar_dados", lambda brutos: preparar_dados(*brutos, arquivos=arquivos),
+                 entrada=lambda: (dados.copy(), surg_raw.copy(), zerou_raw.copy()))
+    m.medir("indice_series", lambda: construir_indice_series(ds.dados_analise_base))
+    m.medir("catalogo_contas", lambda: construir_catalogo_contas(ds.dados_tabela))
+    m.medir("detectar_eventos", lambda: detectar_eventos(ds.dados_analise_base))
+    por_tipo = ds.fonte_eventos == "detectado"
+    m.medir("expandir_eventos_surgiu", lambda: expandir_eventos_por_tipo(ds.surg, "seguinte", ds.eventos, por_tipo))
+    m.medir("expandir_eventos_zerou", lambda: expandir_eventos_por_tipo(ds.zerou, "anterior", ds.eventos, por_tipo))
+
+    contas = ds.contas()
+    cinco = amostra(contas, 5)
+    matriz = m.medir("matriz_todas_contas", lambda: calcular_matriz(ds.dados_tabela))
+    m.medir("matriz_5_contas", lambda: calcular_matriz(ds.dados_tabela, cinco))
+    m.medir("matriz_pagina_100_linhas", lambda: matriz.pagina(np.arange(min(100, len(matriz.linhas)))))
+
+    # ---------- consultas das páginas (mesma interface nos 2 backends) ----------
+    if backend == "duckdb":
+        from painel_banco import carregar_consultas
+        consultas = m.medir("abrir_duckdb", lambda: carregar_consultas(arquivos, "duckdb"), repeticoes=1)
+    else:
+        consultas = ds
+    v0, v1 = (ds.datas_opts[0], ds.datas_opts[-1]) if ds.datas_opts else (None, None)
+
+    def visao_geral():
+        for conta in amostra(contas, 20):
+            for co in consultas.tipos_da_conta(conta)[COL_CO_TP].dropna().tolist():
+                consultas.serie(conta, co, v0, v1)
+    m.medir("visao_geral_20_contas", visao_geral)
+    m.medir("busca_contas", lambda: [consultas.catalogo.buscar(q) for q in BUSCAS])
+
+    pares = m.medir("pares", consultas.pares)
+    pares = pares.sort_values([COL_NO_CONTA, COL_CO_TP], kind="stable")
+    for n in (5, 500):
+        sel = pares.iloc[np.unique(np.linspace(0, len(pares) - 1, min(n, len(pares))).astype(int))]
+        longo = m.medir(f"comparativo_{n}_pares", lambda: consultas.comparativo(sel, v0, v1))
+        m.medir(f"estatisticas_{n}_pares", lambda: estatisticas_series(longo))
+    m.medir("maiores_variacoes", lambda: consultas.kpis_pares(v0, v1))
+    m.medir("pagina_matriz_5_contas", lambda: consultas.matriz(cinco))
+
+    for tipo, ev in (("surgiu", consultas.surg), ("zerou", consultas.zerou)):
+        if len(ev) and EV_SEG_ANO in ev.columns:
+            ano, mes = ev.groupby([EV_SEG_ANO, EV_SEG_MES]).size().idxmax()  # período com mais eventos
+            m.medir(f"pagina_{tipo}_periodo", lambda: consultas.eventos_do_periodo(tipo, ano, mes))
+
+    try:
+        from painel_graficos import grafico_linhas
+        m.medir("grafico_500_series", lambda: grafico_linhas(longo, nome="benchmark"))
+    except ImportError:
+        print("  (plotly não instalado: gráfico não medido)")
+
+    return {
+        "linhas": int(len(ds.dados)),
+        "contas": len(contas),
+        "pares": int(len(pares)),
+        "eventos_surgiu": int(len(ds.surg)),
+        "eventos_zerou": int(len(ds.zerou)),
+    }
+
+
+def ambiente() -> dict:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sistema": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(antes_json: str, depois_json: str):
+    """Tabela passo a passo: tempo mínimo antes/depois e a razão."""
+    with open(antes_json, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(depois_json, encoding="utf-8") as f:
+        depois = json.load(f)
+    print(f"antes:  {antes['rotulo']} ({antes['dados']['linhas']:,} linhas, {antes['backend']}, {antes['quando']})")
+    print(f"depois: {depois['rotulo']} ({depois['dados']['linhas']:,} linhas, {depois['backend']}, {depois['quando']})")
+    print("razão = antes / depois (acima de 1: ficou mais rápido)")
+    print(f"{'passo':<34} {'antes':>10} {'depois':>10} {'razão':>8}")
+    for nome in list(dict.fromkeys(list(antes["tempos"]) + list(depois["tempos"]))):
+        a = antes["tempos"].get(nome, {}).get("min")
+        d = depois["tempos"].get(nome, {}).get("min")
+        razao = f"{a / d:7.2f}x" if a and d else "-"
+        fa = f"{a:10.4f}" if a is not None else f"{'-':>10}"
+        fd = f"{d:10.4f}" if d is not None else f"{'-':>10}"
+        print(f"{nome:<34} {fa} {fd} {razao:>8}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark das páginas do painel (sem navegador).")
+    ap.add_argument("--pasta", help="pasta com os .xlsx (todos são consolidados, como PAINEL_ARQUIVOS=todos)")
+    ap.add_argument("--backend", default="pandas", choices=["pandas", "duckdb"])
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--rotulo", default="", help="nome da execução (ex.: antes, depois)")
+    ap.add_argument("--sem-excel", action="store_true", help="não mede a leitura direta do Excel (lenta)")
+    ap.add_argument("--saida", default=PASTA_RESULTADOS, help=f"pasta do JSON de resultado (padrão: {PASTA_RESULTADOS})")
+    ap.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara 2 JSON de resultado")
+    args = ap.parse_args()
+    if args.comparar:
+        return comparar(*args.comparar)
+    if not args.pasta:
+        ap.error("informe --pasta (ou --comparar)")
+
+    arquivos = listar_xlsx(args.pasta)
+    if not arquivos:
+        raise SystemExit(f"Nenhum .xlsx em {args.pasta}")
+    print(f"{len(arquivos)} arquivo(s), backend {args.backend}, {args.repeticoes} repetição(ões)")
+    m = Medidor(args.repeticoes)
+    dados = medir_tudo(arquivos, args.backend, m, com_excel=not args.sem_excel)
+
+    rotulo = args.rotulo or args.backend
+    resultado = {
+        "rotulo": rotulo,
+        "quando": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "backend": args.backend,
+        "arquivos": [os.path.basename(a) for a in arquivos],
+        "dados": dados,
+        "ambiente": ambiente(),
+        "tempos": m.tempos,
+    }
+    os.makedirs(args.saida, exist_ok=True)
+    destino = os.path.join(args.saida, f"{time.strftime('%Y%m%d-%H%M%S')}_{rotulo}_{dados['linhas']}.json")
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultado: {destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/gerar_planilhas.py
+# -*- coding: utf-8 -*-
+# Gera planilhas sintéticas com o esquema real (DADOS, SALDO-SURGIU, SALDO-ZEROU) para medir desempenho.
+# - Mês 0 (abertura) em todo exercício, contas com 1 a 3 CO_TP_CCOR, meses sem registro ("vazio"),
+#   saldos zerados, negativos e séries que começam/terminam no meio do período (geram SURGIU/ZEROU).
+# - Abas SALDO-SURGIU/ZEROU vêm do início/fim sorteado de cada série, não do detector do painel: zeros e
+#   vazios aleatórios no meio da série ficam só em DADOS (como numa base real, abas e detecção divergem).
+# - Até --max-linhas: 1 arquivo (base.xlsx, modo "unico"). Acima disso (o .xlsx aceita ~1 milhão de linhas
+#   por aba): 1 arquivo por exercício, dividido em partes se preciso -> abrir com PAINEL_ARQUIVOS=todos.
+# Uso: python benchmarks/gerar_planilhas.py --linhas 100000 --saida /tmp/bench [--anos 3] [--seed 0]
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from painel_dados import (  # noqa: E402
+    ABA_DADOS, ABA_SURGIU, ABA_ZEROU, COL_ANO, COL_CO_TP, COL_ID_CONTA, COL_ID_TP, COL_MES, COL_MES_TXT,
+    COL_NO_CONTA, COL_NO_TP, COL_SALDO, EV_ANT_ANO, EV_ANT_MES, EV_SALDO_ANT, EV_SEG_ANO, EV_SEG_MES,
+)
+
+MAX_LINHAS_XLSX = 1_048_575  # linhas de dados por aba (fora o cabeçalho)
+MESES = ["ABERTURA", "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO", "JULHO", "AGOSTO",
+         "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"]
+PALAVRAS = ["Caixa", "Bancos", "Conta", "Movimento", "Aplicações", "Financeiras", "Créditos", "Tributários",
+            "Depósitos", "Judiciais", "Obrigações", "Trabalhistas", "Fornecedores", "Imobilizado", "Depreciação",
+            "Acumulada", "Reservas", "Patrimônio", "Líquido", "Resultado", "Exercício", "Receitas", "Despesas"]
+TIPOS = {1: "Fonte de Recursos", 2: "Natureza da Receita", 3: "Credor"}
+
+
+def gerar_dados(linhas: int, anos: int = 3, ano_final: int = 2024, prob_vazio: float = 0.05,
+                seed: int = 0):
+    """(DADOS com ~`linhas` linhas, ordenado por (conta, tipo, ano, mês); séries geradas).
+    séries: 1 linha por par presente em DADOS com ID_CONTA, CO_TP, INICIO e FIM (meses desde jan do 1º
+    exercício; ativa em INICIO <= t < FIM)."""
+    rng = np.random.default_rng(seed)
+    por_par = anos * 13 * (1 - prob_vazio) * 0.8  # folga para meses inativos sem registro; sobra é cortada
+    n_pares = max(1, math.ceil(linhas / por_par))
+    tipos_por_conta = rng.choice([1, 2, 3], size=n_pares, p=[0.6, 0.3, 0.1])
+    tipos_por_conta = tipos_por_conta[np.cumsum(tipos_por_conta) - tipos_por_conta < n_pares]
+    n_contas = len(tipos_por_conta)
+    conta = np.repeat(np.arange(n_contas), tipos_por_conta)
+    co = np.concatenate([np.arange(1, k + 1) for k in tipos_por_conta])
+    n_pares = len(conta)
+
+    # Início/fim de cada série (em meses desde o 1º exercício): fora disso, saldo zero ou sem registro
+    total_meses = anos * 12
+    inicio = np.where(rng.random(n_pares) < 0.3, rng.integers(0, total_meses, n_pares), 0)
+    fim = np.where(rng.random(n_pares) < 0.2, rng.integers(0, total_meses, n_pares) + inicio, total_meses)
+    nivel = rng.lognormal(11, 2, n_pares) * np.where(rng.random(n_pares) < 0.1, -1, 1)
+
+    # Grade par x ano x mês(0..12)
+    par = np.repeat(np.arange(n_pares), anos * 13)
+    ano_idx = np.tile(np.repeat(np.arange(anos), 13), n_pares)
+    mes = np.tile(np.arange(13), n_pares * anos)
+    t = ano_idx * 12 + np.maximum(mes, 1) - 1
+    ativo = (t >= inicio[par]) & (t < fim[par])
+    saldo = np.round(nivel[par] * (1 + 0.05 * rng.standard_normal(len(par))), 2)
+    saldo[~ativo | (rng.random(len(par)) < 0.01)] = 0.0
+    manter = (rng.random(len(par)) >= prob_vazio) & (ativo | (rng.random(len(par)) < 0.5))
+    manter[mes == 0] = True  # abertura sempre presente
+    par, ano_idx, mes, saldo = par[manter][:linhas], ano_idx[manter][:linhas], mes[manter][:linhas], saldo[manter][:linhas]
+
+    palavras = np.array(PALAVRAS, dtype=object)
+    idx = rng.integers(0, len(palavras), (n_contas, 3))
+    nomes = np.array([f"{a} {b} {c} {i:07d}" for i, (a, b, c) in enumerate(palavras[idx])], dtype=object)
+    ano = ano_final - anos + 1 + ano_idx
+    c, k = conta[par], co[par]
+    pares = np.unique(par)
+    series = pd.DataFrame({COL_ID_CONTA: 100_000_000 + conta[pares], COL_CO_TP: co[pares],
+                           "INICIO": inicio[pares], "FIM": fim[pares]})
+    return pd.DataFrame({
+        COL_ID_CONTA: 100_000_000 + c,
+        COL_NO_CONTA: nomes[c],
+        COL_ANO: ano,
+        COL_MES: mes,
+        COL_MES_TXT: np.char.add(np.char.add(np.array(MESES)[mes], "/"), ano.astype(str)),
+        COL_ID_TP: k * 10,
+        COL_CO_TP: k,
+        COL_NO_TP: np.array([""] + [TIPOS[i] for i in sorted(TIPOS)], dtype=object)[k],
+        COL_SALDO: saldo,
+    }), series
+
+
+def eventos_da_planilha(series: pd.DataFrame, anos: int = 3, ano_final: int = 2024):
+    """SALDO-SURGIU/ZEROU no formato das abas reais (por conta, sem CO_TP nem SITUACAO), a partir do
+    início/fim de cada série: surgiu em INICIO (se > 0), zerou depois do último mês ativo (FIM - 1)."""
+    total_meses = anos * 12
+    ano0 = ano_final - anos + 1
+
+    def montar(sel, t_seg):
+        t_seg = t_seg[sel]
+        return pd.DataFrame({
+            COL_ID_CONTA: series[COL_ID_CONTA].to_numpy()[sel],
+            EV_ANT_ANO: ano0 + (t_seg - 1) // 12, EV_ANT_MES: (t_seg - 1) % 12 + 1,
+            EV_SEG_ANO: ano0 + t_seg // 12, EV_SEG_MES: t_seg % 12 + 1,
+        })
+
+    inicio, fim = series["INICIO"].to_numpy(), series["FIM"].to_numpy()
+    chave = [COL_ID_CONTA, EV_ANT_ANO, EV_ANT_MES, EV_SEG_ANO, EV_SEG_MES]
+    surgiu = montar((inicio > 0) & (fim > inicio), inicio).drop_duplicates(subset=chave)
+    surgiu[EV_SALDO_ANT] = 0.0  # antes do início o saldo é zero (ou não há registro)
+    zerou = montar((fim > inicio) & (fim < total_meses), fim).drop_duplicates(subset=chave)
+    return surgiu.reset_index(drop=True), zerou.reset_index(drop=True)
+
+
+def escrever_xlsx(caminho: str, dados: pd.DataFrame, surgiu: pd.DataFrame, zerou: pd.DataFrame):
+    """openpyxl em modo write-only (o mesmo pacote que o painel usa para ler)."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    for aba, df in ((ABA_DADOS, dados), (ABA_SURGIU, surgiu), (ABA_ZEROU, zerou)):
+        ws = wb.create_sheet(aba)
+        ws.append(list(df.columns))
+        for linha in zip(*(df[c].tolist() for c in df.columns)):  # tipos Python: append bem mais rápido
+            ws.append(linha)
+    wb.save(caminho)
+    return len(surgiu), len(zerou)
+
+
+def arquivos_de_saida(dados: pd.DataFrame, max_linhas: int):
+    """[(nome do arquivo, fatia de dados)]: 1 base.xlsx ou 1 por exercício (em partes, se preciso)."""
+    if len(dados) <= max_linhas:
+        return [("base.xlsx", dados)]
+    saida = []
+    for ano, do_ano in dados.groupby(COL_ANO, sort=True):
+        partes = math.ceil(len(do_ano) / max_linhas)
+        for p in range(partes):
+            nome = f"exercicio_{ano}.xlsx" if partes == 1 else f"exercicio_{ano}_parte{p + 1}.xlsx"
+            saida.append((nome, do_ano.iloc[p * max_linhas:(p + 1) * max_linhas]))
+    return saida
+
+
+def eventos_por_arquivo(arquivos, surgiu: pd.DataFrame, zerou: pd.DataFrame):
+    """[(surgiu, zerou)] de cada arquivo: evento vai para o 1º arquivo que tem o exercício do mês SEGUINTE
+    (1 arquivo por exercício: cada evento aparece 1 vez só)."""
+    saida, anos_feitos = [], set()
+    for _, parte in arquivos:
+        anos = set(parte[COL_ANO].unique().tolist()) - anos_feitos
+        anos_feitos |= anos
+        saida.append((surgiu[surgiu[EV_SEG_ANO].isin(anos)], zerou[zerou[EV_SEG_ANO].isin(anos)]))
+    return saida
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera planilhas sintéticas do painel.")
+    ap.add_argument("--linhas", type=int, default=100_000, help="linhas de DADOS no total (10 mil a 10 milhões)")
+    ap.add_argument("--saida", required=True, help="pasta de destino (criada se não existir)")
+    ap.add_argument("--anos", type=int, default=3, help="exercícios (cada um com meses 0 a 12)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-linhas", type=int, default=MAX_LINHAS_XLSX, help="linhas de DADOS por arquivo")
+    args = ap.parse_args()
+    if args.max_linhas > MAX_LINHAS_XLSX:
+        raise SystemExit(f"--max-linhas acima do limite do .xlsx ({MAX_LINHAS_XLSX:,}).")
+
+    os.makedirs(args.saida, exist_ok=True)
+    t0 = time.perf_counter()
+    dados, series = gerar_dados(args.linhas, anos=args.anos, seed=args.seed)
+    surgiu, zerou = eventos_da_planilha(series, anos=args.anos)
+    print(f"DADOS: {len(dados):,} linhas, {dados[COL_ID_CONTA].nunique():,} contas, "
+          f"{len(dados.drop_duplicates([COL_ID_CONTA, COL_CO_TP])):,} pares em {time.perf_counter() - t0:.1f}s")
+    arquivos = arquivos_de_saida(dados, args.max_linhas)
+    # Gravar .xlsx é o passo lento (~10 mil linhas/s por processo): 1 processo por arquivo
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(len(arquivos), os.cpu_count() or 1)) as pool:
+        futuros = {nome: pool.submit(escrever_xlsx, os.path.join(args.saida, nome), parte, *eventos)
+                   for (nome, parte), eventos in zip(arquivos, eventos_por_arquivo(arquivos, surgiu, zerou))}
+        for nome, parte in arquivos:
+            n_surgiu, n_zerou = futuros[nome].result()
+            print(f"{nome}: {len(parte):,} linhas, {n_surgiu:,} surgiu, {n_zerou:,} zerou "
+                  f"({time.perf_counter() - t0:.1f}s)")
+    if len(arquivos) > 1:
+        print("Vários arquivos: abra/meça com PAINEL_ARQUIVOS=todos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# exportar_relatorios.py
+# -*- coding: utf-8 -*-
+# Exportação em lote, sem Streamlit, das tabelas do painel:
+# - Saldo Surgiu / Saldo Zerou: 1 arquivo por período (ANO/MÊS SEGUINTE), com a mesma tabela das páginas.
+# - Matriz Cronológica completa (todas as contas), '-' onde não há registro e 'R$ 0,00' onde o saldo é zero.
+# - Paralelo de verdade (--processos > 1): os dados são preparados 1x e mapeados em disco por todos os
+#   processos (painel_compartilhado); cada processo recebe só (relatório, período, caminho) e calcula,
+#   formata e grava a própria tabela. Nenhuma tabela atravessa processos; volta só (qtd, total) do período.
+# - Lê os mesmos .xlsx do painel (PAINEL_ARQUIVOS vale aqui também) e usa o mesmo cache colunar.
+# Uso: python exportar_relatorios.py [--pasta .] [--saida relatorios] [--formatos xlsx,csv,parquet]
+#                                    [--relatorios surgiu,zerou,matriz] [--processos N]
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from painel_compartilhado import abrir_preparado, preparar_compartilhado
+from painel_dados import (
+    EV_SEG_ANO, EV_SEG_MES, COL_SALDO,
+    arquivos_do_painel, carregar_dados_preparados, format_brl, tabela_eventos,
+)
+
+FORMATOS = ("xlsx", "csv", "parquet")
+RELATORIOS = ("surgiu", "zerou", "matriz")
+USAR_MES = {"surgiu": "seguinte", "zerou": "anterior"}  # relatórios por período
+
+
+def _base_dir():
+    # mesma regra do app.py: pasta do .exe (congelado) ou deste arquivo
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+# ----------------------
+# Gravação
+# ----------------------
+def gravar(df: pd.DataFrame, caminho: str, formatos, aba: str = "Relatorio", indice: bool = False):
+    """`caminho` sem extensão; 1 arquivo por formato. CSV com ';' e BOM (abre direto no Excel em pt-BR)."""
+    for fmt in formatos:
+        if fmt == "xlsx":
+            df.to_excel(caminho + ".xlsx", sheet_name=aba[:31], index=indice)
+        elif fmt == "csv":
+            df.to_csv(caminho + ".csv", sep=";", index=indice, encoding="utf-8-sig")
+        elif fmt == "parquet":
+            df.to_parquet(caminho + ".parquet", index=indice)
+    return caminho
+
+
+# ----------------------
+# Relatórios (cada tarefa calcula, formata e grava a sua tabela)
+# ----------------------
+_DS = None  # dados do processo de gravação (abertos 1x por processo, mapeados do disco)
+
+def _abrir_processo(pasta: str):
+    global _DS
+    _DS = abrir_preparado(pasta)
+
+def periodos_de_eventos(ds, tipo: str) -> list:
+    """[(ano, mês)] com eventos (ANO/MES_SEGUINTE), em ordem."""
+    ev = ds.surg if tipo == "surgiu" else ds.zerou
+    if ev.empty or not {EV_SEG_ANO, EV_SEG_MES} <= set(ev.columns):
+        return []
+    chaves = ev[[EV_SEG_ANO, EV_SEG_MES]].dropna().drop_duplicates().sort_values([EV_SEG_ANO, EV_SEG_MES])
+    return [(int(a), int(m)) for a, m in chaves.itertuples(index=False)]
+
+def tabela_matriz(ds) -> pd.DataFrame:
+    """Matriz Cronológica de todas as contas, já formatada (mesma saída da página)."""
+    matriz = ds.matriz()
+    fmt, _ = matriz.pagina(np.arange(len(matriz.linhas)))
+    return fmt.rename_axis("Conta | Tipo")
+
+def gravar_relatorio(ds, tarefa) -> tuple:
+    """tarefa = (relatório, período, caminho, formatos). Devolve (relatório, período, qtd, total)."""
+    relatorio, periodo, caminho, formatos = tarefa
+    if relatorio == "matriz":
+        tabela = tabela_matriz(ds)
+        gravar(tabela, caminho, formatos, "Matriz", indice=True)
+        return relatorio, periodo, len(tabela), None
+    a, m = periodo
+    exp = ds.eventos_do_periodo(relatorio, a, m)  # mesma consulta da página
+    gravar(tabela_eventos(exp, relatorio).reset_index(drop=True), caminho, formatos, f"{relatorio} {a}-{m:02d}")
+    return relatorio, periodo, len(exp), float(np.nansum(exp[COL_SALDO].to_numpy(dtype="float64")))
+
+def _tarefa(tarefa) -> tuple:
+    return gravar_relatorio(_DS, tarefa)
+
+def _executar(ds, pasta_compartilhada, tarefas, processos: int) -> list:
+    """Serial com `ds` já carregado; em paralelo, cada processo abre os dados mapeados de `pasta_compartilhada`."""
+    if processos <= 1 or len(tarefas) <= 1:
+        return [gravar_relatorio(ds, t) for t in tarefas]
+    with ProcessPoolExecutor(max_workers=min(processos, len(tarefas)), initializer=_abrir_processo,
+                             initargs=(pasta_compartilhada,)) as pool:
+        return list(pool.map(_tarefa, tarefas))
+
+
+def exportar(pasta: str, saida: str, formatos, relatorios, processos: int) -> dict:
+    t0 = time.perf_counter()
+    arquivos = arquivos_do_painel(pasta)
+    if not arquivos:
+        raise SystemExit(f"Nenhum .xlsx em {pasta}")
+    if processos > 1:  # prepara 1x; os processos de gravação só mapeiam os arquivos
+        pasta_compartilhada = preparar_compartilhado(arquivos)
+        ds = abrir_preparado(pasta_compartilhada)
+    else:
+        pasta_compartilhada, ds = None, carregar_dados_preparados(arquivos)
+    t_dados = time.perf_counter() - t0
+
+    tarefas = []
+    for tipo in (r for r in relatorios if r in USAR_MES):
+        destino = os.path.join(saida, f"saldo_{tipo}")
+        os.makedirs(destino, exist_ok=True)
+        tarefas += [(tipo, (a, m), os.path.join(destino, f"{tipo}_{a}-{m:02d}"), formatos)
+                    for a, m in periodos_de_eventos(ds, tipo)]
+    if "matriz" in relatorios:
+        os.makedirs(saida, exist_ok=True)
+        tarefas.insert(0, ("matriz", None, os.path.join(saida, "matriz_cronologica"), formatos))  # a maior: 1º
+
+    t1 = time.perf_counter()
+    feitos = _executar(ds, pasta_compartilhada, tarefas, processos)
+    contagem = {}
+    for tipo in (r for r in relatorios if r in USAR_MES):
+        resumo = pd.DataFrame([{"Ano": a, "Mês": m, "Qtd. (Conta, Tipo)": qtd, "Valor Total": format_brl(total)}
+                               for rel, (a, m), qtd, total in (f for f in feitos if f[0] == tipo)])
+        if len(resumo):
+            gravar(resumo, os.path.join(saida, f"saldo_{tipo}", f"resumo_{tipo}"), formatos, f"resumo {tipo}")
+        contagem[tipo] = len(resumo)
+    contagem.update({"matriz": f[2] for f in feitos if f[0] == "matriz"})
+    t_relatorios = time.perf_counter() - t1
+    print(f"[painel] exportação: dados {t_dados:.2f}s, cálculo + gravação {t_relatorios:.2f}s "
+          f"({len(tarefas)} tabela(s) x {len(formatos)} formato(s), {max(1, processos)} processo(s)) -> {saida}")
+    return contagem
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exporta Saldo Surgiu/Zerou (todos os períodos) e a Matriz Cronológica.")
+    ap.add_argument("--pasta", default=_base_dir(), help="pasta com o(s) .xlsx (padrão: a do painel)")
+    ap.add_argument("--saida", default=None, help="pasta de destino (padrão: <pasta>/relatorios)")
+    ap.add_argument("--formatos", default="xlsx", help=f"separados por vírgula: {','.join(FORMATOS)}")
+    ap.add_argument("--relatorios", default=",".join(RELATORIOS), help=f"separados por vírgula: {','.join(RELATORIOS)}")
+    ap.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos (cada um calcula e grava os seus períodos)")
+    args = ap.parse_args()
+
+    formatos = [f.strip().lower() for f in args.formatos.split(",") if f.strip()]
+    relatorios = [r.strip().lower() for r in args.relatorios.split(",") if r.strip()]
+    invalidos = [f for f in formatos if f not in FORMATOS] + [r for r in relatorios if r not in RELATORIOS]
+    if invalidos or not formatos or not relatorios:
+        ap.error(f"opção inválida: {', '.join(invalidos) or 'lista vazia'}")
+    contagem = exportar(args.pasta, args.saida or os.path.join(args.pasta, "relatorios"), formatos, relatorios,
+                        args.processos)
+    for rel, qtd in contagem.items():
+        print(f"  {rel}: {qtd} {'linhas' if rel == 'matriz' else 'períodos'}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,125 @@
+# painel_atualizacao.py
+# -*- coding: utf-8 -*-
+# Atualização automática dos dados (sem Streamlit):
+# - Uma thread por processo verifica os .xlsx periodicamente (tamanho + mtime).
+# - Ao detectar mudança estável, prepara a nova versão fora do caminho das requisições.
+# - A troca é atômica (1 referência): quem está usando a versão antiga continua com ela;
+#   a próxima interação já recebe a nova. Usuário nunca espera a releitura.
+# - Se a releitura falhar (ex.: arquivo ainda sendo salvo), mantém a versão atual e tenta de novo.
+# - 1 gerenciador por pasta no processo (gerenciador_da_pasta): o run_streamlit.py pré-aquece o mesmo
+#   objeto que o app usa.
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from painel_banco import carregar_consultas
+from painel_dados import arquivos_do_painel, assinatura_arquivos
+from painel_metricas import registrar
+
+# Intervalo de verificação dos arquivos (segundos); 0 = sem thread (verifica a cada acesso)
+INTERVALO_VIGIA = float(os.environ.get("PAINEL_VIGIA_SEGUNDOS", "5"))
+
+
+@dataclass(frozen=True)
+class VersaoDados:
+    """Uma versão dos dados preparados, trocada inteira (nunca alterada)."""
+    numero: int          # 1, 2, 3... a cada recarga no processo
+    assinatura: tuple    # ((caminho, tamanho, mtime_ns), ...) dos arquivos lidos
+    dados: object        # DadosPreparados (pandas) ou BancoDuckDB: mesma interface de consultas
+    carregado_em: float  # time.time() da troca
+    segundos: float      # tempo da leitura + preparação
+
+
+class GerenciadorDados:
+    """Mantém a versão atual dos dados e a recarrega em segundo plano quando os arquivos mudam.
+    `listar` devolve a lista de .xlsx a ler (chamada a cada verificação: arquivos novos entram)."""
+
+    def __init__(self, listar, intervalo: float = INTERVALO_VIGIA, carregar=carregar_consultas):
+        self._listar = listar
+        self._carregar = carregar
+        self.intervalo = intervalo
+        self._atual = None            # VersaoDados (troca atômica por atribuição)
+        self._trava = threading.Lock()  # 1 recarga por vez
+        self._pendente = None         # assinatura vista na última verificação (espera estabilizar)
+        self.recarregando = False
+        self.ultimo_erro = None
+        self._thread = None
+
+    # ---------- leitura ----------
+    def atual(self) -> VersaoDados:
+        """Versão vigente. Só bloqueia na 1ª carga do processo (ou com a vigia desligada)."""
+        if self._atual is None or self.intervalo <= 0:
+            self.verificar(esperar_estabilizar=False)
+        return self._atual
+
+    # ---------- recarga ----------
+    def verificar(self, esperar_estabilizar: bool = True) -> bool:
+        """Recarrega se a assinatura dos arquivos mudou. True se trocou de versão.
+        Com `esperar_estabilizar`, só recarrega quando a mesma assinatura aparece em 2 verificações
+        seguidas (evita ler um .xlsx que o Excel ainda está gravando)."""
+        with self._trava:
+            try:
+                arquivos = self._listar()
+                assinatura = assinatura_arquivos(arquivos)
+            except OSError as exc:
+                self.ultimo_erro = f"{type(exc).__name__}: {exc}"
+                if self._atual is None:
+                    raise
+                return False
+            if self._atual is not None and assinatura == self._atual.assinatura:
+                self._pendente = None
+                return False
+            if esperar_estabilizar and self._atual is not None and assinatura != self._pendente:
+                self._pendente = assinatura
+                return False
+
+            self.recarregando = True
+            t0 = time.perf_counter()
+            try:
+                dados = self._carregar(arquivos)
+            except Exception as exc:
+                self.ultimo_erro = f"{type(exc).__name__}: {exc}"
+                print(f"[painel] falha ao recarregar os dados ({self.ultimo_erro}); mantendo a versão atual.")
+                if self._atual is None:
+                    raise
+                return False
+            finally:
+                self.recarregando = False
+            numero = 1 if self._atual is None else self._atual.numero + 1
+            segundos = time.perf_counter() - t0
+            registrar("recarga dos dados", segundos)
+            self._atual = VersaoDados(numero, assinatura, dados, time.time(), segundos)
+            self._pendente = None
+            self.ultimo_erro = None
+            if numero > 1:
+                print(f"[painel] dados atualizados (versão {numero}) em {segundos:.2f}s.")
+            return True
+
+    def _vigiar(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.verificar()
+            except Exception as exc:  # a thread não pode morrer
+                self.ultimo_erro = f"{type(exc).__name__}: {exc}"
+
+    def iniciar(self):
+        """Inicia a thread de vigia (1x; ignorado com intervalo 0)."""
+        if self.intervalo > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._vigiar, name="painel-vigia", daemon=True)
+            self._thread.start()
+        return self
+
+
+_GERENCIADORES = {}
+_TRAVA_GERENCIADORES = threading.Lock()
+
+def gerenciador_da_pasta(pasta: str) -> GerenciadorDados:
+    """Gerenciador único (por processo) dos .xlsx de `pasta`."""
+    pasta = os.path.abspath(pasta)
+    with _TRAVA_GERENCIADORES:
+        if pasta not in _GERENCIADORES:
+            _GERENCIADORES[pasta] = GerenciadorDados(lambda: arquivos_do_painel(pasta))
+        return _GERENCIADORES[pasta]
@@ -0,0 +1,271 @@
+# painel_banco.py
+# -*- coding: utf-8 -*-
+# Backend opcional em banco embutido (DuckDB, colunar, arquivo local):
+# - PAINEL_BACKEND=duckdb grava o razão num .duckdb em .painel_cache (1 arquivo por versão dos .xlsx).
+# - Tabela ordenada por (Conta, CO_TP, ano, mês) + índice nessas colunas; cada página vira 1 consulta
+#   com filtro/agregação no banco e só o resultado (pequeno) vem para o pandas.
+# - Com o banco já gravado para a versão atual, a abertura nem passa pelo pandas: memória fica estável
+#   mesmo com o razão crescendo.
+# - Padrão continua pandas (tudo em memória). Sem o pacote duckdb, avisa e segue em pandas.
+# - O arquivo .duckdb já é compartilhado entre os processos do PAINEL_PROCESSOS (cada um abre só leitura).
+
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from painel_dados import (
+    COL_ID_CONTA, COL_NO_CONTA, COL_ANO, COL_MES, COL_DATA, COL_SALDO, COL_CO_TP, COL_NO_TP, COL_MES_TXT,
+    EV_SEG_ANO, EV_SEG_MES,
+    VERSAO_CACHE, DadosPreparados, assinatura_arquivos, carregar_dados_preparados, completar_kpis,
+    construir_catalogo_contas, eventos_a_expandir,
+    pasta_cache, rotulos_conta_tipo, rotulos_tipo,
+)
+from painel_compartilhado import ATIVO as COMPARTILHADO, TravaArquivo, carregar_compartilhado
+from painel_matriz import calcular_matriz
+
+# "pandas" (padrão, tudo em memória) ou "duckdb" (consultas no banco embutido)
+BACKEND = os.environ.get("PAINEL_BACKEND", "pandas").strip().lower()
+
+COLS_INDICE = [COL_NO_CONTA, COL_CO_TP, COL_ANO, COL_MES]
+COL_ORDEM = "_ORDEM"  # posição da linha no razão preparado (desempate igual ao do pandas)
+
+
+def _arq_banco(arquivos, assinatura) -> str:
+    chave = hashlib.sha256(json.dumps([VERSAO_CACHE, assinatura]).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(pasta_cache(arquivos[-1]), f"painel_{chave}.duckdb")
+
+def _parametros(params) -> list:
+    """Escalares numpy/pandas -> tipos Python (o DuckDB não aceita np.int8, Timestamp...)."""
+    saida = []
+    for v in params or []:
+        if isinstance(v, pd.Timestamp):
+            v = v.to_pydatetime()
+        elif isinstance(v, np.generic):
+            v = v.item()
+        saida.append(v)
+    return saida
+
+def _texto(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorias viram texto (no banco, VARCHAR em vez de ENUM por versão)."""
+    cat = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    return df.astype({c: "object" for c in cat}) if cat else df
+
+def gravar_banco(ds: DadosPreparados, caminho: str):
+    """Grava razão, eventos e metadados de `ds` em `caminho` (arquivo temporário + rename)."""
+    import duckdb
+    tmp = caminho + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    dados = _texto(ds.dados).assign(**{COL_ORDEM: range(len(ds.dados))})
+    ordem = ", ".join(f'"{c}"' for c in COLS_INDICE if c in dados.columns)
+    meta = {
+        "arquivos": list(ds.arquivos),
+        "mtime": ds.mtime,
+        "datas_opts": [pd.Timestamp(d).isoformat() for d in ds.datas_opts],
+        "fonte_eventos": ds.fonte_eventos,
+        "leitura": ds.leitura,
+        "qtd_mes0": ds.qtd_mes0,
+        "avisos": ds.avisos,
+    }
+    con = duckdb.connect(tmp)
+    try:
+        con.register("df_dados", dados)
+        con.execute(f"CREATE TABLE dados AS SELECT * FROM df_dados ORDER BY {ordem}")
+        con.execute(f"CREATE INDEX idx_dados ON dados ({ordem})")
+        for nome, ev in (("surgiu", ds.surg), ("zerou", ds.zerou)):
+            if not ev.columns.empty:
+                con.register("df_ev", _texto(ev).reset_index(drop=True))
+                con.execute(f"CREATE TABLE {nome} AS SELECT * FROM df_ev")
+                con.unregister("df_ev")
+        con.execute("CREATE TABLE meta (json VARCHAR)")
+        con.execute("INSERT INTO meta VALUES (?)", [json.dumps(meta, default=str)])
+    finally:
+        con.close()
+    os.replace(tmp, caminho)
+
+
+class BancoDuckDB:
+    """Mesma interface de consultas do DadosPreparados, respondida pelo banco."""
+
+    def __init__(self, caminho: str):
+        import duckdb
+        self.caminho = caminho
+        self._con = duckdb.connect(caminho, read_only=True)
+        meta = json.loads(self._con.execute("SELECT json FROM meta").fetchone()[0])
+        tabelas = {t for (t,) in self._con.execute("SHOW TABLES").fetchall()}
+        self.arquivos = tuple(meta["arquivos"])
+        self.mtime = meta["mtime"]
+        self.datas_opts = [pd.Timestamp(d) for d in meta["datas_opts"]]
+        self.fonte_eventos = meta["fonte_eventos"]
+        self.leitura = meta["leitura"]
+        self.qtd_mes0 = meta["qtd_mes0"]
+        self.avisos = meta["avisos"]
+        self.surg = self._df("SELECT * FROM surgiu") if "surgiu" in tabelas else pd.DataFrame()
+        self.zerou = self._df("SELECT * FROM zerou") if "zerou" in tabelas else pd.DataFrame()
+        self._colunas = [c for (c,) in self._con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'dados'").fetchall()]
+        cols_catalogo = ", ".join(f'"{c}"' for c in (COL_NO_CONTA, COL_ID_CONTA, COL_CO_TP, COL_NO_TP) if c in self._colunas)
+        self.catalogo = construir_catalogo_contas(self._df(f"SELECT DISTINCT {cols_catalogo} FROM dados"))
+
+    def _df(self, sql: str, params=None) -> pd.DataFrame:
+        """1 cursor por consulta: conexões DuckDB não são compartilháveis entre threads."""
+        cur = self._con.cursor()
+        try:
+            return cur.execute(sql, _parametros(params)).df()
+        finally:
+            cur.close()
+
+    # ---------- consultas das páginas ----------
+    def contas(self) -> list:
+        return self.catalogo.nomes.tolist()
+
+    def tipos_da_conta(self, conta) -> pd.DataFrame:
+        return self.catalogo.tipos_da_conta(conta)
+
+    def serie(self, conta, co, inicio=None, fim=None) -> pd.DataFrame:
+        sql = (f'SELECT "{COL_DATA}", COALESCE(SUM("{COL_SALDO}"), 0) AS "{COL_SALDO}" FROM dados '
+               f'WHERE MES_VALIDO AND "{COL_NO_CONTA}" = ? AND "{COL_CO_TP}" = ?')
+        params = [conta, co]
+        if inicio is not None:
+            sql += f' AND "{COL_DATA}" >= ?'
+            params.append(pd.Timestamp(inicio))
+        if fim is not None:
+            sql += f' AND "{COL_DATA}" <= ?'
+            params.append(pd.Timestamp(fim))
+        return self._df(sql + f' GROUP BY "{COL_DATA}" ORDER BY "{COL_DATA}"', params)
+
+    def pares(self) -> pd.DataFrame:
+        pares = self._df(
+            f'SELECT DISTINCT "{COL_NO_CONTA}", "{COL_CO_TP}", "{COL_NO_TP}" FROM dados '
+            f'WHERE "{COL_NO_CONTA}" IS NOT NULL AND "{COL_CO_TP}" IS NOT NULL')
+        pares["LABEL"] = rotulos_conta_tipo(pares[COL_NO_CONTA], pares[COL_CO_TP], pares[COL_NO_TP])
+        return pares
+
+    def comparativo(self, pares_sel: pd.DataFrame, inicio=None, fim=None) -> pd.DataFrame:
+        sel = pares_sel[[COL_NO_CONTA, COL_CO_TP]].assign(LABEL=pares_sel["LABEL"].astype(str))
+        sql = (f'SELECT p.LABEL, d."{COL_DATA}", COALESCE(SUM(d."{COL_SALDO}"), 0) AS "{COL_SALDO}" '
+               f'FROM dados d JOIN sel p ON d."{COL_NO_CONTA}" = p."{COL_NO_CONTA}" AND d."{COL_CO_TP}" = p."{COL_CO_TP}" '
+               f'WHERE d.MES_VALIDO')
+        params = []
+        if inicio is not None and fim is not None:
+            sql += f' AND d."{COL_DATA}" BETWEEN ? AND ?'
+            params += [pd.Timestamp(inicio), pd.Timestamp(fim)]
+        cur = self._con.cursor()
+        try:
+            cur.register("sel", sel)
+            return cur.execute(sql + " GROUP BY 1, 2 ORDER BY 1, 2", _parametros(params)).df()
+        finally:
+            cur.close()
+
+    def kpis_pares(self, inicio=None, fim=None) -> pd.DataFrame:
+        """Mesmos KPIs de DadosPreparados.kpis_pares, agregados no banco (1 linha por par)."""
+        filtro, params = "", []
+        if inicio is not None:
+            filtro += f' AND "{COL_DATA}" >= ?'
+            params.append(pd.Timestamp(inicio))
+        if fim is not None:
+            filtro += f' AND "{COL_DATA}" <= ?'
+            params.append(pd.Timestamp(fim))
+        kpis = self._df(
+            f'SELECT "{COL_NO_CONTA}", "{COL_CO_TP}", COUNT(*) AS "Meses", '
+            f'arg_min(s, "{COL_DATA}") AS "Primeiro", arg_max(s, "{COL_DATA}") AS "Saldo Recente", MAX(s) AS "Pico" '
+            f'FROM (SELECT "{COL_NO_CONTA}", "{COL_CO_TP}", "{COL_DATA}", COALESCE(SUM("{COL_SALDO}"), 0) AS s '
+            f'      FROM dados WHERE MES_VALIDO AND "{COL_NO_CONTA}" IS NOT NULL AND "{COL_CO_TP}" IS NOT NULL{filtro} '
+            f'      GROUP BY 1, 2, 3) '
+            f'GROUP BY 1, 2 ORDER BY 1, 2', params)
+        kpis["Variação"] = kpis["Saldo Recente"] - kpis["Primeiro"]
+        return completar_kpis(kpis, self.pares())
+
+    def historico(self, conta, co) -> pd.DataFrame:
+        return self._df(
+            f'SELECT "{COL_ANO}", "{COL_MES}", "{COL_SALDO}" FROM dados '
+            f'WHERE "{COL_NO_CONTA}" = ? AND "{COL_CO_TP}" = ? ORDER BY "{COL_ANO}", "{COL_MES}", {COL_ORDEM}',
+            [conta, co])
+
+    def matriz(self, contas=None):
+        """Agregação (Conta, Tipo, mês) no banco; a montagem da matriz recebe só os grupos."""
+        col_mes = COL_MES_TXT if COL_MES_TXT in self._colunas else COL_DATA
+        grupo = ", ".join(f'"{c}"' for c in (COL_NO_CONTA, COL_CO_TP, COL_NO_TP, COL_ANO, COL_MES, col_mes))
+        sql = (f'SELECT {grupo}, COALESCE(SUM("{COL_SALDO}"), 0) AS "{COL_SALDO}", COUNT(*) AS QTD FROM dados')
+        params = []
+        if contas:
+            sql += f' WHERE "{COL_NO_CONTA}" IN ({", ".join("?" * len(contas))})'
+            params = list(contas)
+        agg = self._df(sql + f" GROUP BY {grupo}", params)
+        return calcular_matriz(agg, None, col_contagem="QTD")
+
+    def eventos_do_periodo(self, tipo: str, ano, mes) -> pd.DataFrame:
+        """Mesmo resultado de DadosPreparados.eventos_do_periodo, com o join feito no banco."""
+        ev = self.surg if tipo == "surgiu" else self.zerou
+        sel = ev[(ev[EV_SEG_ANO] == ano) & (ev[EV_SEG_MES] == mes)] if len(ev) else ev
+        if not len(sel):
+            return sel.iloc[0:0]
+        eventos, co_evento = eventos_a_expandir(sel, "seguinte" if tipo == "surgiu" else "anterior",
+                                                por_tipo=self.fonte_eventos == "detectado")
+        eventos = _texto(eventos).assign(_EV=range(len(eventos)))
+        if co_evento is not None:
+            eventos["_CO_EV"] = co_evento
+        cols_dir = [c for c in (COL_CO_TP, COL_NO_TP, COL_ANO, COL_MES, COL_SALDO) if c in self._colunas]
+        # Linhas do mesmo mês de outro tipo não contam; sem nenhuma linha no mês, fica 1 linha vazia
+        filtro_tipo = (f' WHERE d.{COL_ORDEM} IS NULL OR e._CO_EV IS NOT DISTINCT FROM d."{COL_CO_TP}"'
+                       if co_evento is not None else "")
+        sql = (f'SELECT e.* EXCLUDE (_EV{", _CO_EV" if co_evento is not None else ""}), '
+               + ", ".join(f'd."{c}"' for c in cols_dir)
+               + f' FROM ev e LEFT JOIN dados d ON d.MES_VALIDO AND d."{COL_ID_CONTA}" = e."{COL_ID_CONTA}" '
+               f'AND d."{COL_ANO}" = e.ANO_EVT AND d."{COL_MES}" = e.MES_EVT'
+               + filtro_tipo + f" ORDER BY e._EV, d.{COL_ORDEM}")
+        cur = self._con.cursor()
+        try:
+            cur.register("ev", eventos)
+            exp = cur.execute(sql).df()
+        finally:
+            cur.close()
+        exp["TIPO_ROT"] = rotulos_tipo(exp[COL_CO_TP], exp[COL_NO_TP])
+        return exp
+
+
+def _limpar_bancos_antigos(atual: str):
+    """Apaga bancos de versões anteriores (em uso por outro processo no Windows: fica p/ a próxima)."""
+    for arq in glob.glob(os.path.join(os.path.dirname(atual), "painel_*.duckdb*")):
+        if arq != atual and not arq.endswith(".lock"):
+            try:
+                os.remove(arq)
+            except OSError:
+                pass
+
+def carregar_consultas(arquivos, backend: str = BACKEND):
+    """Dados prontos p/ as páginas: DadosPreparados (pandas) ou BancoDuckDB (backend "duckdb")."""
+    arquivos = [arquivos] if isinstance(arquivos, str) else list(arquivos)
+    if backend != "duckdb":
+        if COMPARTILHADO:  # vários processos (run_streamlit.py): mesmos arquivos mapeados para todos
+            try:
+                return carregar_compartilhado(arquivos)
+            except OSError as exc:
+                print(f"[painel] dados compartilhados indisponíveis ({exc}); carregando só neste processo.")
+        return carregar_dados_preparados(arquivos)
+    try:
+        import duckdb
+    except ImportError:
+        ds = carregar_dados_preparados(arquivos)
+        ds.avisos.append("PAINEL_BACKEND=duckdb, mas o pacote duckdb não está instalado; usando pandas.")
+        return ds
+
+    caminho = _arq_banco(arquivos, assinatura_arquivos(arquivos))
+    if not os.path.exists(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with TravaArquivo(caminho + ".lock"):  # vários processos: só 1 grava, os outros abrem o que ele gravou
+            if not os.path.exists(caminho):
+                ds = carregar_dados_preparados(arquivos)
+                try:
+                    gravar_banco(ds, caminho)
+                except (OSError, duckdb.Error) as exc:
+                    print(f"[painel] não foi possível gravar o banco ({exc}); usando pandas.")
+                    return ds
+                del ds  # a partir daqui, só o banco
+                _limpar_bancos_antigos(caminho)
+    print(f"[painel] backend duckdb: {os.path.basename(caminho)}")
+    return BancoDuckDB(caminho)
@@ -0,0 +1,185 @@
+# painel_cache.py
+# -*- coding: utf-8 -*-
+# Cache de resultados das páginas (sem Streamlit):
+# - Chave = (versão dos dados, consulta, parâmetros normalizados): a mesma seleção, em qualquer sessão,
+#   reaproveita o resultado; versão nova dos arquivos = chaves novas.
+# - LRU limitado por nº de itens e por memória estimada (PAINEL_CACHE_ITENS / PAINEL_CACHE_MB).
+# - Contadores de acertos/faltas/descartes por consulta (painel de administração).
+# - Resultados são compartilhados: quem recebe não altera in-place.
+
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+from painel_dados import COL_CO_TP, COL_NO_CONTA
+from painel_metricas import medir
+
+MAX_ITENS = int(os.environ.get("PAINEL_CACHE_ITENS", "256"))
+MAX_MB = float(os.environ.get("PAINEL_CACHE_MB", "512"))
+
+
+def tamanho_bytes(obj) -> int:
+    """Memória aproximada de um resultado (DataFrame, arrays, dataclasses, listas...)."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, "sum") else uso)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if is_dataclass(obj):
+        return sum(tamanho_bytes(getattr(obj, f.name)) for f in fields(obj))
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(v) for v in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(k) + tamanho_bytes(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class CacheLRU:
+    """Dicionário LRU thread-safe com limite de itens e de bytes."""
+
+    def __init__(self, max_itens: int = MAX_ITENS, max_mb: float = MAX_MB):
+        self.max_itens = max_itens
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._itens = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self._stats = {}             # consulta -> {"acertos", "faltas", "descartes"}
+
+    def _contar(self, chave, campo: str):
+        nome = chave[1] if isinstance(chave, tuple) and len(chave) > 1 else str(chave)
+        st_ = self._stats.setdefault(nome, {"acertos": 0, "faltas": 0, "descartes": 0})
+        st_[campo] += 1
+
+    def obter(self, chave, calcular):
+        """Valor em cache ou `calcular()` (fora da trava: consultas diferentes não se esperam)."""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self._contar(chave, "acertos")
+                return item[0]
+            self._contar(chave, "faltas")
+        valor = calcular()
+        tam = tamanho_bytes(valor)
+        if tam > self.max_bytes:
+            return valor  # maior que o cache inteiro: não guarda
+        with self._trava:
+            if chave in self._itens:
+                return self._itens[chave][0]
+            self._itens[chave] = (valor, tam)
+            self._bytes += tam
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                velha, (_, tam_velho) = self._itens.popitem(last=False)
+                self._bytes -= tam_velho
+                self._contar(velha, "descartes")
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def resumo(self) -> dict:
+        with self._trava:
+            acertos = sum(s["acertos"] for s in self._stats.values())
+            faltas = sum(s["faltas"] for s in self._stats.values())
+            return {
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "mb": self._bytes / 1024 / 1024,
+                "max_mb": self.max_bytes / 1024 / 1024,
+                "acertos": acertos,
+                "faltas": faltas,
+                "descartes": sum(s["descartes"] for s in self._stats.values()),
+                "taxa_acerto": acertos / (acertos + faltas) if acertos + faltas else 0.0,
+            }
+
+    def por_consulta(self) -> pd.DataFrame:
+        """Acertos/faltas/descartes e itens/MB atuais por consulta."""
+        with self._trava:
+            atuais = {}
+            for chave, (_, tam) in self._itens.items():
+                qtd, soma = atuais.get(chave[1], (0, 0))
+                atuais[chave[1]] = (qtd + 1, soma + tam)
+            linhas = [
+                {"Consulta": nome, **s, "itens": atuais.get(nome, (0, 0))[0],
+                 "MB": atuais.get(nome, (0, 0))[1] / 1024 / 1024}
+                for nome, s in sorted(self._stats.items())
+            ]
+        return pd.DataFrame(linhas, columns=["Consulta", "acertos", "faltas", "descartes", "itens", "MB"])
+
+
+# 1 cache por processo, compartilhado por todas as sessões
+CACHE_RESULTADOS = CacheLRU()
+
+
+def _norm(v):
+    """Parâmetro -> valor hashable e estável (np.int8(3) == 3; NaN -> None; datas -> Timestamp)."""
+    if v is None:
+        return None
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if isinstance(v, (np.datetime64, pd.Timestamp)):
+        return pd.Timestamp(v)
+    return v
+
+
+class ConsultasEmCache:
+    """Interface de consultas do DadosPreparados/BancoDuckDB com resultado em CACHE_RESULTADOS.
+    Atributos que não são consultas (surg, avisos, datas_opts...) vêm direto dos dados."""
+
+    def __init__(self, dados, versao, cache: CacheLRU = CACHE_RESULTADOS):
+        self._dados = dados
+        self._versao = versao
+        self._cache = cache
+
+    def __getattr__(self, nome):
+        return getattr(self._dados, nome)
+
+    def _obter(self, consulta: str, params: tuple, calcular):
+        with medir(f"consulta:{consulta}"):
+            return self._cache.obter((self._versao, consulta) + params, calcular)
+
+    def contas(self) -> list:
+        return self._obter("contas", (), self._dados.contas)
+
+    def tipos_da_conta(self, conta) -> pd.DataFrame:
+        return self._obter("tipos_da_conta", (_norm(conta),), lambda: self._dados.tipos_da_conta(conta))
+
+    def serie(self, conta, co, inicio=None, fim=None) -> pd.DataFrame:
+        params = (_norm(conta), _norm(co), _norm(inicio), _norm(fim))
+        return self._obter("serie", params, lambda: self._dados.serie(conta, co, inicio, fim))
+
+    def pares(self) -> pd.DataFrame:
+        return self._obter("pares", (), self._dados.pares)
+
+    def comparativo(self, pares_sel: pd.DataFrame, inicio=None, fim=None) -> pd.DataFrame:
+        # Um par pode ter mais de um rótulo (NO_TP diferentes): a chave leva (LABEL, Conta, CO_TP) de cada linha,
+        # na ordem em que o comparativo as usa (estável por LABEL); seleções que dão o mesmo resultado coincidem
+        ordem = pares_sel.sort_values("LABEL", kind="stable")
+        chave_pares = tuple((_norm(r), _norm(c), _norm(co)) for r, c, co in
+                            zip(ordem["LABEL"], ordem[COL_NO_CONTA], ordem[COL_CO_TP]))
+        params = (chave_pares, _norm(inicio), _norm(fim))
+        return self._obter("comparativo", params, lambda: self._dados.comparativo(pares_sel, inicio, fim))
+
+    def kpis_pares(self, inicio=None, fim=None) -> pd.DataFrame:
+        return self._obter("kpis_pares", (_norm(inicio), _norm(fim)), lambda: self._dados.kpis_pares(inicio, fim))
+
+    def historico(self, conta, co) -> pd.DataFrame:
+        return self._obter("historico", (_norm(conta), _norm(co)), lambda: self._dados.historico(conta, co))
+
+    def matriz(self, contas=None):
+        contas = sorted(set(contas or ()))
+        return self._obter("matriz", (tuple(contas),), lambda: self._dados.matriz(contas))
+
+    def eventos_do_periodo(self, tipo: str, ano, mes) -> pd.DataFrame:
+        params = (tipo, _norm(ano), _norm(mes))
+        return self._obter("eventos_do_periodo", params, lambda: self._dados.eventos_do_periodo(tipo, ano, mes))
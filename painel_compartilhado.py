@@ -0,0 +1,261 @@
+# painel_compartilhado.py
+# -*- coding: utf-8 -*-
+# Dados preparados em disco, compartilhados entre processos (modo multiprocesso do run_streamlit.py):
+# - 1 pasta por versão dos .xlsx em .painel_cache (preparado_<chave>/): cada coluna do razão preparado e os
+#   arrays dos índices (séries, eventos) em .npy; eventos SURGIU/ZEROU e nomes em Arrow; metadados em meta.json.
+# - Cada processo abre com np.load(mmap_mode="r"): as páginas ficam no cache do SO, 1 vez para todos os
+#   processos; a memória não cresce N vezes. Categorias: códigos mapeados; só os textos distintos são lidos
+#   por processo, junto com o dicionário das séries e o catálogo.
+# - 1 processo prepara por vez (trava em arquivo, renovada enquanto ele trabalha); os outros esperam e
+#   abrem o que ele gravou.
+# - Somente leitura: arrays mapeados em modo "r" (escrita por engano vira erro, não corrompe os outros).
+# - PAINEL_COMPARTILHADO=1 liga (o run_streamlit.py define para os processos que ele inicia).
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from painel_dados import (
+    VERSAO_CACHE, DadosPreparados, GruposEventos, IndiceEventos, IndiceSeries,
+    assinatura_arquivos, carregar_dados_preparados, construir_catalogo_contas, pasta_cache,
+)
+
+ATIVO = os.environ.get("PAINEL_COMPARTILHADO", "0").strip().lower() in ("1", "sim", "true")
+TRAVA_SEGUNDOS = 600  # trava sem sinal de vida há mais que isso é de um processo que morreu preparando
+ARQ_META = "meta.json"
+FORMATO = 1  # incrementar quando mudar o que é gravado na pasta preparado_*
+
+
+def pasta_preparado(arquivos, assinatura) -> str:
+    chave = hashlib.sha256(json.dumps([VERSAO_CACHE, FORMATO, assinatura]).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(pasta_cache(arquivos[-1]), f"preparado_{chave}")
+
+def _npy(pasta: str, nome: str) -> str:
+    return os.path.join(pasta, f"{nome}.npy")
+
+def _mapear(pasta: str, nome: str) -> np.ndarray:
+    """ndarray comum (somente leitura) sobre o arquivo mapeado: sem a subclasse memmap nos resultados."""
+    return np.asarray(np.load(_npy(pasta, nome), mmap_mode="r"))
+
+
+# ----------------------
+# Gravação (1 processo)
+# ----------------------
+def _gravar_frame(pasta: str, prefixo: str, df: pd.DataFrame) -> list:
+    """Colunas em .npy (categoria = códigos .npy + categorias em Arrow); texto solto vai para Arrow.
+    Devolve a descrição das colunas para o meta.json."""
+    colunas = []
+    for i, col in enumerate(df.columns):
+        nome = f"{prefixo}{i}"
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            np.save(_npy(pasta, nome), s.cat.codes.to_numpy())
+            feather.write_feather(pd.DataFrame({"c": s.cat.categories}), os.path.join(pasta, f"{nome}.cat.arrow"),
+                                  compression="uncompressed")
+            colunas.append({"nome": col, "arquivo": nome, "tipo": "categoria"})
+        elif s.dtype.kind in "biufmM":
+            np.save(_npy(pasta, nome), s.to_numpy())
+            colunas.append({"nome": col, "arquivo": nome, "tipo": "array"})
+        else:  # objeto/texto (tipos misturados): não mapeável, lido inteiro em cada processo
+            feather.write_feather(pd.DataFrame({"c": s.astype(object)}), os.path.join(pasta, f"{nome}.arrow"),
+                                  compression="uncompressed")
+            colunas.append({"nome": col, "arquivo": nome, "tipo": "arrow"})
+    return colunas
+
+def gravar_preparado(ds: DadosPreparados, destino: str):
+    """Grava `ds` em `destino` (pasta temporária + rename: leitores nunca veem pasta pela metade)."""
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    try:
+        colunas = _gravar_frame(tmp, "dados_", ds.dados)
+
+        # Índice de séries: arrays + fronteiras; o dicionário (conta, co) -> faixa é remontado ao abrir
+        chaves = list(ds.series.posicoes)
+        faixas = np.array([ds.series.posicoes[k] for k in chaves], dtype=np.int64).reshape(-1, 2)
+        np.save(_npy(tmp, "series_datas"), ds.series.datas)
+        np.save(_npy(tmp, "series_saldos"), ds.series.saldos)
+        np.save(_npy(tmp, "series_faixas"), faixas)
+        feather.write_feather(pd.DataFrame({"conta": [k[0] for k in chaves], "co": [k[1] for k in chaves]}),
+                              os.path.join(tmp, "series_chaves.arrow"), compression="uncompressed")
+
+        # Índice de eventos: já é CSR (arrays), grava como está
+        for campo in ("ids", "chaves", "inicio", "posicoes"):
+            np.save(_npy(tmp, f"eventos_{campo}"), getattr(ds.eventos.grupos, campo))
+
+        for nome, df in (("nm", ds.nm), ("surgiu", ds.surg), ("zerou", ds.zerou)):
+            feather.write_feather(df.reset_index(drop=True), os.path.join(tmp, f"{nome}.arrow"),
+                                  compression="uncompressed")
+        meta = {
+            "arquivos": list(ds.arquivos),
+            "mtime": ds.mtime,
+            "colunas": colunas,
+            "linhas_validas": len(ds.dados_analise_base),
+            "eventos_colunas": ds.eventos.colunas,
+            "datas_opts": [pd.Timestamp(d).isoformat() for d in ds.datas_opts],
+            "fonte_eventos": ds.fonte_eventos,
+            "leitura": ds.leitura,
+            "qtd_mes0": ds.qtd_mes0,
+            "avisos": ds.avisos,
+        }
+        with open(os.path.join(tmp, ARQ_META), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(tmp, destino)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ----------------------
+# Abertura (cada processo)
+# ----------------------
+def _abrir_frame(pasta: str, colunas: list) -> pd.DataFrame:
+    dados = {}
+    for c in colunas:
+        if c["tipo"] == "categoria":
+            categorias = feather.read_feather(os.path.join(pasta, f"{c['arquivo']}.cat.arrow"))["c"]
+            codigos = _mapear(pasta, c["arquivo"])
+            # códigos gravados por gravar_preparado (já válidos e no menor int): sem validação nem cópia
+            cat = pd.Categorical.from_codes(codigos, categories=pd.Index(categorias).rename(None), validate=False)
+            if not np.shares_memory(cat.codes, codigos):
+                print(f"[painel] aviso: códigos de {c['nome']} copiados para este processo (não compartilhados).")
+            dados[c["nome"]] = cat
+        elif c["tipo"] == "array":
+            dados[c["nome"]] = _mapear(pasta, c["arquivo"])
+        else:
+            dados[c["nome"]] = feather.read_feather(os.path.join(pasta, f"{c['arquivo']}.arrow"))["c"].to_numpy()
+    return pd.DataFrame(dados, copy=False)  # colunas continuam apontando para os arquivos mapeados
+
+def abrir_preparado(pasta: str) -> DadosPreparados:
+    """DadosPreparados sobre os arquivos mapeados de `pasta` (mesma interface do carregado em memória)."""
+    with open(os.path.join(pasta, ARQ_META), encoding="utf-8") as f:
+        meta = json.load(f)
+    dados = _abrir_frame(pasta, meta["colunas"])
+    dados_analise_base = dados.iloc[:meta["linhas_validas"]]
+
+    chaves = feather.read_feather(os.path.join(pasta, "series_chaves.arrow"))
+    faixas = _mapear(pasta, "series_faixas").tolist()
+    series = IndiceSeries(
+        datas=_mapear(pasta, "series_datas"),
+        saldos=_mapear(pasta, "series_saldos"),
+        posicoes={k: (a, b) for k, (a, b) in zip(zip(chaves["conta"].tolist(), chaves["co"].tolist()), faixas)},
+    )
+
+    grupos = GruposEventos(*(_mapear(pasta, f"eventos_{campo}") for campo in ("ids", "chaves", "inicio", "posicoes")))
+
+    surg = feather.read_feather(os.path.join(pasta, "surgiu.arrow"))
+    zerou = feather.read_feather(os.path.join(pasta, "zerou.arrow"))
+    return DadosPreparados(
+        arquivos=tuple(meta["arquivos"]),
+        mtime=meta["mtime"],
+        dados=dados,
+        dados_analise_base=dados_analise_base,
+        dados_tabela=dados,
+        nm=feather.read_feather(os.path.join(pasta, "nm.arrow")),
+        surg=surg,
+        zerou=zerou,
+        datas_opts=[pd.Timestamp(d) for d in meta["datas_opts"]],
+        series=series,
+        eventos=IndiceEventos(base=dados_analise_base, colunas=meta["eventos_colunas"], grupos=grupos),
+        catalogo=construir_catalogo_contas(dados),
+        fonte_eventos=meta["fonte_eventos"],
+        leitura=meta["leitura"],
+        qtd_mes0=meta["qtd_mes0"],
+        avisos=meta["avisos"],
+        compartilhado=pasta,
+    )
+
+
+# ----------------------
+# Preparo único entre processos
+# ----------------------
+class TravaArquivo:
+    """Trava entre processos por criação exclusiva de arquivo (funciona igual no Windows e no Linux).
+    Enquanto a trava está com este processo, uma thread renova o mtime do arquivo a cada TRAVA_SEGUNDOS / 4:
+    preparo longo (Excel grande) não vira "trava velha"; só perde a trava quem morreu e parou de renovar."""
+
+    def __init__(self, caminho: str, espera: float = 0.2):
+        self.caminho = caminho
+        self.espera = espera
+        self._fim = threading.Event()
+        self._pulso = None
+
+    def _renovar(self):
+        while not self._fim.wait(TRAVA_SEGUNDOS / 4):
+            try:
+                os.utime(self.caminho)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        while True:
+            try:
+                fd = os.open(self.caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                self._fim.clear()
+                self._pulso = threading.Thread(target=self._renovar, name="painel-trava", daemon=True)
+                self._pulso.start()
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.caminho) > TRAVA_SEGUNDOS:
+                        os.remove(self.caminho)  # dono morreu no meio do preparo
+                        continue
+                except OSError:
+                    continue  # acabou de ser liberada
+                time.sleep(self.espera)
+
+    def __exit__(self, *exc):
+        self._fim.set()
+        if self._pulso is not None:
+            self._pulso.join()
+            self._pulso = None
+        try:
+            os.remove(self.caminho)
+        except OSError:
+            pass
+        return False
+
+def _completo(pasta: str) -> bool:
+    return os.path.exists(os.path.join(pasta, ARQ_META))
+
+def preparar_compartilhado(arquivos) -> str:
+    """Pasta dos dados preparados da versão atual de `arquivos`; prepara e grava se ainda não existir.
+    Com vários processos ao mesmo tempo, só 1 lê o Excel/cache e prepara; os demais esperam a trava."""
+    arquivos = [arquivos] if isinstance(arquivos, str) else list(arquivos)
+    pasta = pasta_preparado(arquivos, assinatura_arquivos(arquivos))
+    if _completo(pasta):
+        return pasta
+    os.makedirs(os.path.dirname(pasta), exist_ok=True)
+    with TravaArquivo(pasta + ".lock"):
+        if not _completo(pasta):  # outro processo pode ter preparado enquanto esperávamos
+            t0 = time.perf_counter()
+            ds = carregar_dados_preparados(arquivos)
+            gravar_preparado(ds, pasta)
+            del ds
+            print(f"[painel] dados preparados gravados para os processos em {time.perf_counter() - t0:.2f}s "
+                  f"({os.path.basename(pasta)})")
+            _limpar_preparados_antigos(pasta)
+    return pasta
+
+def carregar_compartilhado(arquivos) -> DadosPreparados:
+    """Mesmo resultado de carregar_dados_preparados, lido dos arquivos mapeados compartilhados."""
+    pasta = preparar_compartilhado(arquivos)
+    t0 = time.perf_counter()
+    ds = abrir_preparado(pasta)
+    print(f"[painel] dados compartilhados abertos em {time.perf_counter() - t0:.2f}s (processo {os.getpid()})")
+    return ds
+
+def _limpar_preparados_antigos(atual: str):
+    """Apaga versões anteriores (mapeada por outro processo no Windows: fica p/ a próxima)."""
+    for pasta in glob.glob(os.path.join(os.path.dirname(atual), "preparado_*")):
+        if pasta != atual and not pasta.endswith((".lock", ".tmp")):
+            shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,1158 @@
+# painel_dados.py
+# -*- coding: utf-8 -*-
+# Camada de dados do painel (sem Streamlit):
+# - Leitura das 3 planilhas do .xlsx (DADOS, SALDO-SURGIU, SALDO-ZEROU): só as colunas usadas,
+#   com tipo explícito, em blocos (openpyxl read-only), 1 aba após a outra.
+# - Cache colunar (Arrow IPC/Feather, sem compressão -> memory-map) gravado ao lado do .xlsx.
+#   Chave do cache: caminho + tamanho + mtime; se só o mtime/caminho mudou, o hash do conteúdo decide.
+# - Se a pasta não aceitar escrita, segue sem cache (lê direto do Excel).
+# - Preparação (tipos, DATA, mês válido, nomes nos eventos) feita 1x por versão do arquivo.
+# - Eventos SURGIU/ZEROU: das abas do .xlsx ou detectados direto de DADOS (abas opcionais).
+# - Modo "todos": consolida todos os .xlsx da pasta (1 por exercício), lidos em processos paralelos;
+#   cada arquivo tem seu próprio cache, então só o arquivo alterado é relido.
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from painel_metricas import medir
+
+# ----------------------
+# Constantes
+# ----------------------
+# DADOS (nomes da sua planilha)
+COL_ID_CONTA = "ID_CONTA_CONTABIL"
+COL_NO_CONTA = "NO_CONTA_CONTABIL"
+COL_ANO = "ID_ANO_LANC"
+COL_MES = "ID_MES_LANC"
+COL_DATA = "DATA"  # só p/ meses válidos
+COL_SALDO = "SALDORCONTACONTBIL"
+COL_MES_TXT = "SG_MES_COMPLETO"
+
+# Tipificação
+COL_ID_TP = "ID_TP_CCOR"
+COL_CO_TP = "CO_TP_CCOR"
+COL_NO_TP = "NO_TP_CCOR"
+
+# EVENTOS
+EV_ANT_ANO = "ANO_ANTERIOR"
+EV_ANT_MES = "MES_ANTERIOR"
+EV_SEG_ANO = "ANO_SEGUINTE"
+EV_SEG_MES = "MES_SEGUINTE"
+EV_SALDO_ANT = "SALDO_ANTERIOR"  # só em SURGIU
+EV_SITUACAO = "SITUACAO"          # só nos eventos detectados: lado sem saldo era "zero" ou "vazio"
+
+ABA_DADOS = "DADOS"
+ABA_SURGIU = "SALDO-SURGIU"
+ABA_ZEROU = "SALDO-ZEROU"
+ABAS = (ABA_DADOS, ABA_SURGIU, ABA_ZEROU)
+
+PASTA_CACHE = ".painel_cache"
+VERSAO_CACHE = 3  # incrementar quando mudar o formato/conteúdo gravado no cache
+ARQ_META = "meta.json"
+
+# Fonte dos eventos: "auto" (abas se existirem, senão detecta), "planilha" ou "detectar"
+FONTE_EVENTOS = os.environ.get("PAINEL_EVENTOS", "auto").strip().lower()
+# Arquivos lidos: "unico" (1º .xlsx da pasta) ou "todos" (consolida todos os .xlsx da pasta)
+MODO_ARQUIVOS = os.environ.get("PAINEL_ARQUIVOS", "unico").strip().lower()
+COL_ORDEM_ARQ = "_ORDEM_ARQ"  # auxiliar da consolidação (não fica no resultado)
+
+
+# Colunas efetivamente usadas pelo painel (o resto da planilha nem é convertido)
+COLUNAS_ABA = {
+    ABA_DADOS: {
+        COL_ID_CONTA: "numero", COL_NO_CONTA: "texto", COL_ANO: "numero", COL_MES: "numero",
+        COL_MES_TXT: "texto", COL_ID_TP: "numero", COL_CO_TP: "numero", COL_NO_TP: "texto",
+        COL_SALDO: "numero",
+    },
+    ABA_SURGIU: {
+        COL_ID_CONTA: "numero", COL_CO_TP: "numero", EV_ANT_ANO: "numero", EV_ANT_MES: "numero",
+        EV_SEG_ANO: "numero", EV_SEG_MES: "numero", EV_SALDO_ANT: "numero", EV_SITUACAO: "texto",
+    },
+}
+COLUNAS_ABA[ABA_ZEROU] = COLUNAS_ABA[ABA_SURGIU]
+LINHAS_POR_BLOCO = 50_000
+
+
+# ----------------------
+# Leitura do Excel
+# ----------------------
+def _tipar_coluna(valores: list, tipo: str):
+    """Converte a coluna de um bloco no tipo declarado, com os mesmos dtypes do pd.read_excel: só inteiros ->
+    int64; com vazio ou decimal -> float64. Número com texto no meio fica como objeto (não vira NaN em silêncio)."""
+    if tipo == "numero":
+        if valores and all(type(v) is int for v in valores):
+            return np.array(valores, dtype="int64")
+        try:
+            return np.array(valores, dtype="float64")  # None -> NaN
+        except (TypeError, ValueError):
+            serie = pd.Series(valores, dtype=object)
+            try:
+                num = pd.to_numeric(serie, errors="coerce")
+            except (TypeError, ValueError):  # ex.: datas
+                return serie.to_numpy()
+            return num.to_numpy() if num.isna().sum() == serie.isna().sum() else serie.to_numpy()
+    return np.array(valores, dtype=object)
+
+def _bloco_para_frame(linhas: list, nomes: list, tipos: list) -> pd.DataFrame:
+    colunas = list(zip(*linhas)) if linhas else [()] * len(nomes)
+    return pd.DataFrame({n: _tipar_coluna(list(c), t) for n, c, t in zip(nomes, colunas, tipos)})
+
+def _ler_aba(wb, aba: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> pd.DataFrame:
+    """1 aba do workbook já aberto (read-only), só com as colunas de COLUNAS_ABA, convertida em blocos.
+    O openpyxl analisa todas as células do arquivo de qualquer jeito: a seleção poupa memória, não tempo."""
+    if aba not in wb.sheetnames:
+        return pd.DataFrame()
+    linhas = wb[aba].iter_rows(values_only=True)
+    cabecalho = [str(h).strip() if h is not None else "" for h in next(linhas, ())]
+    esperadas = COLUNAS_ABA.get(aba, {})
+    idx = [i for i, h in enumerate(cabecalho) if h in esperadas]
+    nomes = [cabecalho[i] for i in idx]
+    tipos = [esperadas[n] for n in nomes]
+
+    partes, bloco = [], []
+    for linha in linhas:
+        valores = tuple(linha[i] if i < len(linha) else None for i in idx)
+        if any(v is not None for v in valores):  # linhas totalmente vazias não entram
+            bloco.append(valores)
+        if len(bloco) >= linhas_por_bloco:
+            partes.append(_bloco_para_frame(bloco, nomes, tipos))
+            bloco = []
+    if bloco or not partes:
+        partes.append(_bloco_para_frame(bloco, nomes, tipos))
+    return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+def ler_aba_excel(file_path: str, aba: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> pd.DataFrame:
+    """Lê 1 aba em modo read-only, só com as colunas de COLUNAS_ABA."""
+    from openpyxl import load_workbook  # dependência do pandas p/ .xlsx
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return _ler_aba(wb, aba, linhas_por_bloco)
+    finally:
+        wb.close()
+
+def ler_planilhas_excel(file_path: str, relatorio: list = None):
+    """Lê as 3 planilhas direto do Excel (caminho lento): 1 abertura do arquivo, abas uma após a outra
+    (o openpyxl é Python puro: threads só disputariam o GIL). Vários arquivos: processos (modo "todos").
+    Abas de evento ausentes viram DataFrame vazio (eventos detectados a partir de DADOS).
+    `relatorio` (lista) recebe tempo e linhas de cada aba."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        frames = []
+        for aba in ABAS:
+            t0 = time.perf_counter()
+            df = _ler_aba(wb, aba)
+            frames.append(df)
+            if relatorio is not None:
+                relatorio.append({"aba": aba, "origem": "excel", "linhas": len(df), "colunas": df.shape[1],
+                                  "segundos": round(time.perf_counter() - t0, 3)})
+    finally:
+        wb.close()
+    return tuple(frames)
+
+
+# ----------------------
+# Cache colunar ao lado do .xlsx
+# ----------------------
+def pasta_cache(file_path: str) -> str:
+    """Ex.: C:/painel/base.xlsx -> C:/painel/.painel_cache/base.xlsx/"""
+    pasta, nome = os.path.split(os.path.abspath(file_path))
+    return os.path.join(pasta, PASTA_CACHE, nome)
+
+def hash_arquivo(file_path: str, bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+def _assinatura(file_path: str) -> dict:
+    info = os.stat(file_path)
+    return {
+        "versao": VERSAO_CACHE,
+        "arquivo": os.path.abspath(file_path),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+    }
+
+def _arq_aba(pasta: str, aba: str) -> str:
+    return os.path.join(pasta, f"{aba}.arrow")
+
+def _gravar_atomico(destino: str, escrever):
+    """Grava em arquivo temporário e troca de uma vez (leitores nunca veem arquivo pela metade)."""
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    try:
+        escrever(tmp)
+        os.replace(tmp, destino)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _ler_meta(pasta: str):
+    try:
+        with open(os.path.join(pasta, ARQ_META), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_meta(pasta: str, meta: dict):
+    def escrever(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+    _gravar_atomico(os.path.join(pasta, ARQ_META), escrever)
+
+def assinatura_arquivos(arquivos) -> tuple:
+    """((caminho, tamanho, mtime_ns), ...): muda quando algum arquivo é salvo."""
+    assinatura = []
+    for arq in arquivos:
+        info = os.stat(arq)
+        assinatura.append((arq, info.st_size, info.st_mtime_ns))
+    return tuple(assinatura)
+
+def cache_valido(file_path: str) -> bool:
+    """True se o cache colunar corresponde ao conteúdo atual do .xlsx."""
+    pasta = pasta_cache(file_path)
+    meta = _ler_meta(pasta)
+    if not meta or meta.get("versao") != VERSAO_CACHE:
+        return False
+    if not all(os.path.exists(_arq_aba(pasta, aba)) for aba in ABAS):
+        return False
+    atual = _assinatura(file_path)
+    if all(meta.get(k) == atual[k] for k in ("arquivo", "tamanho", "mtime_ns")):
+        return True
+    # Arquivo "tocado", copiado ou movido: só o conteúdo decide.
+    if meta.get("tamanho") != atual["tamanho"] or meta.get("sha256") != hash_arquivo(file_path):
+        return False
+    try:
+        _gravar_meta(pasta, {**atual, "sha256": meta["sha256"]})
+    except OSError:
+        pass
+    return True
+
+def ler_cache(file_path: str):
+    """Lê as 3 planilhas do cache (memory-mapped; Arrow sem compressão)."""
+    pasta = pasta_cache(file_path)
+    return tuple(feather.read_feather(_arq_aba(pasta, aba), memory_map=True) for aba in ABAS)
+
+def gravar_cache(file_path: str, frames) -> bool:
+    """Grava o cache colunar. Retorna False (sem erro) se a pasta não aceitar escrita
+    ou se alguma coluna não tiver representação em Arrow (ex.: tipos misturados)."""
+    pasta = pasta_cache(file_path)
+    meta = {**_assinatura(file_path), "sha256": hash_arquivo(file_path)}
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        if os.path.exists(os.path.join(pasta, ARQ_META)):
+            os.remove(os.path.join(pasta, ARQ_META))  # invalida o cache antigo antes de sobrescrever
+        for aba, df in zip(ABAS, frames):
+            _gravar_atomico(
+                _arq_aba(pasta, aba),
+                lambda tmp, df=df: feather.write_feather(df, tmp, compression="uncompressed"),
+            )
+        _gravar_meta(pasta, meta)  # por último: meta presente == cache completo
+    except (OSError, ValueError, TypeError) as exc:  # pyarrow.ArrowException herda de ValueError/TypeError
+        print(f"[painel] cache colunar não gravado para {os.path.basename(file_path)}: {exc}")
+        return False
+    return True
+
+def carregar_planilhas(file_path: str, relatorio: list = None):
+    """(dados, surg, zerou): do cache colunar quando válido; senão do Excel (e regrava o cache).
+    `relatorio` (lista) recebe, por aba: origem (cache/excel), linhas, colunas e segundos."""
+    relatorio = [] if relatorio is None else relatorio
+    inicio = len(relatorio)
+    frames = None
+    if cache_valido(file_path):
+        try:
+            t0 = time.perf_counter()
+            frames = ler_cache(file_path)
+            seg = (time.perf_counter() - t0) / len(ABAS)
+            for aba, df in zip(ABAS, frames):
+                relatorio.append({"aba": aba, "origem": "cache", "linhas": len(df), "colunas": df.shape[1], "segundos": round(seg, 3)})
+        except (OSError, ValueError):
+            frames = None  # cache corrompido -> relê o Excel
+    if frames is None:
+        frames = ler_planilhas_excel(file_path, relatorio)
+        gravar_cache(file_path, frames)
+    for r in relatorio[inicio:]:
+        print(f"[painel] {os.path.basename(file_path)} / {r['aba']}: {r['linhas']} linhas, "
+              f"{r['colunas']} colunas em {r['segundos']:.2f}s ({r['origem']})")
+    return frames
+
+
+# ----------------------
+# Vários arquivos (.xlsx por exercício)
+# ----------------------
+def listar_xlsx(pasta: str) -> list:
+    """Todos os .xlsx da pasta (sem temporários '~$' do Excel), do mais antigo ao mais recente (mtime)."""
+    nomes = [f for f in os.listdir(pasta) if f.lower().endswith(".xlsx") and not f.startswith("~$")]
+    caminhos = [os.path.join(pasta, f) for f in nomes]
+    return sorted(caminhos, key=lambda c: (os.path.getmtime(c), os.path.basename(c)))
+
+def arquivos_do_painel(pasta: str, modo: str = MODO_ARQUIVOS) -> list:
+    """.xlsx que o painel lê: "todos" (consolidados) ou "unico" (1º em ordem alfabética)."""
+    if modo == "todos":
+        return listar_xlsx(pasta)
+    nomes = sorted(f for f in os.listdir(pasta) if f.lower().endswith(".xlsx") and not f.startswith("~$"))
+    return [os.path.join(pasta, nomes[0])] if nomes else []
+
+def _ler_para_cache(file_path: str):
+    """Roda em processo separado: lê o Excel e grava o cache colunar.
+    Devolve (relatório, frames) — frames só se o cache não pôde ser gravado."""
+    relatorio = []
+    frames = ler_planilhas_excel(file_path, relatorio)
+    return relatorio, (None if gravar_cache(file_path, frames) else frames)
+
+def carregar_varias_planilhas(arquivos, relatorio: list = None, max_processos: int = None):
+    """Lista de (dados, surg, zerou), 1 por arquivo, na ordem recebida.
+    Só os arquivos sem cache válido são lidos do Excel, em paralelo (1 processo por arquivo)."""
+    relatorio = [] if relatorio is None else relatorio
+    pendentes = [a for a in arquivos if not cache_valido(a)]
+    lidos = {}
+    if len(pendentes) > 1:
+        n = min(len(pendentes), max_processos or os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=n) as pool:
+                for arq, (rel, frames) in zip(pendentes, pool.map(_ler_para_cache, pendentes)):
+                    relatorio.extend({**r, "arquivo": os.path.basename(arq)} for r in rel)
+                    lidos[arq] = ler_cache(arq) if frames is None else frames
+        except (OSError, BrokenProcessPool) as exc:
+            print(f"[painel] leitura paralela indisponível ({exc}); lendo em sequência.")
+    resultado = []
+    for arq in arquivos:
+        if arq in lidos:
+            resultado.append(lidos[arq])
+            continue
+        rel = []
+        resultado.append(carregar_planilhas(arq, rel))
+        relatorio.extend({**r, "arquivo": os.path.basename(arq)} for r in rel)
+    return resultado
+
+def consolidar_planilhas(por_arquivo):
+    """Junta (dados, surg, zerou) de vários arquivos (do mais antigo ao mais recente).
+    DADOS: se (Conta, CO_TP, ano, mês) aparece em mais de um arquivo, valem só as linhas do mais recente.
+    Eventos: concatenados sem linhas repetidas."""
+    if len(por_arquivo) == 1:
+        return por_arquivo[0]
+    partes = [d.assign(**{COL_ORDEM_ARQ: i}) for i, (d, _, _) in enumerate(por_arquivo)]
+    dados = pd.concat(partes, ignore_index=True)
+    chave = [c for c in (COL_ID_CONTA, COL_CO_TP, COL_ANO, COL_MES) if c in dados.columns]
+    if chave:
+        mais_recente = dados.groupby(chave, dropna=False, sort=False)[COL_ORDEM_ARQ].transform("max")
+        dados = dados[dados[COL_ORDEM_ARQ] == mais_recente].reset_index(drop=True)
+    dados = dados.drop(columns=[COL_ORDEM_ARQ])
+
+    def juntar_eventos(frames):
+        frames = [f for f in frames if not f.columns.empty]
+        return pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True) if frames else pd.DataFrame()
+    surg = juntar_eventos([s for _, s, _ in por_arquivo])
+    zerou = juntar_eventos([z for _, _, z in por_arquivo])
+    return dados, surg, zerou
+
+
+# ----------------------
+# Formatação BRL
+# ----------------------
+def format_brl(value) -> str:
+    """Formata números como Real: R$ 1.234.567,89 (trata NaN/None/inf)."""
+    # Trata valores nulos/NaN/inf logo de cara
+    if value is None:
+        return "-"
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return "-"
+    if np.isnan(x) or np.isinf(x):
+        return "-"
+    neg = x < 0
+    x = abs(x)
+    inteiro, decimal = divmod(int(round(x * 100)), 100)
+    inteiro_str = f"{int(inteiro):,}".replace(",", ".")
+    decimal_str = f"{int(decimal):02d}"
+    s = f"R$ {inteiro_str},{decimal_str}"
+    return f"-{s}" if neg else s
+
+# Pedaços prontos: cada grupo de milhar vira 1 índice numa tabela (sem formatar número a número)
+_TOPO = np.array([f"R$ {i}" for i in range(1000)] + [f"-R$ {i}" for i in range(1000)], dtype=object)
+_GRUPO_PAD = np.array([f".{i:03d}" for i in range(1000)], dtype=object)
+_CENTAVOS = np.array([f",{i:02d}" for i in range(100)], dtype=object)
+_LIMITE_VETOR = 1e15  # acima disso centavos não cabem com folga em int64 -> caminho escalar
+
+def _para_float(valores: np.ndarray) -> np.ndarray:
+    """Mesma conversão do format_brl (float(v); falha -> NaN)."""
+    if valores.dtype.kind in "biuf":
+        return valores.astype("float64", copy=False)
+    def conv(v):
+        if v is None:
+            return np.nan
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return np.nan
+    return np.fromiter((conv(v) for v in valores), dtype="float64", count=len(valores))
+
+def _format_brl_1d(valores: np.ndarray) -> np.ndarray:
+    x = _para_float(valores)
+    out = np.full(x.shape, "-", dtype=object)
+    ok = np.isfinite(x)
+    grande = ok & (np.abs(x) >= _LIMITE_VETOR)
+    if grande.any():
+        out[grande] = [format_brl(v) for v in x[grande]]
+        ok &= ~grande
+    if not ok.any():
+        return out
+    xv = x[ok]
+    inteiro, decimal = np.divmod(np.rint(np.abs(xv) * 100).astype(np.int64), 100)
+    neg = (xv < 0).astype(np.int64)
+    txt = np.empty(xv.shape, dtype=object)
+    # Partição por quantidade de grupos de milhar: só as concatenações necessárias, sem np.where
+    n_grupos = np.ones(xv.shape, dtype=np.int64)
+    limite = 1000
+    while (inteiro >= limite).any():
+        n_grupos += inteiro >= limite
+        limite *= 1000
+    for ng in np.unique(n_grupos):
+        sel = n_grupos == ng
+        v = inteiro[sel]
+        base = 1000 ** (int(ng) - 1)
+        parte = _TOPO[v // base + 1000 * neg[sel]]
+        for k in range(int(ng) - 2, -1, -1):
+            base = 1000 ** k
+            parte = parte + _GRUPO_PAD[(v // base) % 1000]
+        txt[sel] = parte + _CENTAVOS[decimal[sel]]
+    out[ok] = txt
+    return out
+
+def format_brl_vetorizado(valores):
+    """format_brl em lote (mesma saída, inclusive '-' p/ NaN/inf).
+    Series -> Series, DataFrame -> DataFrame, array (qualquer forma) -> array de str."""
+    with medir("formatacao"):
+        if isinstance(valores, pd.DataFrame):
+            arr = valores.to_numpy()
+            return pd.DataFrame(_format_brl_1d(arr.ravel()).reshape(arr.shape),
+                                index=valores.index, columns=valores.columns)
+        if isinstance(valores, pd.Series):
+            return pd.Series(_format_brl_1d(valores.to_numpy()), index=valores.index, name=valores.name)
+        arr = np.asarray(valores)
+        return _format_brl_1d(arr.ravel()).reshape(arr.shape)
+
+# ----------------------
+# Rótulos (Conta | Tipo)
+# ----------------------
+def tipo_rotulo(co, no) -> str:
+    if pd.isna(co) and pd.isna(no):
+        return "(tipo desconhecido)"
+    if pd.isna(no):
+        return f"{int(co)}"
+    if pd.isna(co):
+        return str(no)
+    return f"{int(co)} - {no}"
+
+def conta_tipo_label(conta, co, no) -> str:
+    return f"{conta} | {tipo_rotulo(co, no)}"
+
+def _rotular_por_combinacao(colunas, rotular) -> pd.Categorical:
+    """Chama `rotular` 1x por combinação única das colunas (NaN é combinação válida)
+    e devolve um Categorical alinhado às linhas, com categorias em ordem alfabética."""
+    chave = np.zeros(len(colunas[0]), dtype=np.int64)
+    for col in colunas:
+        cod, uniq = pd.factorize(col, use_na_sentinel=False)
+        chave, _ = pd.factorize(chave * (len(uniq) + 1) + cod)
+    _, primeira, inverso = np.unique(chave, return_index=True, return_inverse=True)
+    valores = [pd.Series(col).iloc[primeira].tolist() for col in colunas]
+    rotulos = np.array([rotular(*t) for t in zip(*valores)], dtype=object)
+    categorias, cod_rotulo = np.unique(rotulos, return_inverse=True)
+    return pd.Categorical.from_codes(cod_rotulo[inverso], categories=categorias)
+
+def rotulos_tipo(co: pd.Series, no: pd.Series) -> pd.Categorical:
+    """tipo_rotulo vetorizado (mesmo tratamento de NaN)."""
+    return _rotular_por_combinacao([co, no], tipo_rotulo)
+
+def rotulos_conta_tipo(conta: pd.Series, co: pd.Series, no: pd.Series) -> pd.Categorical:
+    """conta_tipo_label vetorizado (mesmo tratamento de NaN)."""
+    return _rotular_por_combinacao([conta, co, no], conta_tipo_label)
+
+# ----------------------
+# Preparação
+# ----------------------
+def month_label(dt: pd.Timestamp) -> str:
+    """Ex.: 2025-08-01 -> 'Ago/2025'"""
+    meses = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
+    return f"{meses[dt.month-1]}/{dt.year}"
+
+def build_month_slider_options(df_mes_valido: pd.DataFrame):
+    """Retorna (lista_de_datas, lista_de_labels). Usa apenas meses válidos (DATA)."""
+    if df_mes_valido[COL_DATA].notna().any():
+        datas = sorted(pd.to_datetime(df_mes_valido[COL_DATA].dropna().unique()).tolist())
+        labels = [month_label(d) for d in datas]
+        return datas, labels
+    return [], []
+
+def name_map(dados: pd.DataFrame) -> pd.DataFrame:
+    return (
+        dados[[COL_ID_CONTA, COL_NO_CONTA]]
+        .dropna()
+        .drop_duplicates(subset=[COL_ID_CONTA], keep="last")
+    )
+
+def enrich_event_sheet(event_df: pd.DataFrame, nm: pd.DataFrame) -> pd.DataFrame:
+    if COL_ID_CONTA not in event_df.columns:
+        return event_df.copy()
+    return event_df.merge(nm, on=COL_ID_CONTA, how="left")
+
+def ensure_datetime_and_flags(dados: pd.DataFrame) -> pd.DataFrame:
+    """Cria MES_VALIDO (1..12) e DATA só para meses válidos; mantém mês 0 nas tabelas."""
+    y = pd.to_numeric(dados.get(COL_ANO, pd.Series(dtype="float")), errors="coerce")
+    m = pd.to_numeric(dados.get(COL_MES, pd.Series(dtype="float")), errors="coerce")
+    dados["MES_VALIDO"] = m.between(1, 12)
+    dados[COL_DATA] = pd.NaT
+    mask_valid = y.notna() & m.notna() & dados["MES_VALIDO"]
+    if mask_valid.any():
+        yy = y[mask_valid].astype(int)
+        mm = m[mask_valid].astype(int)
+        dados.loc[mask_valid, COL_DATA] = pd.to_datetime(dict(year=yy, month=mm, day=1), errors="coerce")
+    return dados
+
+# Representação compacta: nomes/textos repetidos viram categoria; códigos inteiros usam o menor int
+COLS_CATEGORIA = [COL_NO_CONTA, COL_NO_TP, COL_MES_TXT]
+COLS_INTEIRAS = [COL_ID_CONTA, COL_ANO, COL_MES, COL_ID_TP, COL_CO_TP]
+
+def compactar_dados(dados: pd.DataFrame) -> pd.DataFrame:
+    """Converte (in-place) para tipos compactos sem mudar valores:
+    - textos repetidos -> category;
+    - colunas inteiras sem vazio -> menor int (com vazio continuam float, p/ manter NaN);
+    - saldo -> float64 arredondado a centavos (valor fixo em 2 casas; int de centavos ocuparia os
+      mesmos 8 bytes e perderia o NaN de 'sem valor')."""
+    for col in COLS_CATEGORIA:
+        if col in dados.columns and not isinstance(dados[col].dtype, pd.CategoricalDtype):
+            try:
+                dados[col] = dados[col].astype("category")
+            except TypeError:
+                pass  # tipos misturados sem ordem: fica como está
+    for col in COLS_INTEIRAS:
+        if col not in dados.columns:
+            continue
+        num = pd.to_numeric(dados[col], errors="coerce")
+        if num.isna().sum() != dados[col].isna().sum():
+            continue  # havia texto na coluna: não mexe
+        if num.notna().all() and (num == np.floor(num)).all():
+            dados[col] = pd.to_numeric(num.astype("int64"), downcast="integer")
+        else:
+            dados[col] = num
+    if COL_SALDO in dados.columns:
+        dados[COL_SALDO] = pd.to_numeric(dados[COL_SALDO], errors="coerce").astype("float64").round(2)
+    return dados
+
+@dataclass(frozen=True)
+class IndiceSeries:
+    """Série mensal (soma por DATA) de cada par (Conta, CO_TP_CCOR) em arrays contíguos.
+    Os arrays ficam agrupados por par e ordenados por DATA dentro do par."""
+    datas: np.ndarray   # datetime64
+    saldos: np.ndarray  # float64
+    posicoes: dict      # (conta, co) -> (ini, fim) em datas/saldos
+
+    def serie(self, conta, co, inicio=None, fim=None) -> pd.DataFrame:
+        """DATA/SALDO do par no período [inicio, fim] (inclusivo). Dict + searchsorted."""
+        ini, fim_par = self.posicoes.get((conta, co), (0, 0))
+        datas = self.datas[ini:fim_par]
+        a = np.searchsorted(datas, np.datetime64(inicio), side="left") if inicio is not None else 0
+        b = np.searchsorted(datas, np.datetime64(fim), side="right") if fim is not None else len(datas)
+        return pd.DataFrame({COL_DATA: datas[a:b], COL_SALDO: self.saldos[ini:fim_par][a:b]})
+
+    def kpis(self, inicio=None, fim=None) -> pd.DataFrame:
+        """KPIs da Visão Geral (primeiro, saldo recente, pico, variação) de TODOS os pares no período.
+        Uma passada nos arrays: filtro de período + reduções por trecho contíguo (sem loop por par)."""
+        chaves = list(self.posicoes)
+        faixas = np.array([self.posicoes[k] for k in chaves], dtype=np.int64).reshape(-1, 2)
+        ids = np.repeat(np.arange(len(faixas)), faixas[:, 1] - faixas[:, 0])
+        manter = np.ones(len(ids), dtype=bool)
+        if inicio is not None:
+            manter &= self.datas >= np.datetime64(inicio)
+        if fim is not None:
+            manter &= self.datas <= np.datetime64(fim)
+        ids, saldos = ids[manter], self.saldos[manter]
+        inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.int64)
+        fins = np.r_[inicios[1:], len(ids)].astype(np.int64)
+        par = ids[inicios]
+        primeiro, ultimo = saldos[inicios], saldos[fins - 1]
+        return pd.DataFrame({
+            COL_NO_CONTA: [chaves[i][0] for i in par],
+            COL_CO_TP: [chaves[i][1] for i in par],
+            "Meses": fins - inicios,
+            "Primeiro": primeiro,
+            "Saldo Recente": ultimo,
+            "Pico": np.maximum.reduceat(saldos, inicios) if len(inicios) else np.array([], dtype="float64"),
+            "Variação": ultimo - primeiro,
+        })
+
+    def series_de(self, chaves, inicio=None, fim=None):
+        """Várias séries numa passada: (nº da série em `chaves`, datas, saldos), agrupados por série.
+        Só os dict lookups são por série; a coleta e o filtro de período são vetorizados."""
+        faixas = np.array([self.posicoes.get(k, (0, 0)) for k in chaves], dtype=np.int64).reshape(-1, 2)
+        tamanhos = faixas[:, 1] - faixas[:, 0]
+        ids = np.repeat(np.arange(len(faixas)), tamanhos)
+        # posição global = início da série + deslocamento dentro dela
+        desloc = np.arange(len(ids)) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+        pos = np.repeat(faixas[:, 0], tamanhos) + desloc
+        datas, saldos = self.datas[pos], self.saldos[pos]
+        manter = np.ones(len(pos), dtype=bool)
+        if inicio is not None:
+            manter &= datas >= np.datetime64(inicio)
+        if fim is not None:
+            manter &= datas <= np.datetime64(fim)
+        return ids[manter], datas[manter], saldos[manter]
+
+def construir_indice_series(dados_analise_base: pd.DataFrame) -> IndiceSeries:
+    """Agrupa 1x (Conta, CO_TP, DATA) e guarda as fronteiras de cada par."""
+    grp = (
+        dados_analise_base
+        .groupby([COL_NO_CONTA, COL_CO_TP, COL_DATA], sort=True, observed=True)[COL_SALDO]
+        .sum()
+    )
+    cod_conta, cod_co = grp.index.codes[0], grp.index.codes[1]
+    n = len(grp)
+    if n:
+        muda = np.ones(n, dtype=bool)
+        muda[1:] = (cod_conta[1:] != cod_conta[:-1]) | (cod_co[1:] != cod_co[:-1])
+        inicios = np.flatnonzero(muda)
+    else:
+        inicios = np.array([], dtype=np.int64)
+    fins = np.append(inicios[1:], n)
+    chaves = zip(grp.index.levels[0][cod_conta[inicios]].tolist(), grp.index.levels[1][cod_co[inicios]].tolist())
+    return IndiceSeries(
+        datas=grp.index.get_level_values(2).to_numpy(),
+        saldos=grp.to_numpy(dtype="float64"),
+        posicoes={k: (int(a), int(b)) for k, a, b in zip(chaves, inicios, fins)},
+    )
+
+@dataclass(frozen=True)
+class GruposEventos:
+    """(ID_CONTA, ano, mês) -> posições em `base`, em arrays ordenados (CSR): sem 1 array por chave,
+    mapeável em disco. Grupo i = posicoes[inicio[i]:inicio[i + 1]]."""
+    ids: np.ndarray       # ID_CONTA distintos, ordenados (float64)
+    chaves: np.ndarray    # int64 ordenado: índice do id * 10**6 + ano * 100 + mês
+    inicio: np.ndarray    # int64, len(chaves) + 1
+    posicoes: np.ndarray  # int64, iloc em base
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _chave(self, ids, anos, meses):
+        """Chave composta de cada (id, ano, mês); -1 = id desconhecido ou ano/mês inválido (NaN)."""
+        ids = np.asarray(ids, dtype="float64")
+        anos = np.asarray(anos, dtype="float64")
+        meses = np.asarray(meses, dtype="float64")
+        if not len(self.ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        i = np.searchsorted(self.ids, ids).clip(max=len(self.ids) - 1)
+        with np.errstate(invalid="ignore"):
+            ok = ((self.ids[i] == ids) & (anos == np.round(anos)) & (meses == np.round(meses))
+                  & (anos >= 0) & (anos < 10**4) & (meses >= 0) & (meses < 100))
+        return np.where(ok, i * 10**6 + np.nan_to_num(anos) * 100 + np.nan_to_num(meses), -1).astype(np.int64)
+
+    def localizar(self, ids, anos, meses):
+        """(repete, linhas) da expansão: evento k aparece 1x por posição do seu grupo; sem grupo = 1x com -1."""
+        chave = self._chave(ids, anos, meses)
+        if not len(self.chaves):
+            return np.arange(len(chave)), np.full(len(chave), -1, dtype=np.int64)
+        g = np.searchsorted(self.chaves, chave).clip(max=len(self.chaves) - 1)
+        achou = (chave >= 0) & (self.chaves[g] == chave)
+        ini = np.where(achou, self.inicio[g], 0)
+        tam = np.where(achou, self.inicio[np.minimum(g + 1, len(self.chaves))] - ini, 1)
+        repete = np.repeat(np.arange(len(chave)), tam)
+        desloc = np.arange(len(repete)) - np.repeat(np.cumsum(tam) - tam, tam)
+        linhas = np.where(achou[repete], self.posicoes[ini[repete] + desloc * achou[repete]], -1)
+        return repete, linhas.astype(np.int64)
+
+@dataclass(frozen=True)
+class IndiceEventos:
+    """Linhas de meses válidos agrupadas por (ID_CONTA, ano, mês): expansão de evento vira take, não merge."""
+    base: pd.DataFrame      # dados_analise_base (referência, sem cópia)
+    colunas: list           # colunas trazidas na expansão
+    grupos: GruposEventos   # (id_conta, ano, mes) -> posições (iloc) em base
+
+def construir_indice_eventos(dados_analise_base: pd.DataFrame) -> IndiceEventos:
+    cols = [COL_ID_CONTA, COL_CO_TP, COL_NO_TP, COL_ANO, COL_MES, COL_SALDO]
+    cols = [c for c in cols if c in dados_analise_base.columns]
+    ids = pd.to_numeric(dados_analise_base[COL_ID_CONTA], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    ids_u = np.unique(ids[~np.isnan(ids)])
+    grupos = GruposEventos(ids_u, np.array([], dtype=np.int64), np.zeros(1, dtype=np.int64),
+                           np.array([], dtype=np.int64))
+    chave = grupos._chave(ids, dados_analise_base[COL_ANO], dados_analise_base[COL_MES])
+    validas = np.flatnonzero(chave >= 0)
+    posicoes = validas[np.argsort(chave[validas], kind="stable")]  # estável: dentro do grupo, ordem original
+    chaves, inicio = np.unique(chave[posicoes], return_index=True)
+    grupos = GruposEventos(ids_u, chaves, np.r_[inicio, len(posicoes)].astype(np.int64), posicoes.astype(np.int64))
+    return IndiceEventos(base=dados_analise_base, colunas=cols, grupos=grupos)
+
+def eventos_a_expandir(event_df: pd.DataFrame, usar_mes: str, por_tipo: bool = False):
+    """(eventos com ANO_EVT/MES_EVT do mês usado no join, CO_TP de cada evento ou None).
+    por_tipo: só para eventos detectados em DADOS (1 por Conta+Tipo). Eventos das abas SALDO-SURGIU/ZEROU
+    expandem para todos os tipos da conta no mês, como sempre foi, mesmo quando a aba traz CO_TP_CCOR."""
+    keep_cols = [COL_ID_CONTA, COL_NO_CONTA, EV_SEG_ANO, EV_SEG_MES, EV_ANT_ANO, EV_ANT_MES, EV_SITUACAO]
+    keep_cols = [c for c in keep_cols if c in event_df.columns]
+    eventos = event_df[keep_cols]
+    # Eventos detectados já vêm por (Conta, Tipo): expande só o tipo do evento
+    co_evento = event_df[COL_CO_TP].to_numpy() if por_tipo and COL_CO_TP in event_df.columns else None
+
+    if usar_mes == "seguinte":
+        ycol, mcol = EV_SEG_ANO, EV_SEG_MES
+    else:
+        ycol, mcol = EV_ANT_ANO, EV_ANT_MES
+    return eventos.rename(columns={ycol: "ANO_EVT", mcol: "MES_EVT"}).reset_index(drop=True), co_evento
+
+# Necessária nas abas Surgiu/Zerou
+def expandir_eventos_por_tipo(event_df: pd.DataFrame, usar_mes: str, indice: IndiceEventos,
+                              por_tipo: bool = False) -> pd.DataFrame:
+    """
+    Retorna tabela expandida em (Conta, Tipo) para o período do evento.
+    usar_mes: "seguinte" -> join com (ANO_SEGUINTE, MES_SEGUINTE)
+              "anterior" -> join com (ANO_ANTERIOR, MES_ANTERIOR)
+    por_tipo: True só para eventos detectados em DADOS (expande apenas o CO_TP do evento)
+    Preserva SEMPRE as colunas de referência (ANTERIOR e SEGUINTE).
+    Mesmo resultado do left join com os meses válidos, via lookup no IndiceEventos.
+    """
+    eventos, co_evento = eventos_a_expandir(event_df, usar_mes, por_tipo)
+
+    # Para cada evento: posições das linhas (Conta, Tipo) daquele mês; -1 = sem linha (fica NaN, como no left join)
+    repete, linhas = indice.grupos.localizar(
+        pd.to_numeric(eventos[COL_ID_CONTA], errors="coerce"), eventos["ANO_EVT"], eventos["MES_EVT"])
+    if co_evento is not None and len(linhas) and len(indice.base):
+        co_linha = indice.base[COL_CO_TP].to_numpy()[linhas]
+        co_ev = co_evento[repete]
+        mesmo_tipo = (co_linha == co_ev) | (pd.isna(co_linha) & pd.isna(co_ev))
+        manter = (linhas < 0) | mesmo_tipo
+        repete, linhas = repete[manter], linhas[manter]
+
+    cols_dir = [c for c in indice.colunas if c != COL_ID_CONTA]
+    if len(indice.base):
+        direita = indice.base.iloc[np.maximum(linhas, 0)][cols_dir].reset_index(drop=True)
+        if (linhas < 0).any():
+            direita = direita.where(np.broadcast_to((linhas >= 0)[:, None], direita.shape))
+    else:
+        direita = pd.DataFrame(np.nan, index=pd.RangeIndex(len(linhas)), columns=cols_dir)
+    j = pd.concat([eventos.take(repete).reset_index(drop=True), direita], axis=1)
+    j["TIPO_ROT"] = rotulos_tipo(j[COL_CO_TP], j[COL_NO_TP])
+    return j
+
+# Colunas das tabelas Saldo Surgiu/Zerou: (coluna do valor, referências, nomes exibidos)
+COLUNAS_TABELA_EVENTO = {
+    "surgiu": ("VALOR_QUE_SURGIU", [EV_ANT_MES, EV_ANT_ANO, EV_SITUACAO],
+               {EV_ANT_MES: "Mês Anterior Ref.", EV_ANT_ANO: "Ano Anterior Ref.", EV_SITUACAO: "Antes (zero/vazio)"}),
+    "zerou": ("VALOR_QUE_ZEROU", [EV_SEG_MES, EV_SEG_ANO, EV_SITUACAO],
+              {EV_SEG_MES: "Mês Seguinte Ref.", EV_SEG_ANO: "Ano Seguinte Ref.", EV_SITUACAO: "Depois (zero/vazio)"}),
+}
+
+def texto_sem_separador(valores: pd.Series) -> pd.Series:
+    """Números inteiros como texto sem separador (2025 e não 2,025); vazio -> ""."""
+    num = pd.to_numeric(valores, errors="coerce")
+    inteiro = (num.notna() & (num == np.floor(num))).to_numpy()
+    texto = valores.astype(object).where(valores.notna(), "").astype(str).to_numpy(dtype=object)
+    texto[inteiro] = num[inteiro].astype("int64").astype(str).to_numpy(dtype=object)
+    return pd.Series(texto, index=valores.index, name=valores.name)
+
+def colunas_evento(exp: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    """Colunas da tabela Saldo Surgiu/Zerou ainda numéricas (valor e referências), com os nomes exibidos."""
+    col_valor, refs, nomes = COLUNAS_TABELA_EVENTO[tipo]
+    exp = exp.rename(columns={COL_SALDO: col_valor})
+    cols = [c for c in [COL_NO_CONTA, "TIPO_ROT", col_valor] + refs if c in exp.columns]
+    return exp[cols].rename(columns={COL_NO_CONTA: "Conta", "TIPO_ROT": "CO_TP_CCOR", **nomes})
+
+def tabela_eventos(exp: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    """Tabela exibida em Saldo Surgiu/Zerou a partir da expansão (valor em BRL, '-' se vazio).
+    Serve 1 período ou vários de uma vez (exportação): formata tudo numa passada."""
+    col_valor, refs, nomes = COLUNAS_TABELA_EVENTO[tipo]
+    tabela = colunas_evento(exp, tipo).copy()
+    tabela[col_valor] = format_brl_vetorizado(tabela[col_valor])
+    for c in (nomes[r] for r in refs[:2]):
+        if c in tabela.columns:
+            tabela[c] = texto_sem_separador(tabela[c])
+    return tabela
+
+# ----------------------
+# Catálogo de contas (busca dos seletores)
+# ----------------------
+def normalizar_busca(textos) -> pd.Series:
+    """Texto para busca: sem acento, minúsculo, espaços simples ("Ativo  Circulante" -> "ativo circulante")."""
+    s = pd.Series(list(textos), dtype="object").astype(str)
+    return (s.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.lower().str.split().str.join(" "))
+
+def _trigramas(textos: list):
+    """(código, nº do texto) de cada trigrama de cada texto ascii, vetorizado (sem loop por texto)."""
+    b = np.frombuffer("\n".join(textos).encode("ascii"), dtype=np.uint8).astype(np.int64)
+    if len(b) < 3:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    quebra = b == 10
+    codigos = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+    dentro = ~(quebra[:-2] | quebra[1:-1] | quebra[2:])  # não atravessa 2 textos
+    return codigos[dentro], np.cumsum(quebra)[:-2][dentro]
+
+@dataclass(frozen=True)
+class CatalogoContas:
+    """Contas distintas em ordem alfabética, com ID_CONTA, tipos (CO_TP) e índice de busca. 1x por versão dos dados.
+    Busca sem acento/caixa: trigramas para termos de 3+ letras, prefixo (busca binária) para os curtos
+    e prefixo do ID_CONTA quando só há números."""
+    nomes: np.ndarray           # NO_CONTA em ordem alfabética
+    posicao: dict               # NO_CONTA -> posição em nomes
+    ids: np.ndarray             # ID_CONTA(s) de cada conta, em texto ("" se não houver)
+    tipos: pd.DataFrame         # CO_TP/NO_TP distintos, agrupados por conta (coluna _POS) e ordenados por CO_TP
+    faixa_tipos: np.ndarray     # conta i -> tipos.iloc[faixa_tipos[i]:faixa_tipos[i + 1]]
+    normalizados: np.ndarray    # nomes sem acento/caixa
+    ordem_prefixo: np.ndarray   # posições ordenadas pelo nome normalizado
+    ids_ordenados: np.ndarray   # ID_CONTA em texto, ordenado (1 linha por ID)
+    conta_do_id: np.ndarray     # posição da conta de cada ids_ordenados
+    trigramas: np.ndarray       # códigos distintos de trigrama (ordenados)
+    faixa_trigramas: np.ndarray # trigramas[k] -> contas_trigrama[faixa[k]:faixa[k + 1]]
+    contas_trigrama: np.ndarray # posições das contas, ordenadas dentro de cada trigrama
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def rotulo(self, conta) -> str:
+        """'Conta · ID' para os seletores (quem busca pelo código vê o código)."""
+        pos = self.posicao.get(conta)
+        return f"{conta} · {self.ids[pos]}" if pos is not None and self.ids[pos] else str(conta)
+
+    def tipos_da_conta(self, conta) -> pd.DataFrame:
+        pos = self.posicao.get(conta)
+        if pos is None:
+            return self.tipos.iloc[0:0][[COL_CO_TP, COL_NO_TP]]
+        return self.tipos.iloc[self.faixa_tipos[pos]:self.faixa_tipos[pos + 1]][[COL_CO_TP, COL_NO_TP]]
+
+    def _com_trigramas(self, termo: str) -> np.ndarray:
+        """Contas que têm todos os trigramas do termo (candidatas; a sequência é conferida depois)."""
+        codigos, _ = _trigramas([termo])
+        contas = None
+        for cod in np.unique(codigos):
+            k = np.searchsorted(self.trigramas, cod)
+            if k == len(self.trigramas) or self.trigramas[k] != cod:
+                return np.array([], dtype=np.int64)
+            lista = self.contas_trigrama[self.faixa_trigramas[k]:self.faixa_trigramas[k + 1]]
+            contas = lista if contas is None else np.intersect1d(contas, lista, assume_unique=True)
+        return contas
+
+    def _com_prefixo(self, texto: str) -> np.ndarray:
+        ordenados = self.normalizados[self.ordem_prefixo]
+        a = np.searchsorted(ordenados, texto, side="left")
+        b = np.searchsorted(ordenados, texto + "\x7f", side="left")
+        return np.sort(self.ordem_prefixo[a:b])
+
+    def _com_id(self, digitos: str) -> np.ndarray:
+        a = np.searchsorted(self.ids_ordenados, digitos, side="left")
+        b = np.searchsorted(self.ids_ordenados, digitos + ":", side="left")  # ":" vem logo após "9"
+        return np.unique(self.conta_do_id[a:b])
+
+    def buscar(self, texto: str = "", limite: int = 50):
+        """(até `limite` contas que contêm todos os termos, total encontrado).
+        Ordem: nome igual, nome começa com a busca, alguma palavra começa com o 1º termo, demais; depois alfabética."""
+        q = normalizar_busca([texto]).iloc[0] if texto and texto.strip() else ""
+        if not q:
+            return self.nomes[:limite].tolist(), len(self.nomes)
+        termos = q.split()
+        if any(len(t) >= 3 for t in termos):
+            cand = None
+            for t in (t for t in termos if len(t) >= 3):
+                lista = self._com_trigramas(t)
+                cand = lista if cand is None else np.intersect1d(cand, lista, assume_unique=True)
+            cand = np.array([i for i in cand if all(t in self.normalizados[i] for t in termos)], dtype=np.int64)
+        else:
+            cand = self._com_prefixo(q)
+        digitos = q.translate(str.maketrans("", "", " .-/"))  # "1.1.1" busca o ID 111...
+        por_id = self._com_id(digitos) if digitos.isdigit() else np.array([], dtype=np.int64)
+        cand = np.union1d(cand, por_id)
+        if not len(cand):
+            return [], 0
+        nomes = self.normalizados[cand]
+        nivel = np.full(len(cand), 3, dtype=np.int8)
+        nivel[np.fromiter(((" " + n).find(" " + termos[0]) >= 0 for n in nomes), bool, len(nomes))] = 2
+        nivel[np.fromiter((n.startswith(q) for n in nomes), bool, len(nomes))] = 1
+        nivel[np.isin(cand, por_id)] = 1
+        nivel[nomes == q] = 0
+        escolhidos = cand[np.lexsort((cand, nivel))[:limite]]
+        return self.nomes[escolhidos].tolist(), len(cand)
+
+def construir_catalogo_contas(linhas: pd.DataFrame) -> CatalogoContas:
+    """Catálogo a partir de linhas com NO_CONTA, ID_CONTA, CO_TP, NO_TP (repetições à vontade)."""
+    cols = [c for c in (COL_NO_CONTA, COL_ID_CONTA, COL_CO_TP, COL_NO_TP) if c in linhas.columns]
+    base = linhas[cols].dropna(subset=[COL_NO_CONTA]).drop_duplicates()
+    nomes = np.array(sorted(base[COL_NO_CONTA].unique().tolist()), dtype=object)
+    pos = pd.Index(nomes).get_indexer(base[COL_NO_CONTA].astype(object))
+
+    tipos = (
+        pd.DataFrame({"_POS": pos, COL_CO_TP: base.get(COL_CO_TP), COL_NO_TP: base.get(COL_NO_TP)})
+        .drop_duplicates()
+        .sort_values(["_POS", COL_CO_TP], na_position="last", kind="stable")
+        .reset_index(drop=True)
+    )
+    faixa_tipos = np.searchsorted(tipos["_POS"].to_numpy(), np.arange(len(nomes) + 1))
+
+    if COL_ID_CONTA in base.columns:
+        ids = pd.DataFrame({"_POS": pos, "ID": pd.to_numeric(base[COL_ID_CONTA], errors="coerce")}).dropna()
+        ids = ids.assign(ID=ids["ID"].astype("int64").astype(str)).drop_duplicates().sort_values(["_POS", "ID"])
+    else:
+        ids = pd.DataFrame({"_POS": np.array([], dtype=np.int64), "ID": np.array([], dtype=object)})
+    ids_da_conta = np.full(len(nomes), "", dtype=object)
+    pos_id, txt_id = ids["_POS"].to_numpy(), ids["ID"].to_numpy(dtype=object)
+    inicios = np.flatnonzero(np.r_[True, pos_id[1:] != pos_id[:-1]]) if len(pos_id) else np.array([], dtype=np.int64)
+    for a, b in zip(inicios, np.r_[inicios[1:], len(pos_id)]):
+        ids_da_conta[pos_id[a]] = ", ".join(txt_id[a:b])
+    ids = ids.sort_values("ID", kind="stable")
+
+    normalizados = normalizar_busca(nomes).to_numpy(dtype=object)
+    codigos, conta = _trigramas(normalizados.tolist())
+    pares = np.sort(codigos * max(len(nomes), 1) + conta)  # (trigrama, conta) em ordem
+    pares = pares[np.r_[True, pares[1:] != pares[:-1]]] if len(pares) else pares
+    codigos, conta = np.divmod(pares, max(len(nomes), 1))
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]]) if len(codigos) else np.array([], dtype=np.int64)
+    trigramas = codigos[inicios]
+    return CatalogoContas(
+        nomes=nomes,
+        posicao={n: i for i, n in enumerate(nomes.tolist())},
+        ids=ids_da_conta,
+        tipos=tipos,
+        faixa_tipos=faixa_tipos,
+        normalizados=normalizados,
+        ordem_prefixo=np.argsort(normalizados, kind="stable"),
+        ids_ordenados=ids["ID"].to_numpy(dtype=object),
+        conta_do_id=ids["_POS"].to_numpy(dtype=np.int64),
+        trigramas=trigramas,
+        faixa_trigramas=np.append(inicios, len(codigos)),
+        contas_trigrama=conta,
+    )
+
+# ----------------------
+# Detecção de eventos (SURGIU/ZEROU) a partir de DADOS
+# ----------------------
+def detectar_eventos(dados_analise_base: pd.DataFrame):
+    """(surgiu, zerou) por série (ID_CONTA, CO_TP_CCOR), comparando meses consecutivos do calendário.
+    surgiu: mês t com saldo != 0 e mês t-1 zero ou vazio (sem registro).
+    zerou:  mês t com saldo != 0 e mês t+1 zero ou vazio.
+    Só compara dentro do intervalo de meses da base (antes do 1º / depois do último mês não há referência).
+    Vazio != zero: SALDO_ANTERIOR fica NaN quando não havia registro, e SITUACAO diz "zero" ou "vazio"."""
+    cols_ev = [COL_ID_CONTA, COL_CO_TP, EV_ANT_ANO, EV_ANT_MES, EV_SEG_ANO, EV_SEG_MES]
+    vazio = (pd.DataFrame(columns=cols_ev + [EV_SALDO_ANT, EV_SITUACAO]),
+             pd.DataFrame(columns=cols_ev + [EV_SITUACAO]))
+    base = dados_analise_base.dropna(subset=[COL_ID_CONTA, COL_ANO, COL_MES])
+    if base.empty or COL_CO_TP not in base.columns:
+        return vazio
+
+    periodo = (base[COL_ANO].to_numpy(dtype="int64") * 12 + base[COL_MES].to_numpy(dtype="int64") - 1)
+    serie = base.groupby([COL_ID_CONTA, COL_CO_TP], sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    saldo = pd.to_numeric(base[COL_SALDO], errors="coerce").to_numpy(dtype="float64")
+    # 1 valor por (série, mês); ordenado por série e mês
+    agg = (
+        pd.DataFrame({"s": serie, "p": periodo, "v": saldo})
+        .groupby(["s", "p"], sort=True)["v"].sum(min_count=1)
+    )
+    s = agg.index.get_level_values(0).to_numpy()
+    p = agg.index.get_level_values(1).to_numpy()
+    v = agg.to_numpy()
+    nz = ~np.isnan(v) & (v != 0)
+    p_min, p_max = periodo.min(), periodo.max()
+
+    ant_adj = np.zeros(len(s), dtype=bool)    # existe registro da mesma série no mês t-1
+    ant_adj[1:] = (s[1:] == s[:-1]) & (p[1:] == p[:-1] + 1)
+    seg_adj = np.zeros(len(s), dtype=bool)    # existe registro da mesma série no mês t+1
+    seg_adj[:-1] = ant_adj[1:]
+    ant_nz = np.zeros(len(s), dtype=bool)
+    ant_nz[1:] = nz[:-1]
+    seg_nz = np.zeros(len(s), dtype=bool)
+    seg_nz[:-1] = nz[1:]
+    v_ant = np.full(len(s), np.nan)
+    v_ant[1:] = v[:-1]
+
+    primeira = base.groupby(serie, sort=True)[[COL_ID_CONTA, COL_CO_TP]].first()  # chaves de cada série
+
+    def montar(sel, p_ant, p_seg, extra):
+        ids = primeira.loc[s[sel]]
+        df = pd.DataFrame({
+            COL_ID_CONTA: ids[COL_ID_CONTA].to_numpy(),
+            COL_CO_TP: ids[COL_CO_TP].to_numpy(),
+            EV_ANT_ANO: p_ant // 12, EV_ANT_MES: p_ant % 12 + 1,
+            EV_SEG_ANO: p_seg // 12, EV_SEG_MES: p_seg % 12 + 1,
+            **extra,
+        })
+        return df.sort_values([EV_SEG_ANO, EV_SEG_MES, COL_ID_CONTA, COL_CO_TP], kind="stable").reset_index(drop=True)
+
+    surgiu = nz & (p > p_min) & ~(ant_adj & ant_nz)
+    zerou = nz & (p < p_max) & ~(seg_adj & seg_nz)
+    ev_surgiu = montar(surgiu, p[surgiu] - 1, p[surgiu], {
+        EV_SALDO_ANT: np.where(ant_adj[surgiu], v_ant[surgiu], np.nan),
+        EV_SITUACAO: np.where(ant_adj[surgiu], "zero", "vazio"),
+    })
+    ev_zerou = montar(zerou, p[zerou], p[zerou] + 1, {
+        EV_SITUACAO: np.where(seg_adj[zerou], "zero", "vazio"),
+    })
+    return ev_surgiu, ev_zerou
+
+@dataclass(frozen=True)
+class DadosPreparados:
+    """Tudo que não depende de filtro de página. Compartilhado entre sessões: somente leitura."""
+    arquivos: tuple                   # .xlsx de origem (do mais antigo ao mais recente)
+    mtime: float                      # mtime mais recente entre os arquivos
+    dados: pd.DataFrame               # todas as linhas, tipos compactos (inclui mês 0)
+    dados_analise_base: pd.DataFrame  # fatia de `dados`: só meses válidos, ordenado por DATA (KPIs/gráficos)
+    dados_tabela: pd.DataFrame        # o próprio `dados` (inclui mês 0) para tabelas
+    nm: pd.DataFrame                  # ID_CONTA -> NO_CONTA
+    surg: pd.DataFrame                # SALDO-SURGIU com nome da conta
+    zerou: pd.DataFrame               # SALDO-ZEROU com nome da conta
+    datas_opts: list                  # meses válidos ordenados (slider de período)
+    series: IndiceSeries              # (Conta, CO_TP) -> série mensal
+    eventos: IndiceEventos            # (ID_CONTA, ano, mês) -> linhas (Conta, Tipo)
+    catalogo: CatalogoContas          # contas distintas + busca (seletores de conta)
+    fonte_eventos: str = "planilha"   # "planilha" (abas do .xlsx) ou "detectado" (a partir de DADOS)
+    leitura: list = field(default_factory=list)  # por aba: origem, linhas, colunas, segundos
+    qtd_mes0: int = 0
+    avisos: list = field(default_factory=list)
+    compartilhado: str = ""           # pasta dos arquivos mapeados (PAINEL_COMPARTILHADO); "" = tudo em memória
+
+    # ---------- consultas das páginas (mesma interface do banco em painel_banco) ----------
+    def contas(self) -> list:
+        return self.catalogo.nomes.tolist()
+
+    def tipos_da_conta(self, conta) -> pd.DataFrame:
+        """CO_TP/NO_TP distintos da conta, por CO_TP."""
+        return self.catalogo.tipos_da_conta(conta)
+
+    def serie(self, conta, co, inicio=None, fim=None) -> pd.DataFrame:
+        return self.series.serie(conta, co, inicio, fim)
+
+    def pares(self) -> pd.DataFrame:
+        """Pares (Conta, CO_TP) distintos com o rótulo 'Conta | Tipo' em LABEL."""
+        pares = (
+            self.dados_tabela[[COL_NO_CONTA, COL_CO_TP, COL_NO_TP]]
+            .dropna(subset=[COL_NO_CONTA, COL_CO_TP])
+            .drop_duplicates()
+        )
+        pares["LABEL"] = rotulos_conta_tipo(pares[COL_NO_CONTA], pares[COL_CO_TP], pares[COL_NO_TP])
+        return pares
+
+    def comparativo(self, pares_sel: pd.DataFrame, inicio=None, fim=None) -> pd.DataFrame:
+        """Soma por (LABEL, DATA) dos pares escolhidos, só meses válidos em [inicio, fim].
+        Lido direto do índice de séries (sem merge com o razão), ordenado por LABEL e DATA."""
+        pares_sel = pares_sel.sort_values("LABEL", kind="stable")
+        chaves = list(zip(pares_sel[COL_NO_CONTA].tolist(), pares_sel[COL_CO_TP].tolist()))
+        ids, datas, saldos = self.series.series_de(chaves, inicio, fim)
+        return pd.DataFrame({
+            "LABEL": pares_sel["LABEL"].iloc[ids].reset_index(drop=True),
+            COL_DATA: datas,
+            COL_SALDO: saldos,
+        })
+
+    def kpis_pares(self, inicio=None, fim=None) -> pd.DataFrame:
+        """KPIs de todos os pares (Conta, CO_TP) no período, com rótulo e variação %."""
+        return completar_kpis(self.series.kpis(inicio, fim), self.pares())
+
+    def historico(self, conta, co) -> pd.DataFrame:
+        """ANO/MES/SALDO do par, todas as linhas (inclui mês 0)."""
+        dt = self.dados_tabela
+        return dt[(dt[COL_NO_CONTA] == conta) & (dt[COL_CO_TP] == co)][[COL_ANO, COL_MES, COL_SALDO]].sort_values([COL_ANO, COL_MES])
+
+    def matriz(self, contas=None):
+        from painel_matriz import calcular_matriz  # painel_matriz importa este módulo
+        return calcular_matriz(self.dados_tabela, contas)
+
+    def eventos_do_periodo(self, tipo: str, ano, mes) -> pd.DataFrame:
+        """Eventos SURGIU/ZEROU com ANO/MES_SEGUINTE == (ano, mes), já expandidos por tipo."""
+        ev = self.surg if tipo == "surgiu" else self.zerou
+        sel = ev[(ev[EV_SEG_ANO] == ano) & (ev[EV_SEG_MES] == mes)]
+        usar_mes = "seguinte" if tipo == "surgiu" else "anterior"
+        if not len(sel):
+            return sel.iloc[0:0]
+        return expandir_eventos_por_tipo(sel, usar_mes=usar_mes, indice=self.eventos,
+                                         por_tipo=self.fonte_eventos == "detectado")
+
+def completar_kpis(kpis: pd.DataFrame, pares: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta LABEL (1º rótulo do par) e Variação % (sobre |primeiro|; vazio se primeiro = 0)."""
+    rotulos = pares.drop_duplicates(subset=[COL_NO_CONTA, COL_CO_TP])[[COL_NO_CONTA, COL_CO_TP, "LABEL"]]
+    kpis = kpis.merge(rotulos, on=[COL_NO_CONTA, COL_CO_TP], how="left")
+    base = kpis["Primeiro"].abs()
+    kpis["Variação %"] = np.where(base > 0, kpis["Variação"] / base.where(base > 0, 1.0) * 100, np.nan)
+    return kpis
+
+def estatisticas_series(longo: pd.DataFrame) -> pd.DataFrame:
+    """Por série (LABEL) de um comparativo: meses, mínimo, máximo, primeiro, último e variação."""
+    g = longo.groupby("LABEL", observed=True, sort=False)[COL_SALDO]
+    est = pd.DataFrame({
+        "Meses": g.size(),
+        "Mínimo": g.min(),
+        "Máximo": g.max(),
+        "Primeiro": g.first(),
+        "Último": g.last(),
+    })
+    est["Variação"] = est["Último"] - est["Primeiro"]
+    base = est["Primeiro"].abs()
+    est["Variação %"] = np.where(base > 0, est["Variação"] / base.where(base > 0, 1.0) * 100, np.nan)
+    return est.rename_axis("Conta | Tipo").reset_index()
+
+def preparar_dados(dados: pd.DataFrame, surg_raw: pd.DataFrame, zerou_raw: pd.DataFrame,
+                   arquivos: tuple = (), mtime: float = 0.0, fonte_eventos: str = FONTE_EVENTOS,
+                   leitura: list = None) -> DadosPreparados:
+    """Monta o DadosPreparados a partir das 3 planilhas brutas.
+    fonte_eventos: "auto" usa as abas SALDO-SURGIU/ZEROU quando existem; senão detecta em DADOS."""
+    dados = ensure_datetime_and_flags(compactar_dados(dados))
+    nm = name_map(dados)  # antes de reordenar: keep="last" segue a ordem da planilha
+
+    # Uma única cópia do razão: meses válidos primeiro (ordenados por DATA), mês 0/inválidos no fim.
+    # dados_analise_base é fatia (iloc) de dados -> sem duplicar memória.
+    valido = dados["MES_VALIDO"].to_numpy(dtype=bool)
+    ordem = np.lexsort((dados[COL_DATA].to_numpy(dtype="datetime64[ns]"), ~valido))
+    dados = dados.take(ordem).reset_index(drop=True)
+    dados_analise_base = dados.iloc[:int(valido.sum())]   # só meses válidos (para KPIs/gráficos)
+    dados_tabela = dados                                   # todas as linhas (inclui mês 0) para tabelas
+
+    avisos = []
+    abas_presentes = not surg_raw.columns.empty and not zerou_raw.columns.empty
+    detectar = fonte_eventos == "detectar" or (fonte_eventos != "planilha" and not abas_presentes)
+    if detectar:
+        surg_raw, zerou_raw = detectar_eventos(dados_analise_base)
+    else:
+        for aba, ev in ((ABA_SURGIU, surg_raw), (ABA_ZEROU, zerou_raw)):
+            if COL_ID_CONTA not in ev.columns:
+                avisos.append(f"A planilha de evento {aba} não possui a coluna ID_CONTA_CONTABIL.")
+
+    datas_opts, _ = build_month_slider_options(dados_analise_base)
+    qtd_mes0 = int((pd.to_numeric(dados.get(COL_MES, pd.Series(dtype="float")), errors="coerce") == 0).sum())
+    return DadosPreparados(
+        arquivos=tuple(arquivos),
+        mtime=mtime,
+        dados=dados,
+        dados_analise_base=dados_analise_base,
+        dados_tabela=dados_tabela,
+        nm=nm,
+        surg=enrich_event_sheet(surg_raw, nm),
+        zerou=enrich_event_sheet(zerou_raw, nm),
+        datas_opts=datas_opts,
+        series=construir_indice_series(dados_analise_base),
+        eventos=construir_indice_eventos(dados_analise_base),
+        catalogo=construir_catalogo_contas(dados_tabela),
+        fonte_eventos="detectado" if detectar else "planilha",
+        leitura=list(leitura or []),
+        qtd_mes0=qtd_mes0,
+        avisos=avisos,
+    )
+
+def carregar_dados_preparados(arquivos) -> DadosPreparados:
+    """Leitura (com cache colunar) + preparação. Sem Streamlit: usável por scripts.
+    `arquivos`: caminho de 1 .xlsx ou lista (consolidada; do mais antigo ao mais recente)."""
+    arquivos = [arquivos] if isinstance(arquivos, str) else list(arquivos)
+    mtime = max(os.path.getmtime(a) for a in arquivos)
+    leitura = []
+    with medir("leitura"):
+        if len(arquivos) == 1:
+            frames = carregar_planilhas(arquivos[0], leitura)
+        else:
+            frames = consolidar_planilhas(carregar_varias_planilhas(arquivos, leitura))
+    dados, surg_raw, zerou_raw = frames
+    with medir("preparacao"):
+        return preparar_dados(dados, surg_raw, zerou_raw, arquivos=arquivos, mtime=mtime, leitura=leitura)
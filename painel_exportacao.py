@@ -0,0 +1,167 @@
+# painel_exportacao.py
+# -*- coding: utf-8 -*-
+# Downloads das tabelas do painel (sem Streamlit):
+# - Gerados em blocos de PAINEL_EXPORTAR_BLOCO linhas a partir dos dados numéricos (somas + has_record da
+#   Matriz, saldos dos eventos/histórico); nunca existe uma cópia formatada da tabela inteira na memória.
+# - Cada bloco vai direto para um arquivo temporário em disco. O arquivo pronto, porém, volta inteiro para a
+#   memória: o download_button do Streamlit guarda os bytes até a sessão sair da página. Por isso o download
+#   pelo navegador vale só até PAINEL_EXPORTAR_MAX_CELULAS células (linhas x colunas); acima disso, use o
+#   exportar_relatorios.py, que grava direto em disco.
+# - Vazio != zero: célula sem registro (NaN) sai '-'; saldo zero sai 'R$ 0,00' (CSV) ou 0 com formato R$ (xlsx).
+# - Gerado só no clique, fora do script da página; no máximo PAINEL_EXPORTAR_SIMULTANEAS ao mesmo tempo.
+
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from painel_dados import COLUNAS_TABELA_EVENTO, COL_ANO, COL_MES, COL_SALDO, colunas_evento, format_brl_vetorizado
+from painel_metricas import medir
+
+LINHAS_POR_BLOCO = int(os.environ.get("PAINEL_EXPORTAR_BLOCO", "2000"))
+MAX_SIMULTANEAS = int(os.environ.get("PAINEL_EXPORTAR_SIMULTANEAS", "2"))
+MAX_CELULAS = int(os.environ.get("PAINEL_EXPORTAR_MAX_CELULAS", "2000000"))  # ~30 MB de CSV; 0 = sem limite
+FORMATO_BRL_XLSX = '"R$" #,##0.00;-"R$" #,##0.00'  # o Excel troca . e , conforme o idioma
+SEM_REGISTRO = "-"
+MIME = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+_VAGAS = threading.BoundedSemaphore(max(1, MAX_SIMULTANEAS))
+
+
+@dataclass(frozen=True)
+class TabelaExportacao:
+    """Tabela a exportar: `blocos()` devolve DataFrames numéricos; colunas em `moeda` saem em R$ ('-' = vazio)."""
+    nome: str
+    blocos: Callable[[], Iterator[pd.DataFrame]]
+    moeda: tuple
+    indice: str = None  # nome da coluna do índice (Matriz: "Conta | Tipo"); None = sem índice
+    celulas: int = 0    # linhas x colunas (limite do download pelo navegador)
+
+
+def nome_arquivo(*partes) -> str:
+    """Nome de arquivo seguro a partir de rótulos (conta, período...)."""
+    return re.sub(r"[^\w-]+", "_", "_".join(str(p) for p in partes if p is not None and str(p))).strip("_")[:120]
+
+def grande_demais(tabela: TabelaExportacao) -> bool:
+    """Acima de MAX_CELULAS: o arquivo pronto ocuparia memória demais no servidor (fica em bytes na sessão)."""
+    return bool(MAX_CELULAS) and tabela.celulas > MAX_CELULAS
+
+def _fatias(n: int, tamanho: int):
+    """Fatias de até `tamanho` linhas; tabela vazia = 1 fatia vazia (o arquivo ainda leva o cabeçalho)."""
+    for ini in range(0, max(n, 1), max(1, tamanho)):
+        yield slice(ini, min(ini + tamanho, n))
+
+def _inteiros(valores: pd.Series) -> pd.Series:
+    """Ano/mês como inteiro anulável (sem 2025.0 nem 2,025)."""
+    return pd.to_numeric(valores, errors="coerce").round().astype("Int64")
+
+
+# ----------------------
+# Tabelas (blocos numéricos)
+# ----------------------
+def exportacao_matriz(matriz, posicoes: np.ndarray, nome: str = "matriz_cronologica") -> TabelaExportacao:
+    """Linhas `posicoes` da MatrizCronologica; NaN onde não há registro (has_record falso)."""
+    colunas = [str(c) for c in matriz.colunas]
+
+    def blocos():
+        for fatia in _fatias(len(posicoes), LINHAS_POR_BLOCO):
+            pos = posicoes[fatia]
+            valores = np.where(matriz.has_record[pos], matriz.somas[pos], np.nan)
+            yield pd.DataFrame(valores, index=pd.Index(matriz.linhas[pos], name="Conta | Tipo"), columns=colunas)
+    return TabelaExportacao(nome, blocos, tuple(colunas), indice="Conta | Tipo",
+                            celulas=len(posicoes) * (len(colunas) + 1))
+
+def exportacao_eventos(exp: pd.DataFrame, tipo: str, nome: str) -> TabelaExportacao:
+    """Mesmas colunas da tabela Saldo Surgiu/Zerou, com valor e referências ainda numéricos."""
+    col_valor, refs, nomes = COLUNAS_TABELA_EVENTO[tipo]
+
+    def blocos():
+        for fatia in _fatias(len(exp), LINHAS_POR_BLOCO):
+            bloco = colunas_evento(exp.iloc[fatia], tipo).copy()
+            for c in (nomes[r] for r in refs[:2]):
+                if c in bloco.columns:
+                    bloco[c] = _inteiros(bloco[c])
+            yield bloco
+    return TabelaExportacao(nome, blocos, (col_valor,), celulas=len(exp) * (3 + len(refs)))  # conta, tipo, valor + refs
+
+def exportacao_historico(hist: pd.DataFrame, nome: str) -> TabelaExportacao:
+    """Histórico do par (ANO, MES, SALDO): Ano, Mês, Saldo."""
+    def blocos():
+        for fatia in _fatias(len(hist), LINHAS_POR_BLOCO):
+            h = hist.iloc[fatia]
+            yield pd.DataFrame({"Ano": _inteiros(h[COL_ANO]), "Mês": _inteiros(h[COL_MES]),
+                                "Saldo": pd.to_numeric(h[COL_SALDO], errors="coerce")})
+    return TabelaExportacao(nome, blocos, ("Saldo",), celulas=len(hist) * 3)
+
+
+# ----------------------
+# Gravação em blocos
+# ----------------------
+def escrever_csv(tabela: TabelaExportacao, destino):
+    """CSV com ';' e BOM (abre direto no Excel em pt-BR); R$ formatado bloco a bloco."""
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    primeiro = True
+    for bloco in tabela.blocos():
+        bloco = bloco.copy()
+        for c in tabela.moeda:
+            bloco[c] = format_brl_vetorizado(bloco[c])
+        bloco.to_csv(texto, sep=";", header=primeiro, index=tabela.indice is not None, lineterminator="\n")
+        primeiro = False
+    texto.flush()
+    texto.detach()  # devolve o arquivo sem fechá-lo
+
+def escrever_xlsx(tabela: TabelaExportacao, destino):
+    """openpyxl write-only: valores numéricos com formato R$; sem registro = texto '-'."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(tabela.nome[:31])
+
+    def celula_brl(v):
+        if v != v:  # NaN: sem registro
+            return SEM_REGISTRO
+        c = WriteOnlyCell(ws, value=v)
+        c.number_format = FORMATO_BRL_XLSX
+        return c
+
+    cabecalho = True
+    for bloco in tabela.blocos():
+        if cabecalho:
+            ws.append(([tabela.indice] if tabela.indice else []) + [str(c) for c in bloco.columns])
+            cabecalho = False
+        colunas = []
+        if tabela.indice:
+            colunas.append([str(v) for v in bloco.index])
+        for c in bloco.columns:
+            if c in tabela.moeda:
+                colunas.append([celula_brl(v) for v in bloco[c].to_numpy(dtype="float64").tolist()])
+            else:
+                colunas.append([None if pd.isna(v) else v for v in bloco[c].astype(object).tolist()])
+        for linha in zip(*colunas):
+            ws.append(linha)
+    wb.save(destino)
+
+ESCRITORES = {"csv": escrever_csv, "xlsx": escrever_xlsx}
+
+
+def gerar_arquivo(tabela: TabelaExportacao, formato: str) -> bytes:
+    """Conteúdo do arquivo com a tabela inteira no `formato` (montado em disco, bloco a bloco)."""
+    with _VAGAS, medir(f"exportacao:{formato}"), tempfile.TemporaryFile() as arquivo:
+        t0 = time.perf_counter()
+        ESCRITORES[formato](tabela, arquivo)
+        arquivo.seek(0)
+        conteudo = arquivo.read()
+        print(f"[painel] exportação {tabela.nome}.{formato}: {len(conteudo) / 1024 / 1024:.1f} MB "
+              f"em {time.perf_counter() - t0:.2f}s")
+        return conteudo
@@ -0,0 +1,168 @@
+# painel_graficos.py
+# -*- coding: utf-8 -*-
+# Gráficos de linha do painel (sem Streamlit):
+# - WebGL (Scattergl) em todos os gráficos: centenas de séries sem travar o navegador.
+# - Sem texto por ponto: o valor em R$ aparece no hover (formatado pelo próprio plotly);
+#   escritos no gráfico só o último ponto e o pico de cada série (até MAX_SERIES_ROTULADAS séries).
+# - Séries longas são reduzidas por LTTB a PAINEL_GRAFICO_MAX_PONTOS pontos (mantém o formato da curva).
+# - Tamanho do JSON enviado ao navegador é medido por gráfico com PAINEL_METRICAS=1 (administração).
+# - plotly é importado só dentro das funções (import pesado; páginas sem gráfico não pagam).
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from painel_dados import COL_DATA, COL_SALDO, format_brl
+import painel_metricas
+from painel_metricas import medir
+
+# Pontos por série acima dos quais o LTTB reduz a série (0 = nunca reduz)
+MAX_PONTOS = int(os.environ.get("PAINEL_GRAFICO_MAX_PONTOS", "400"))
+# Hover em BRL sem mandar 1 texto formatado por ponto: separators=",." troca . e , no d3-format
+HOVER_BRL = "<b>%{fullData.name}</b><br>%{x|%m/%Y}: R$ %{y:,.2f}<extra></extra>"
+SEPARADORES_BRL = ",."
+MAX_SERIES_ROTULADAS = 5  # rótulos de último/pico só com poucas séries
+MAX_MARCADORES = 120      # acima disso, só a linha (marcadores viram borrão)
+MAX_LEGENDA = 20          # acima disso a legenda mais atrapalha do que ajuda
+MAX_PAINEIS = 60          # pequenos múltiplos: painéis desenhados no máximo
+
+
+# ----------------------
+# Redução de pontos (LTTB)
+# ----------------------
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Posições dos `n` pontos escolhidos por Largest-Triangle-Three-Buckets (1º e último sempre ficam)."""
+    total = len(x)
+    if n >= total or n < 3:
+        return np.arange(total)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    limites = np.floor(np.linspace(1, total - 1, n - 1)).astype(np.int64)  # n-2 baldes internos
+    escolhidos = np.empty(n, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, total - 1
+    a = 0
+    for i in range(n - 2):
+        ini, fim = limites[i], max(limites[i + 1], limites[i] + 1)
+        prox_ini, prox_fim = fim, (limites[i + 2] if i + 2 < len(limites) else total)
+        if prox_ini >= prox_fim:
+            prox_ini, prox_fim = total - 1, total
+        mx, my = x[prox_ini:prox_fim].mean(), y[prox_ini:prox_fim].mean()
+        areas = np.abs((x[a] - mx) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (my - y[a]))
+        a = ini + int(np.argmax(areas))
+        escolhidos[i + 1] = a
+    return escolhidos
+
+def reduzir_serie(datas: np.ndarray, saldos: np.ndarray, max_pontos: int = MAX_PONTOS):
+    """(datas, saldos) com no máximo `max_pontos` pontos (LTTB); curtas voltam intactas."""
+    if not max_pontos or len(datas) <= max_pontos:
+        return datas, saldos
+    pos = lttb(datas.astype("datetime64[ns]").astype(np.int64), saldos, max_pontos)
+    return datas[pos], saldos[pos]
+
+
+# ----------------------
+# Medição do tamanho enviado
+# ----------------------
+_PAYLOADS = deque(maxlen=200)
+_TRAVA_PAYLOADS = threading.Lock()
+
+def registrar_payload(nome: str, fig, series: int, pontos: int, enviados: int):
+    """Guarda o tamanho do JSON do gráfico (o que vai para o navegador). Só com PAINEL_METRICAS=1:
+    serializar de novo cada gráfico custa quase o mesmo que desenhá-lo."""
+    if not painel_metricas.ATIVO:
+        return
+    with medir("grafico:json"):
+        kb = len(fig.to_json()) / 1024
+    with _TRAVA_PAYLOADS:
+        _PAYLOADS.append({
+            "Hora": time.strftime("%H:%M:%S"), "Gráfico": nome, "Séries": series,
+            "Pontos": pontos, "Pontos enviados": enviados, "KB": round(kb, 1),
+        })
+
+def payloads() -> pd.DataFrame:
+    """Últimos gráficos desenhados (mais recente primeiro)."""
+    with _TRAVA_PAYLOADS:
+        linhas = list(_PAYLOADS)[::-1]
+    return pd.DataFrame(linhas, columns=["Hora", "Gráfico", "Séries", "Pontos", "Pontos enviados", "KB"])
+
+
+# ----------------------
+# Gráficos
+# ----------------------
+def fatiar_series(longo: pd.DataFrame, nome: str = ""):
+    """[(rótulo, datas, saldos), ...] de um frame DATA/SALDO (+ LABEL) agrupado por LABEL (sem groupby).
+    Sem coluna LABEL: 1 série chamada `nome`."""
+    datas = longo[COL_DATA].to_numpy()
+    saldos = longo[COL_SALDO].to_numpy(dtype="float64")
+    if "LABEL" not in longo.columns:
+        return [(nome, datas, saldos)] if len(datas) else []
+    rotulos = longo["LABEL"].astype(str).to_numpy()
+    if not len(rotulos):
+        return []
+    inicios = np.flatnonzero(np.r_[True, rotulos[1:] != rotulos[:-1]])
+    fins = np.r_[inicios[1:], len(rotulos)]
+    return [(rotulos[a], datas[a:b], saldos[a:b]) for a, b in zip(inicios, fins)]
+
+def _rotular_ultimo_e_pico(fig, datas, saldos, **pos):
+    """Valor escrito só no último ponto e no pico (se for outro ponto)."""
+    marcas = [len(saldos) - 1]
+    pico = int(np.argmax(saldos))
+    if pico != marcas[0]:
+        marcas.append(pico)
+    for i in marcas:
+        fig.add_annotation(x=datas[i], y=saldos[i], text=format_brl(saldos[i]), showarrow=False,
+                           yshift=12, font_size=11, **pos)
+
+def grafico_linhas(longo: pd.DataFrame, titulo: str = "", nome: str = "", rotular: bool = True,
+                   max_pontos: int = MAX_PONTOS):
+    """Uma linha WebGL por série (LABEL), valores no hover; último/pico escritos quando há poucas séries.
+    `nome` identifica o gráfico na medição de tamanho."""
+    import plotly.graph_objects as go
+    with medir("grafico"):
+        series = fatiar_series(longo, nome=titulo)
+        rotular = rotular and len(series) <= MAX_SERIES_ROTULADAS
+        fig = go.Figure()
+        enviados = 0
+        for r, d, v in series:
+            d_env, v_env = reduzir_serie(d, v, max_pontos)
+            enviados += len(d_env)
+            modo = "lines+markers" if len(d_env) <= MAX_MARCADORES else "lines"
+            fig.add_trace(go.Scattergl(x=d_env, y=v_env, name=r, mode=modo, hovertemplate=HOVER_BRL))
+            if rotular:
+                _rotular_ultimo_e_pico(fig, d, v)
+        fig.update_layout(
+            title=titulo, xaxis_title="Data", yaxis_title="Saldo", separators=SEPARADORES_BRL,
+            showlegend=1 < len(series) <= MAX_LEGENDA, legend_title=None, hovermode="closest",
+            height=560 if len(series) > MAX_SERIES_ROTULADAS else None,
+        )
+    registrar_payload(nome or titulo, fig, len(series), len(longo), enviados)
+    return fig
+
+def pequenos_multiplos(longo: pd.DataFrame, colunas: int = 4, max_paineis: int = MAX_PAINEIS,
+                       nome: str = "Pequenos múltiplos", max_pontos: int = MAX_PONTOS):
+    """1 painel WebGL por série (as `max_paineis` primeiras, na ordem do frame)."""
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+    with medir("grafico"):
+        series = fatiar_series(longo)[:max_paineis]
+        linhas = max(1, math.ceil(len(series) / colunas))
+        titulos = [r if len(r) <= 40 else r[:37] + "..." for r, _, _ in series]
+        fig = make_subplots(rows=linhas, cols=colunas, shared_xaxes=True, subplot_titles=titulos,
+                            vertical_spacing=min(0.08, 0.6 / linhas), horizontal_spacing=0.04)
+        pontos = enviados = 0
+        for i, (r, d, v) in enumerate(series):
+            d_env, v_env = reduzir_serie(d, v, max_pontos)
+            pontos += len(d)
+            enviados += len(d_env)
+            fig.add_trace(go.Scattergl(x=d_env, y=v_env, name=r, mode="lines", hovertemplate=HOVER_BRL),
+                          row=i // colunas + 1, col=i % colunas + 1)
+        fig.update_layout(showlegend=False, separators=SEPARADORES_BRL, height=max(300, 180 * linhas),
+                          margin=dict(t=40, b=20))
+        fig.update_annotations(font_size=10)
+    registrar_payload(nome, fig, len(series), pontos, enviados)
+    return fig
@@ -0,0 +1,110 @@
+# painel_matriz.py
+# -*- coding: utf-8 -*-
+# Motor da Matriz Cronológica (sem Streamlit):
+# - Soma e contagem por (Conta | Tipo, mês) numa única passada (bincount sobre os códigos).
+# - Contagem distingue ausência ('-') de valor zero ('R$ 0,00'): vazio != zero.
+# - Busca e paginação sobre os arrays; só a página visível é formatada/estilizada.
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from painel_dados import (
+    COL_NO_CONTA, COL_ANO, COL_MES, COL_DATA, COL_SALDO, COL_MES_TXT, COL_CO_TP, COL_NO_TP,
+    format_brl_vetorizado, rotulos_conta_tipo,
+)
+
+ESTILO_SEM_REGISTRO = "background-color:#f6f6f6; color:#888;"
+
+
+def build_month_order_labels(dados: pd.DataFrame) -> list:
+    """Ordena SG_MES_COMPLETO por (ANO, MES_ORDER) com mês 0 vindo antes de jan."""
+    if all(c in dados.columns for c in [COL_ANO, COL_MES, COL_MES_TXT]):
+        tmp = dados[[COL_ANO, COL_MES, COL_MES_TXT]].dropna(subset=[COL_ANO, COL_MES]).drop_duplicates()
+        tmp["MES_ORDER"] = np.where(tmp[COL_MES] == 0, -1, tmp[COL_MES])
+        tmp.sort_values([COL_ANO, "MES_ORDER"], inplace=True)
+        return pd.unique(tmp[COL_MES_TXT].dropna()).tolist()
+    return []
+
+
+@dataclass(frozen=True)
+class MatrizCronologica:
+    """Linhas = Conta | Tipo (ordem alfabética); colunas = meses (ordem cronológica)."""
+    linhas: pd.Index
+    colunas: pd.Index
+    somas: np.ndarray      # float64 [linhas x colunas]
+    contagens: np.ndarray  # int64   [linhas x colunas]; 0 = sem registro naquele mês
+
+    @property
+    def has_record(self) -> np.ndarray:
+        return self.contagens > 0
+
+    def buscar(self, termo: str) -> np.ndarray:
+        """Posições das linhas cujo rótulo contém `termo` (sem diferenciar maiúsculas)."""
+        if not termo or not termo.strip():
+            return np.arange(len(self.linhas))
+        achou = self.linhas.str.contains(termo.strip(), case=False, regex=False)
+        return np.flatnonzero(np.asarray(achou, dtype=bool))
+
+    def pagina(self, posicoes: np.ndarray):
+        """(valores formatados, máscara sem registro) só das linhas pedidas."""
+        tem = self.has_record[posicoes]
+        valores = np.where(tem, self.somas[posicoes], np.nan)
+        fmt = format_brl_vetorizado(pd.DataFrame(valores, index=self.linhas[posicoes], columns=self.colunas))
+        return fmt, ~tem
+
+    def diagnostico_vazios(self, limite: int = 100):
+        """(tabela das primeiras `limite` linhas com célula vazia, total dessas linhas).
+        Contagem por linha em array; nomes dos meses só p/ as linhas exibidas."""
+        vazio = ~self.has_record
+        qtd = vazio.sum(axis=1)
+        com_vazio = np.flatnonzero(qtd)
+        mostrar = com_vazio[:limite]
+        nomes = np.array([str(c) for c in self.colunas], dtype=object)
+        diag = pd.DataFrame({
+            "Conta | Tipo": self.linhas[mostrar],
+            "Qtd. meses sem registro": qtd[mostrar],
+            "Meses sem registro": [", ".join(nomes[vazio[i]]) for i in mostrar],
+        })
+        return diag, len(com_vazio)
+
+    def vazios_por_mes(self) -> pd.DataFrame:
+        """Total de células vazias (sem registro) em cada mês."""
+        return pd.DataFrame({
+            "Mês": [str(c) for c in self.colunas],
+            "Células vazias": (~self.has_record).sum(axis=0),
+            "Linhas": len(self.linhas),
+        })
+
+
+def calcular_matriz(dados_tabela: pd.DataFrame, contas=None, col_contagem: str = None) -> MatrizCronologica:
+    """Soma e contagem por (Conta | Tipo, mês) numa passada; `contas` vazio = razão inteiro.
+    `col_contagem`: entrada já agregada (1 linha por grupo, com nº de registros nessa coluna)."""
+    base = dados_tabela[dados_tabela[COL_NO_CONTA].isin(contas)] if contas else dados_tabela
+    col_mes = COL_MES_TXT if COL_MES_TXT in base.columns else COL_DATA
+
+    ordem_labels = build_month_order_labels(base)
+    if col_mes == COL_MES_TXT and ordem_labels:
+        meses = pd.Categorical(base[col_mes], categories=ordem_labels, ordered=True)
+    else:
+        meses = pd.Categorical(base[col_mes])
+    rows = rotulos_conta_tipo(base[COL_NO_CONTA], base[COL_CO_TP], base[COL_NO_TP])
+
+    nr, nc = len(rows.categories), len(meses.categories)
+    ok = meses.codes >= 0
+    idx = rows.codes[ok].astype(np.int64) * nc + meses.codes[ok]
+    saldo = pd.to_numeric(base[COL_SALDO], errors="coerce").to_numpy(dtype="float64")[ok]
+    somas = np.bincount(idx, weights=np.nan_to_num(saldo, nan=0.0), minlength=nr * nc).reshape(nr, nc)
+    pesos = base[col_contagem].to_numpy(dtype="float64")[ok] if col_contagem else None
+    contagens = np.bincount(idx, weights=pesos, minlength=nr * nc).astype(np.int64).reshape(nr, nc)
+
+    # Como o pivot_table: linhas/colunas sem nenhum registro não aparecem
+    lin_ok = contagens.sum(axis=1) > 0
+    col_ok = contagens.sum(axis=0) > 0
+    return MatrizCronologica(
+        linhas=pd.Index(rows.categories[lin_ok], name="ROW"),
+        colunas=pd.Index(meses.categories[col_ok], name=col_mes),
+        somas=somas[np.ix_(lin_ok, col_ok)],
+        contagens=contagens[np.ix_(lin_ok, col_ok)],
+    )
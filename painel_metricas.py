@@ -0,0 +1,196 @@
+# painel_metricas.py
+# -*- coding: utf-8 -*-
+# Medição de tempo das etapas do painel (sem Streamlit):
+# - PAINEL_METRICAS=1 liga; desligado, medir() devolve sempre o mesmo contexto vazio (custo ~ zero).
+# - Etapas (carga, consulta:<nome>, formatacao, grafico, render...) somadas por execução do script,
+#   por página; cada execução vira 1 amostra por etapa (p50/p95 no painel de administração).
+# - Últimas execuções guardadas por sessão; cada execução também vai, em JSON, para um log rotativo
+#   (PAINEL_METRICAS_LOG; padrão .painel_cache/metricas.log na pasta do app). Com vários processos
+#   (PAINEL_COMPARTILHADO), cada um grava no seu arquivo (metricas.<pid>.log): a rotação não é segura
+#   entre processos.
+# - Tempos fora de uma execução (recarga em segundo plano) entram como página "(segundo plano)".
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+
+ATIVO = os.environ.get("PAINEL_METRICAS", "0").strip().lower() in ("1", "sim", "true")
+ARQ_LOG = os.environ.get("PAINEL_METRICAS_LOG", "")   # vazio = definido por configurar_log()
+LOG_POR_PROCESSO = os.environ.get("PAINEL_COMPARTILHADO", "0").strip().lower() in ("1", "sim", "true")
+LOG_MB = float(os.environ.get("PAINEL_METRICAS_LOG_MB", "5"))
+LOG_COPIAS = 3
+AMOSTRAS = 500          # por (página, etapa)
+EXECUCOES_SESSAO = 50   # por sessão
+SEGUNDO_PLANO = "(segundo plano)"
+
+_NADA = contextlib.nullcontext()
+_LOCAL = threading.local()    # execução corrente da thread (o Streamlit roda cada sessão numa thread)
+_TRAVA = threading.Lock()
+_AMOSTRAS = {}                # (página, etapa) -> deque de segundos
+_SESSOES = {}                 # sessão -> deque de execuções
+_LOG = None                   # logging.Logger (criado na 1ª gravação)
+
+
+class _Medicao:
+    __slots__ = ("etapa", "t0")
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.etapa, time.perf_counter() - self.t0)
+        return False
+
+
+def medir(etapa: str):
+    """`with medir("etapa"):` soma o tempo do bloco na execução corrente."""
+    return _Medicao(etapa) if ATIVO else _NADA
+
+
+def registrar(etapa: str, segundos: float):
+    """Tempo já medido: entra na execução corrente ou, fora dela, direto nas amostras."""
+    if not ATIVO:
+        return
+    execucao = getattr(_LOCAL, "execucao", None)
+    if execucao is not None:
+        execucao["etapas"][etapa] = execucao["etapas"].get(etapa, 0.0) + segundos
+        return
+    with _TRAVA:
+        _AMOSTRAS.setdefault((SEGUNDO_PLANO, etapa), deque(maxlen=AMOSTRAS)).append(segundos)
+
+
+# ----------------------
+# Execuções (1 por rerun do script)
+# ----------------------
+def iniciar_execucao(sessao: str):
+    if ATIVO:
+        _LOCAL.execucao = {"sessao": sessao, "pagina": "", "t0": time.perf_counter(), "etapas": {}}
+
+def marcar_pagina(pagina: str):
+    execucao = getattr(_LOCAL, "execucao", None) if ATIVO else None
+    if execucao is not None:
+        execucao["pagina"] = pagina
+
+def finalizar_execucao():
+    """Fecha a execução corrente: amostras por etapa, histórico da sessão e 1 linha no log."""
+    execucao = getattr(_LOCAL, "execucao", None) if ATIVO else None
+    if execucao is None:
+        return
+    _LOCAL.execucao = None
+    total = time.perf_counter() - execucao["t0"]
+    pagina, etapas = execucao["pagina"], execucao["etapas"]
+    registro = {
+        "hora": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "sessao": execucao["sessao"],
+        "pagina": pagina,
+        "total_ms": round(total * 1000, 1),
+        "etapas_ms": {k: round(v * 1000, 1) for k, v in etapas.items()},
+    }
+    with _TRAVA:
+        for etapa, seg in list(etapas.items()) + [("execucao (total)", total)]:
+            _AMOSTRAS.setdefault((pagina, etapa), deque(maxlen=AMOSTRAS)).append(seg)
+        _SESSOES.setdefault(execucao["sessao"], deque(maxlen=EXECUCOES_SESSAO)).append(registro)
+    _gravar_log(registro)
+
+
+# ----------------------
+# Log rotativo
+# ----------------------
+def configurar_log(pasta_app: str):
+    """Log padrão em <pasta do app>/.painel_cache/metricas.log (se PAINEL_METRICAS_LOG não definiu outro)."""
+    global ARQ_LOG
+    if not ARQ_LOG:
+        ARQ_LOG = os.path.join(pasta_app, ".painel_cache", "metricas.log")
+
+def _arquivo_do_processo(caminho: str) -> str:
+    """metricas.log -> metricas.<pid>.log quando há vários processos do painel (1 arquivo rotativo por processo)."""
+    if not LOG_POR_PROCESSO:
+        return caminho
+    base, ext = os.path.splitext(caminho)
+    return f"{base}.{os.getpid()}{ext or '.log'}"
+
+def _gravar_log(registro: dict):
+    global _LOG
+    if not ARQ_LOG:
+        return
+    if _LOG is None:
+        with _TRAVA:
+            if _LOG is None:
+                log = logging.getLogger("painel.metricas")
+                log.propagate = False
+                log.setLevel(logging.INFO)
+                arquivo = _arquivo_do_processo(ARQ_LOG)
+                try:
+                    os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+                    h = RotatingFileHandler(arquivo, maxBytes=int(LOG_MB * 1024 * 1024),
+                                            backupCount=LOG_COPIAS, encoding="utf-8")
+                    h.setFormatter(logging.Formatter("%(message)s"))
+                    log.addHandler(h)
+                except OSError as exc:
+                    print(f"[painel] log de métricas desativado ({exc}).")
+                _LOG = log
+    _LOG.info(json.dumps(registro, ensure_ascii=False))
+
+
+# ----------------------
+# Consultas (painel de administração)
+# ----------------------
+def resumo_etapas() -> pd.DataFrame:
+    """p50/p95/máx (ms) por (página, etapa)."""
+    with _TRAVA:
+        itens = [(k, np.fromiter(v, dtype="float64")) for k, v in _AMOSTRAS.items() if v]
+    linhas = [{
+        "Página": pagina, "Etapa": etapa, "Amostras": len(seg),
+        "p50 (ms)": np.percentile(seg, 50) * 1000,
+        "p95 (ms)": np.percentile(seg, 95) * 1000,
+        "Máx (ms)": seg.max() * 1000,
+    } for (pagina, etapa), seg in itens]
+    cols = ["Página", "Etapa", "Amostras", "p50 (ms)", "p95 (ms)", "Máx (ms)"]
+    return pd.DataFrame(linhas, columns=cols).sort_values(["Página", "p95 (ms)"], ascending=[True, False])
+
+def execucoes_da_sessao(sessao: str) -> pd.DataFrame:
+    """Últimas execuções da sessão (mais recente primeiro), com as 3 etapas mais lentas."""
+    with _TRAVA:
+        registros = list(_SESSOES.get(sessao, ()))[::-1]
+    linhas = [{
+        "Hora": r["hora"][11:], "Página": r["pagina"], "Total (ms)": r["total_ms"],
+        "Etapas mais lentas": ", ".join(f"{k} {v:.0f} ms" for k, v in
+                                        sorted(r["etapas_ms"].items(), key=lambda kv: -kv[1])[:3]),
+    } for r in registros]
+    return pd.DataFrame(linhas, columns=["Hora", "Página", "Total (ms)", "Etapas mais lentas"])
+
+def qtd_sessoes() -> int:
+    with _TRAVA:
+        return len(_SESSOES)
+
+def limpar():
+    with _TRAVA:
+        _AMOSTRAS.clear()
+        _SESSOES.clear()
+
+def memoria_dados(dados) -> pd.DataFrame:
+    """MB por componente da versão dos dados (DadosPreparados ou BancoDuckDB); fatias/visões não contam 2x."""
+    from painel_cache import tamanho_bytes
+    partes = []
+    if hasattr(dados, "dados"):
+        mapeado = " (mapeado, compartilhado)" if getattr(dados, "compartilhado", "") else ""
+        partes += [("Razão (DADOS)" + mapeado, dados.dados), ("Índice de séries" + mapeado, dados.series),
+                   ("Índice de eventos" + mapeado, dados.eventos.grupos)]
+    if getattr(dados, "caminho", None) and os.path.exists(dados.caminho):
+        partes.append(("Banco DuckDB (arquivo em disco)", os.path.getsize(dados.caminho)))
+    partes += [("Catálogo de contas", dados.catalogo), ("Eventos SURGIU/ZEROU", [dados.surg, dados.zerou])]
+    linhas = [{"Componente": nome, "MB": (obj if isinstance(obj, int) else tamanho_bytes(obj)) / 1024 / 1024}
+              for nome, obj in partes]
+    return pd.DataFrame(linhas, columns=["Componente", "MB"])
@@ -0,0 +1,85 @@
+# painel_proxy.py
+# -*- coding: utf-8 -*-
+# Proxy TCP na frente dos processos do painel (PAINEL_PROCESSOS > 1 no run_streamlit.py):
+# - Cada IP de cliente fica preso a 1 processo: sessão, websocket, mídia e downloads do Streamlit moram nele.
+#   IP novo vai para o processo com menos clientes (na rede do escritório, 1 IP = 1 computador).
+# - Processo que não aceita conexão (caiu / reiniciando): o IP vai para outro na mesma hora.
+# - Só repassa bytes (HTTP e websocket passam iguais); roda numa thread com loop asyncio próprio.
+
+import asyncio
+import threading
+
+TAM_LEITURA = 64 * 1024
+
+
+class ProxyPegajoso:
+    """Repassa conexões de `endereco`:`porta` para 127.0.0.1:<portas[i]>, sempre o mesmo i por IP."""
+
+    def __init__(self, portas, endereco: str = "0.0.0.0", porta: int = 8501):
+        self.portas = list(portas)
+        self.endereco = endereco
+        self.porta = porta
+        self._clientes = {}  # ip -> índice do processo
+        self._trava = threading.Lock()
+
+    def _escolher(self, ip: str, evitar=()):
+        """Processo do IP; sem processo (ou em `evitar`): o menos ocupado entre os demais. None = nenhum."""
+        with self._trava:
+            i = self._clientes.get(ip)
+            if i is None or i in evitar:
+                carga = [0] * len(self.portas)
+                for j in self._clientes.values():
+                    carga[j] += 1
+                livres = [j for j in range(len(self.portas)) if j not in evitar]
+                if not livres:
+                    return None
+                i = min(livres, key=lambda j: carga[j])
+                self._clientes[ip] = i
+            return i
+
+    def distribuicao(self) -> dict:
+        """Porta -> quantidade de IPs presos a ela."""
+        with self._trava:
+            ips = list(self._clientes.values())
+        return {p: ips.count(i) for i, p in enumerate(self.portas)}
+
+    @staticmethod
+    async def _copiar(leitor, escritor):
+        try:
+            while dados := await leitor.read(TAM_LEITURA):
+                escritor.write(dados)
+                await escritor.drain()
+            if escritor.can_write_eof():
+                escritor.write_eof()  # meia-conexão: o outro lado ainda pode terminar a resposta
+        except (ConnectionError, OSError):
+            escritor.close()
+
+    async def _atender(self, leitor, escritor):
+        ip = (escritor.get_extra_info("peername") or ("?",))[0]
+        falhas = set()
+        while True:
+            i = self._escolher(ip, falhas)
+            if i is None:
+                escritor.close()
+                return
+            try:
+                leitor_p, escritor_p = await asyncio.open_connection("127.0.0.1", self.portas[i])
+                break
+            except OSError:
+                falhas.add(i)
+        try:
+            await asyncio.gather(self._copiar(leitor, escritor_p), self._copiar(leitor_p, escritor))
+        finally:
+            escritor_p.close()
+            escritor.close()
+
+    async def _servir(self):
+        servidor = await asyncio.start_server(self._atender, self.endereco, self.porta)
+        async with servidor:
+            await servidor.serve_forever()
+
+    def iniciar(self) -> threading.Thread:
+        """Sobe o proxy numa thread daemon (termina junto com o processo)."""
+        t = threading.Thread(target=asyncio.run, args=(self._servir(),), name="painel-proxy", daemon=True)
+        t.start()
+        return t
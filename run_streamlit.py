@@ -1,11 +1,28 @@
 # run_streamlit.py
-import os, sys, socket, webbrowser
+import time
+_T0 = time.perf_counter()  # início do processo (p/ os tempos no console)
+
+import os, sys, socket, subprocess, threading, webbrowser
+import importlib
+import multiprocessing
 import streamlit.web.cli as stcli
+_T_STREAMLIT = time.perf_counter() - _T0
+
+# PAINEL_PROCESSOS=N (N > 1): N processos do Streamlit atrás de um proxy (1 por IP de cliente), com os dados
+# preparados 1x e mapeados em disco por todos (painel_compartilhado). Padrão 1: um processo só, como sempre.
+PROCESSOS = max(1, int(os.environ.get("PAINEL_PROCESSOS", "1") or 1))
+ARG_PROCESSO = "--painel-processo"  # linha de comando de cada processo filho: --painel-processo <porta>
 
 def _app_path():
     bundle_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(bundle_dir, "app.py")
 
+def _base_dir():
+    # mesma regra do app.py: pasta do .exe (congelado) ou deste arquivo
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
 def _pick_free_port(preferred=8501):
     # tenta a 8501; se ocupada, pede uma porta livre ao SO
     try:
@@ -18,6 +35,11 @@ def _pick_free_port(preferred=8501):
         s.bind(("0.0.0.0", 0))
         return s.getsockname()[1]
 
+def _porta_local_livre():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
 def _lan_ip():
     # descobre o IP da rede local sem fazer requisição externa
     try:
@@ -32,35 +54,134 @@ def _lan_ip():
         except Exception:
             return "127.0.0.1"
 
-if __name__ == "__main__":
-    app = _app_path()
-    port = _pick_free_port()
-    lan = _lan_ip()
+def _esperar_porta(port, limite=120.0):
+    # espera o servidor do Streamlit aceitar conexões
+    fim = time.perf_counter() + limite
+    while time.perf_counter() < fim:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
 
-    # Streamlit ouvindo em todas as interfaces
-    sys.argv = [
+def _pre_aquecer(port, local_url, abrir_navegador=True):
+    # em paralelo com a subida do servidor: bibliotecas + dados; o navegador só abre com tudo pronto
+    bundle_dir = os.path.dirname(_app_path())
+    if bundle_dir not in sys.path:
+        sys.path.insert(0, bundle_dir)
+    try:
+        t = time.perf_counter()
+        from painel_atualizacao import gerenciador_da_pasta  # pandas, numpy, pyarrow...
+        print(f"[painel] bibliotecas de dados importadas em {time.perf_counter() - t:.2f}s")
+        t = time.perf_counter()
+        versao = gerenciador_da_pasta(_base_dir()).atual()
+        print(f"[painel] dados carregados em {time.perf_counter() - t:.2f}s "
+              f"({len(versao.dados.arquivos)} arquivo(s))")
+    except Exception as exc:
+        print(f"[painel] pré-carga dos dados falhou ({type(exc).__name__}: {exc}); o painel tenta ao abrir.")
+    t = time.perf_counter()
+    try:
+        importlib.import_module("plotly.graph_objects")  # o app importa só nas páginas com gráfico
+        print(f"[painel] plotly importado em {time.perf_counter() - t:.2f}s")
+    except ImportError:
+        pass
+    pronto = _esperar_porta(port)
+    print(f"[painel] pronto em {time.perf_counter() - _T0:.2f}s desde o início"
+          + ("" if pronto else " (servidor ainda não respondeu)"))
+    if not abrir_navegador:
+        return
+    # abre o navegador local já com os dados em memória
+    try:
+        webbrowser.open(local_url, new=1, autoraise=True)
+    except Exception:
+        pass
+
+def _argv_streamlit(app, endereco, port):
+    return [
         "streamlit", "run", app,
         "--server.headless=true",
         "--global.developmentMode=false",
         "--browser.gatherUsageStats=false",
-        "--server.address=0.0.0.0",
+        f"--server.address={endereco}",
         f"--server.port={port}",
         "--server.enableCORS=false",             # facilita acesso via LAN
         "--server.enableXsrfProtection=false"    # idem (use apenas em rede confiável)
     ]
 
-    local_url = f"http://127.0.0.1:{port}"
-    lan_url   = f"http://{lan}:{port}"
+def _iniciar_processo(port):
+    # mesmo executável (.exe ou python + este arquivo) em modo processo filho
+    cmd = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, os.path.abspath(__file__)]
+    return subprocess.Popen(cmd + [ARG_PROCESSO, str(port)], env=dict(os.environ, PAINEL_COMPARTILHADO="1"))
+
+def _varios_processos(port, local_url):
+    # N processos do Streamlit só em 127.0.0.1; o proxy na porta pública escolhe 1 por IP de cliente
+    from painel_proxy import ProxyPegajoso
+    portas = [_porta_local_livre() for _ in range(PROCESSOS)]
+    processos = [_iniciar_processo(p) for p in portas]
+    ProxyPegajoso(portas, "0.0.0.0", port).iniciar()
+    print(f"[painel] {PROCESSOS} processos (portas locais {', '.join(map(str, portas))}) atrás da porta {port}")
+
+    def abrir_quando_pronto():
+        if all(_esperar_porta(p) for p in portas):
+            print(f"[painel] processos prontos em {time.perf_counter() - _T0:.2f}s desde o início")
+            try:
+                webbrowser.open(local_url, new=1, autoraise=True)
+            except Exception:
+                pass
+    threading.Thread(target=abrir_quando_pronto, name="painel-abrir", daemon=True).start()
 
-    # abre o navegador local e imprime as URLs claras no console
     try:
-        webbrowser.open(local_url, new=1, autoraise=True)
-    except Exception:
+        while True:
+            time.sleep(2)
+            for i, proc in enumerate(processos):
+                if proc.poll() is not None:  # caiu: o proxy já manda os clientes dele para os outros
+                    print(f"[painel] processo da porta {portas[i]} parou (código {proc.returncode}); reiniciando.")
+                    processos[i] = _iniciar_processo(portas[i])
+    except KeyboardInterrupt:
         pass
+    finally:
+        for proc in processos:
+            proc.terminate()
+        for proc in processos:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+if __name__ == "__main__":
+    # no .exe (PyInstaller), os processos de leitura paralela do modo "todos" reentram por aqui
+    multiprocessing.freeze_support()
+    app = _app_path()
+
+    if ARG_PROCESSO in sys.argv:
+        # processo filho do modo PAINEL_PROCESSOS: só local; pré-carrega os dados sem abrir navegador
+        port = int(sys.argv[sys.argv.index(ARG_PROCESSO) + 1])
+        sys.argv = _argv_streamlit(app, "127.0.0.1", port)
+        threading.Thread(target=_pre_aquecer, args=(port, None, False), name="painel-pre-carga", daemon=True).start()
+        stcli.main()
+        sys.exit(0)
 
+    port = _pick_free_port()
+    lan = _lan_ip()
+    local_url = f"http://127.0.0.1:{port}"
+    lan_url   = f"http://{lan}:{port}"
+
+    # imprime as URLs claras no console
+    print(f"[painel] streamlit importado em {_T_STREAMLIT:.2f}s")
     print("\nVocê pode acessar o painel pelos endereços:")
     print(f"  Localhost: {local_url}")
     print(f"  Rede local (LAN): {lan_url}\n")
     print("Obs.: se não abrir pela LAN, confira o firewall do Windows e da sua rede.\n")
 
+    if PROCESSOS > 1:
+        _varios_processos(port, local_url)
+        sys.exit(0)
+
+    # Streamlit ouvindo em todas as interfaces
+    sys.argv = _argv_streamlit(app, "0.0.0.0", port)
+
+    # pré-carga em segundo plano
+    threading.Thread(target=_pre_aquecer, args=(port, local_url), name="painel-pre-carga", daemon=True).start()
+
     stcli.main()